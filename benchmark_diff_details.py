@@ -0,0 +1,136 @@
+"""
+Compares the Counter based retrieve_diff_details with the list based implementation it replaced on generated diffs.
+
+usage: python benchmark_diff_details.py [--runs N] [--max-list-lines N] [number of changed lines ...]
+
+The diffs have the given numbers of changed lines (default 10000 30000 100000), half of them removed and half added,
+a third of the added lines are the same as removed lines. Every implementation is run --runs times (default 3) and the
+best time is reported. The list based implementation is quadratic, it is skipped on diffs with more than
+--max-list-lines changed lines (default 30000).
+"""
+import os
+import random
+import sys
+import time
+
+
+curdir = os.path.dirname(os.path.realpath(__file__))
+if not curdir in sys.path:
+    sys.path.append(curdir)
+
+from modules.api_utils import retrieve_diff_details
+
+
+def retrieve_diff_details_lists(stdout) -> tuple:
+    """
+    The list based implementation retrieve_diff_details replaced, every removed line is looked up in and
+    removed from the list of added lines
+
+    Args:
+        stdout: output of a git diff process
+
+    Returns:
+        A tuples of the additions and the contents that has been added
+    """
+    lines = stdout.split("\n")
+    file1 = []
+    file2 = []
+
+    if len(lines) > 5:
+        for line in lines[5:]:
+            if line.startswith("-"):
+                file1.append(line[1:])
+
+            if line.startswith("+"):
+                file2.append(line[1:])
+
+        for line in file1:
+            if line in file2:
+                file2.remove(line)
+
+        return len(file2), [i[1:] for i in lines[5:] if i.startswith("+")]
+    else:
+        return 0, [""]
+
+
+def make_diff(n_lines, seed=0) -> str:
+    """
+    Generates the output of a git diff of a file
+
+    Args:
+        n_lines(int): number of changed lines
+        seed(int): seed of the random generator, default is 0
+
+    Returns:
+        the diff
+    """
+    rand = random.Random(seed)
+    removed = ["value_{} = compute({})".format(i, rand.randrange(n_lines)) for i in range(n_lines // 2)]
+    added = [line if rand.random() < 1 / 3 else "value_{} = compute({})".format(i, rand.randrange(n_lines))
+             for i, line in enumerate(removed)]
+    rand.shuffle(added)
+
+    header = ["diff --git a/gen.py b/gen.py", "index 0000001..0000002 100644", "--- a/gen.py", "+++ b/gen.py",
+              "@@ -1,{0} +1,{0} @@".format(n_lines // 2)]
+    return "\n".join(header + ["-" + l for l in removed] + ["+" + l for l in added]) + "\n"
+
+
+def best_time(func, arg, runs) -> float:
+    """
+    Returns the best time of running a function
+
+    Args:
+        func(callable): the function
+        arg: the argument of the function
+        runs(int): number of runs
+
+    Returns:
+        the best time in seconds
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark(sizes, runs=3, max_list_lines=30000) -> None:
+    """
+    Prints the best time of both implementations on diffs of the given sizes
+
+    Args:
+        sizes(list): numbers of changed lines
+        runs(int): number of times every implementation is run, default is 3
+        max_list_lines(int): largest diff the list based implementation is run on, default is 30000
+
+    Returns:
+        None
+    """
+    print("    {:>10}{:>14}{:>14}{:>14}".format("lines", "lists", "counters", "streamed"))
+    for n_lines in sizes:
+        diff = make_diff(n_lines)
+        expected = retrieve_diff_details_lists(diff) if n_lines <= max_list_lines else None
+        if expected is not None:
+            assert retrieve_diff_details(diff) == expected, "the implementations should give the same results"
+            lists = "{:>13.3f}s".format(best_time(retrieve_diff_details_lists, diff, runs))
+        else:
+            lists = "{:>14}".format("skipped")
+
+        counters = best_time(retrieve_diff_details, diff, runs)
+        streamed = best_time(lambda d: retrieve_diff_details(iter(d.split("\n"))), diff, runs)
+        print("    {:>10}{}{:>13.3f}s{:>13.3f}s".format(n_lines, lists, counters, streamed))
+    print("\n")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--runs": 3, "--max-list-lines": 30000}
+    for option in options:
+        if option in args:
+            i = args.index(option)
+            options[option] = int(args[i + 1])
+            args = args[:i] + args[i + 2:]
+
+    sizes = [int(a) for a in args] or [10000, 30000, 100000]
+    benchmark(sizes, runs=options["--runs"], max_list_lines=options["--max-list-lines"])
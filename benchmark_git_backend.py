@@ -0,0 +1,109 @@
+"""
+Compares the git backends stage by stage on repositories.
+
+usage: python benchmark_git_backend.py [--runs N] <repository path or clone url> [...]
+
+Clone urls are cloned into a temporary directory first. Every stage is run --runs times (default 3)
+with each backend and the best time is reported.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+curdir = os.path.dirname(os.path.realpath(__file__))
+if not curdir in sys.path:
+    sys.path.append(curdir)
+
+from modules.git_backend import Pygit2_Git_Backend, Subprocess_Git_Backend, pygit2, run_git
+
+
+file_ext = (".py", ".ipynb", ".js")
+
+
+def get_stages(backend, path) -> list:
+    """
+    Creates the stages of an analysis run with a backend on a repository
+
+    Args:
+        backend(Subprocess_Git_Backend): the git backend
+        path(str): path to the repository
+
+    Returns:
+        list of tuples of the stage name and a function running the stage
+    """
+    branch = backend.get_branch(path)
+    commits = backend.walk_name_status(path=path)
+    files = [p for p in run_git(["ls-files"], path)[0].split("\n") if p.endswith(file_ext)]
+    root, head = commits[-1][0], commits[0][0]
+
+    return [("branch", lambda: [backend.get_branch(path) for _ in range(10)]),
+            ("checkout", lambda: backend.checkout(branch, path)),
+            ("head commit", lambda: backend.get_head_commit(path)),
+            ("walk commits", lambda: backend.walk_name_status(path=path)),
+            ("diff root..head", lambda: backend.diff(root, head, files, path)),
+            ("read blobs", lambda: [backend.read_blob(head, f, path) for f in files])]
+
+
+def benchmark(path, runs=3) -> None:
+    """
+    Prints the best time of every stage with every backend on a repository
+
+    Args:
+        path(str): path to the repository
+        runs(int): number of times every stage is run, default is 3
+
+    Returns:
+        None
+    """
+    backends = [Subprocess_Git_Backend()]
+    if pygit2 is not None:
+        backends.append(Pygit2_Git_Backend())
+    else:
+        print("pygit2 is not installed, only the subprocess backend is benchmarked\n")
+
+    results = dict()
+    for backend in backends:
+        for stage, run in get_stages(backend, path):
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+            results.setdefault(stage, dict())[backend.name] = min(timings)
+
+    print("{}:".format(path))
+    print("    {:<16}".format("stage") + "".join("{:>14}".format(b.name) for b in backends))
+    for stage, timings in results.items():
+        print("    {:<16}".format(stage) + "".join("{:>13.3f}s".format(timings[b.name]) for b in backends))
+    print("\n")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    runs = 3
+    if "--runs" in args:
+        i = args.index("--runs")
+        runs = int(args[i + 1])
+        args = args[:i] + args[i + 2:]
+
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    for repo in args:
+        if os.path.isdir(repo):
+            benchmark(repo, runs)
+            continue
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            stdout, stderr, return_code = run_git(["clone", "--quiet", repo, tmp_dir])
+            if return_code == 0:
+                benchmark(tmp_dir, runs)
+            else:
+                print("Cloning {} failed: {}\n".format(repo, stderr))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
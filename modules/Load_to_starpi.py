@@ -1,14 +1,19 @@
 from datetime import datetime
 import os
 import sys
-import time
 import pandas as pd
 from app import get_user
 import pytz
 from dateutil import parser
 
 from modules.analyzer_utils import get_break_points, get_metric_category, get_metric_summary_dict, get_repo_meta_repo_analysis, send_graphql_query
+from modules.api_utils import meta_engine
+from modules.github_graphql import prefetch_repos_meta, prefetch_users_stats, repo_meta_store, user_stats_engine, user_stats_store
+from modules.history_checkpoint import history_checkpoints
+from modules.response_cache import github_response_cache
+from modules.token_pool import Token_Pool
 from modules.strapi_methods import get_table_data_strapi, get_trainee_data, insert_data_strapi, update_data_strapi
+from modules.workspace import sweep_workspaces
 
 
 
@@ -114,6 +119,8 @@ class Load_To_Strapi:
 
     methods:
         __init__: initializes the class
+        prefetch_repo_meta: Retrieves the repo meta data of all repos in github_df with batched GraphQL queries
+        prefetch_user_stats: Retrieves the issue, pull request and commit counts of all users in github_df with batched GraphQL queries
         get_analysis_data: Gets analysis data from api
                             Returns a dictionary of analysis data with repo meta, repo_analysis_metrics, commit_history and user as keys
         load_repo_meta_and_repo_to_strapi: Loads data to repo and repo_meta tables in strapi
@@ -129,7 +136,7 @@ class Load_To_Strapi:
 
     """
 
-    def __init__(self, platform, week, batch, run_number, base_url, github_df, github_token, strapi_token, columns_dict=columns_dict, default_vals_dict=default_vals_dict, run_type="main", metrics_detail_dict=metrics_detail_dict, cat_list=cat_list) -> None:
+    def __init__(self, platform, week, batch, run_number, base_url, github_df, github_token, strapi_token, columns_dict=columns_dict, default_vals_dict=default_vals_dict, run_type="main", metrics_detail_dict=metrics_detail_dict, cat_list=cat_list, github_tokens=None) -> None:
         """
         Initialize the class
         
@@ -147,6 +154,7 @@ class Load_To_Strapi:
             run_type (str): run type, indicates if the run is for main or for error fixing run, default is main
             metrics_detail_dict (dict): metrics detail dictionary
             cat_list (list): category list
+            github_tokens (list): github tokens to spread the requests over, default is None (github_token only)
             
         Returns:
             None
@@ -162,6 +170,7 @@ class Load_To_Strapi:
         self.client_url = self.base_url + "/graphql"
         self.github_df = github_df
         self.github_token = github_token
+        self.token_pool = Token_Pool(github_tokens or [github_token])
         self.strapi_token = strapi_token
         self.columns_dict = columns_dict
         self.default_vals_dict = default_vals_dict
@@ -181,7 +190,38 @@ class Load_To_Strapi:
         self.cat_list = cat_list
 
 
-    def get_analysis_data(self, user, repo_name, branch) -> dict:
+    def prefetch_repo_meta(self) -> None:
+        """
+        Retrieves the repo meta data of all repos in github_df with batched GraphQL queries
+        and keeps it in the repo meta store for get_analysis_data to read
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        headers = self.token_pool.get_headers(self.token_pool.lease("graphql"))
+        repos = zip(self.github_df["gh_username"], self.github_df["repo_name"], self.github_df["branch_name"])
+        prefetch_repos_meta(repos, headers)
+
+
+    def prefetch_user_stats(self) -> None:
+        """
+        Retrieves the issue, pull request and commit counts of all users in github_df with batched GraphQL queries
+        and keeps them in the user stats store for get_analysis_data to read
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        headers = self.token_pool.get_headers(self.token_pool.lease("graphql"))
+        prefetch_users_stats(self.github_df["gh_username"], headers)
+
+
+    def get_analysis_data(self, user, repo_name, branch, github_token=None) -> dict:
         """
         Gets analysis data from api
         Returns a dictionary of analysis data with repo meta, repo_analysis_metrics, commit_history and user as keys
@@ -190,13 +230,17 @@ class Load_To_Strapi:
             user (str): user name
             repo_name (str): repo name
             branch (str): branch name
+            github_token (str): github token to use, default is None (self.github_token)
 
         Returns:
             dict: analysis data
         """
         # get repo meta data and analysis data
+        github_token = github_token or self.github_token
         hld = dict()
-        repo_meta_repo_analysis = get_repo_meta_repo_analysis(user, self.github_token, repo_name, branch)
+        # the load keeps its own checkpoints, stored once the commit history is loaded, so api requests do not move them
+        checkpoint_key = "dag:{}/{}".format(user, repo_name) if history_checkpoints.enabled else None
+        repo_meta_repo_analysis = get_repo_meta_repo_analysis(user, github_token, repo_name, branch, checkpoint_key=checkpoint_key)
 
         hld["repo_meta"] = repo_meta_repo_analysis["repo_meta"]
 
@@ -212,7 +256,7 @@ class Load_To_Strapi:
         trainee = int(trainee_df[trainee_df["trainee_id"]==trainee_id].trainee.values[0])"""
 
         # get user data from github api
-        hld["user"] = get_user(user, self.github_token, api=False)
+        hld["user"] = get_user(user, github_token, api=False)
        
         return hld
 
@@ -778,6 +822,8 @@ class Load_To_Strapi:
         if "error" not in hld["commit_history"]:
             # get the repo commit history dict
             repo_commit_history_dict = hld["commit_history"]
+            # checkpoint of the retrieved head, only stored once the commit history is loaded
+            checkpoint = repo_commit_history_dict.pop("checkpoint", None)
 
             pluralapi = "github-branch-commit-histories"
             
@@ -859,6 +905,9 @@ class Load_To_Strapi:
                 commit_history_error_dict["branch"].append(branch)
                 commit_history_error_dict["error"].append(_r["error"])   
 
+            elif checkpoint:
+                history_checkpoints.store(**checkpoint)
+
         else:
             print("Error retrieving repo commit history data for user: {} and repo: {}\n".format(user, repo_name))
             commit_history_error_dict["trainee_id"].append(trainee_id)
@@ -1489,7 +1538,6 @@ class Load_To_Strapi:
         Returns:
             None
         """
-        counter = 0
         repo_table_error_dict = {"trainee_id":[], "user":[], "repo_name":[], "branch":[], "error":[]}
         assignment_table_error_dict = {"trainee_id":[], "user":[], "repo_name":[], "branch":[], "assignment_id":[], "error":[]}
         user_error_dict = {"trainee_id":[], "user":[], "repo_name":[], "branch":[], "error":[]}
@@ -1504,60 +1552,71 @@ class Load_To_Strapi:
 
         github_df["trainee"] = github_df.trainee.astype(int)
 
-        for i, row in github_df.iterrows():
-            counter += 1
-            user = row["gh_username"]
-            repo_name = row["repo_name"]
-            trainee_id = row["trainee_id"]
-            run_number = row["run_number"]
-            branch = row["branch_name"]
-            trainee = row["trainee"]
-            assignments_ids = row["assignments_ids"]
-            repo_id = None
-
-            print("\n\n\nRetrieving data for user: {} and repo: {}...".format(user, repo_name))
-            print("\n")
-            hld = dict()
-            if counter != 0 and counter%5 == 0:
-                print(user)
-                print("Sleeping for 20 seconds\n")
-                time.sleep(20)
-                print("Resumed...\n")
-
-            # get repo meta data and analysis data
-            hld = self.get_analysis_data(user, repo_name, branch)
-
-            _dict = dict()
-            _dict[trainee_id] =  hld
-            
-            counter += 1
-
-            # load repo and repo meta data into strapi
-            repo_id = self.load_repo_meta_and_repo_to_strapi(_dict, hld, repo_meta_error_dict, repo_table_error_dict, assignment_table_error_dict, trainee_id, repo_name, branch, user, trainee, assignments_ids)
-
-            if repo_id is not None:
-                # load repo_user_meta
-                self.load_user_meta_to_strapi(hld, repo_id, user_error_dict, user, repo_name, branch, trainee_id, trainee, _dict)
-
-                # load commit history
-                self.load_commit_history_to_strapi(hld, trainee, trainee_id, _dict, repo_id, commit_history_error_dict, user, repo_name, branch)
+        # remove the workspaces left behind on this host by loads that did not shut down cleanly
+        sweep_workspaces()
+
+        try:
+            # retrieve repo meta data and user stats for the whole cohort up front, only for the engines that read them
+            if meta_engine == "graphql":
+                self.prefetch_repo_meta()
+            if user_stats_engine == "graphql":
+                self.prefetch_user_stats()
+
+            for i, row in github_df.iterrows():
+                user = row["gh_username"]
+                repo_name = row["repo_name"]
+                trainee_id = row["trainee_id"]
+                run_number = row["run_number"]
+                branch = row["branch_name"]
+                trainee = row["trainee"]
+                assignments_ids = row["assignments_ids"]
+                repo_id = None
+
+                print("\n\n\nRetrieving data for user: {} and repo: {}...".format(user, repo_name))
+                print("\n")
+                hld = dict()
+
+                # get repo meta data and analysis data, github requests are paced by the rate limit scheduler
+                # on the token with the most remaining budget
+                hld = self.get_analysis_data(user, repo_name, branch, self.token_pool.lease())
+
+                _dict = dict()
+                _dict[trainee_id] =  hld
+
+                # load repo and repo meta data into strapi
+                repo_id = self.load_repo_meta_and_repo_to_strapi(_dict, hld, repo_meta_error_dict, repo_table_error_dict, assignment_table_error_dict, trainee_id, repo_name, branch, user, trainee, assignments_ids)
+
+                if repo_id is not None:
+                    # load repo_user_meta
+                    self.load_user_meta_to_strapi(hld, repo_id, user_error_dict, user, repo_name, branch, trainee_id, trainee, _dict)
+
+                    # load commit history
+                    self.load_commit_history_to_strapi(hld, trainee, trainee_id, _dict, repo_id, commit_history_error_dict, user, repo_name, branch)
                 
-                self.populate_lang_val_dict(hld, trainee, trainee_id, repo_id, error_dict=analysis_retrival_error_dict)
+                    self.populate_lang_val_dict(hld, trainee, trainee_id, repo_id, error_dict=analysis_retrival_error_dict)
 
-            else:
-                print("Error creating entry in to repo table. Hence other entries are skipped..\n")
-                continue
+                else:
+                    print("Error creating entry in to repo table. Hence other entries are skipped..\n")
+                    continue
         
-        self.update_lang_val_dict()
-        self.create_analysis_dict()
-        self.create_analysis_strapi_records()
-
-        # load analysis data into strapi
-        self.load_entries_to_strapi(error_dict=analysis_enrty_error_dict, pluralapi="github-analysis-details", entry_list=self.analysis_dict["analysis"])
-
-        # load analysis summary data into strapi
-        self.load_entries_to_strapi(error_dict=analysis_summary_entry_error_dict, pluralapi="github-analysis-summaries", entry_list=self.analysis_dict["analysis_summary"])
-
-        # save errors
-        self.save_errors(commit_history_error_dict, user_error_dict, repo_meta_error_dict, assignment_table_error_dict, analysis_retrival_error_dict, analysis_enrty_error_dict, analysis_summary_entry_error_dict)
+            self.update_lang_val_dict()
+            self.create_analysis_dict()
+            self.create_analysis_strapi_records()
+
+            # load analysis data into strapi
+            self.load_entries_to_strapi(error_dict=analysis_enrty_error_dict, pluralapi="github-analysis-details", entry_list=self.analysis_dict["analysis"])
+
+            # load analysis summary data into strapi
+            self.load_entries_to_strapi(error_dict=analysis_summary_entry_error_dict, pluralapi="github-analysis-summaries", entry_list=self.analysis_dict["analysis_summary"])
+
+            # save errors
+            self.save_errors(commit_history_error_dict, user_error_dict, repo_meta_error_dict, assignment_table_error_dict, analysis_retrival_error_dict, analysis_enrty_error_dict, analysis_summary_entry_error_dict)
+
+            # report how many github requests were answered from the response cache
+            print("GitHub response cache: {}\n".format(github_response_cache.get_stats()))
+            self.token_pool.print_usage_report()
+        finally:
+            # the cohort data is dropped also when the load fails, so the next run in the process does not read it
+            repo_meta_store.clear()
+            user_stats_store.clear()
 
@@ -1,15 +1,25 @@
-from collections import Counter
 import subprocess
-import requests
 
+from modules.author_cache import author_login_cache
+from modules.git_backend import git_backend
+from modules.github_graphql import retrieve_commit_authors
+from modules.history_checkpoint import history_checkpoints
+from modules.http_session import send_get_req
 
-def run_cmd_process(cmd_list) -> tuple:
+
+# commit details written before the raw changes and numstat of every commit in the log run with -z, every commit
+# starts with \x01 and the fields are separated by NUL, which cannot appear in messages, names or paths
+log_format = "--format=%x01%H%x00%ct%x00%aN%x00%aE%x00%s"
+
+
+def run_cmd_process(cmd_list, cwd=None) -> tuple:
     """
     Takes a list of elements of a shell command and executes the command
     Returns a tuple of the output, error and return code of the process.
 
     Args:
         cmd_list(list): list of elements of the shell command
+        cwd(str): directory the command is run in (optional) default: None (the current working directory)
 
     Returns:
         A tuple of the output, error and return code of the process
@@ -18,7 +28,8 @@ def run_cmd_process(cmd_list) -> tuple:
     process = subprocess.Popen(cmd_list,
                      stdout=subprocess.PIPE, 
                      stderr=subprocess.PIPE,
-                     universal_newlines=True)
+                     universal_newlines=True,
+                     cwd=cwd)
     
     # retrieve the output and error
     stdout, stderr = process.communicate()
@@ -27,45 +38,53 @@ def run_cmd_process(cmd_list) -> tuple:
 
 
 
-def send_get_req(_url, _header=None) -> tuple:
+def stream_cmd_process(cmd_list, cwd=None, sep="\n", chunk_size=65536):
     """
-    Sends a get request given a url and a header(optional) and returns a tuple of response and 
-    the status code
+    Takes a list of elements of a shell command and executes the command
+    Yields the parts of the output between separators as the process writes them, the output is never held
+    in memory as a whole. The process is killed if the output is not read to the end
 
     Args:
-        _url(str): url to send the request to
-        _header(dict): header to attach to the request (optional) default: None
+        cmd_list(list): list of elements of the shell command
+        cwd(str): directory the command is run in (optional) default: None (the current working directory)
+        sep(str): the separator of the parts of the output, default is a new line
+        chunk_size(int): number of characters read from the process at once, default is 65536
 
     Returns:
-        response, response status code
+        A generator of the parts of the output without the separators
     """
-    if _header:
-        resp = requests.get(_url, headers=_header)
-    else:
-        resp = requests.get(_url)
-    return resp, resp.status_code
-
-
-def get_git_branch():
+    process = subprocess.Popen(cmd_list,
+                     stdout=subprocess.PIPE,
+                     stderr=subprocess.DEVNULL,
+                     universal_newlines=True,
+                     cwd=cwd)
+    finished = False
+    try:
+        buffer = ""
+        while True:
+            chunk = process.stdout.read(chunk_size)
+            if not chunk:
+                break
+            *parts, buffer = (buffer + chunk).split(sep)
+            yield from parts
+        if buffer:
+            yield buffer
+        finished = True
+    finally:
+        process.stdout.close()
+        if not finished:
+            process.kill()
+        process.wait()
+
+
+def get_git_branch(cwd=None):
     """
     Returns the current git branch
-    """
-    #get branch name
-    stdout, stderr, return_code = run_cmd_process(cmd_list=['git', 'branch'])
-    if return_code == 0:
-        branch_extract = [a for a in stdout.split('\n') if a.find('*') >= 0]
-        if len(branch_extract) > 0:
-            branch = branch_extract[0]
-            branch = branch.replace('*', '').strip()
-        else:
-            branch = None
-    else:
-        branch = None
-    return branch
-
 
-
-    
+    Args:
+        cwd(str): path to the repository (optional) default: None (the current working directory)
+    """
+    return git_backend.get_branch(cwd or ".")
 
 
 class Retrieve_Commit_History:
@@ -73,13 +92,20 @@ class Retrieve_Commit_History:
         Retrieve commit history for a given branch
         
         Methods:
-            treat_details(): Treats the details of the commit history
+            count_commits(): Counts the commits of a revision
+            resolve_rev(): Resolves a revision to the sha of its commit
+            load_checkpoint(): Retrieves the checkpoint of the branch if the history can be continued from it
+            iter_log(): Runs git log and yields the details, raw changes and numstat of every commit
+            iter_commits(): Yields a record of every commit with the details, raw changes and stats
+            treat_commit(): Treats the details, raw changes and numstat of a commit
             treat_raw(): Treats the raw data of the commit history
-            treat_stat(): Treats the stats of the commit history
+            treat_stat(): Treats the numstat of the commit history
+            retrieve_rest_author_login(): Retrieves the github login of the author of a commit with the REST API
+            resolve_author_logins(): Resolves the github logins of commit authors from the cache or with one GraphQL query
             get_commit_history_and_contributors(): A dictionary containing the commit history, contributors, number of commits and number of contributors
         """
             
-    def __init__(self, branch_dict=None, github_dict=None) -> None:
+    def __init__(self, branch_dict=None, github_dict=None, stat_pathspec=None, cwd=None, checkpoint_key=None) -> None:
         """
         Initialize the class.
         Returns None.
@@ -87,6 +113,12 @@ class Retrieve_Commit_History:
         Args:
             branch_dict (dict): The branch dictionary containing the default branch and the branch to be analyzed. Default is None
             github_dict (dict): The github details dictionary containing the username and the repository name. Default is None
+            stat_pathspec (list): Pathspecs of the files additions and deletions are retrieved for, used on partial clones
+                                  where the content of other files is not downloaded. Default is None (all files)
+            cwd (str): The path to the repository. Default is None (the current working directory)
+            checkpoint_key (str): Key of the repository the checkpoints of its branches are stored under, such as owner/name.
+                                  With a checkpoint only the commits added since the last run are retrieved and the
+                                  contribution counts are continued from it. Default is None (the whole history is retrieved)
         """
 
         print("\nRetrieval of commit history initializing...\n")
@@ -98,6 +130,13 @@ class Retrieve_Commit_History:
         self.default_branch_not_found = False
         self.specified_branch_not_found = False
         self.no_branch = False
+        self.stat_pathspec = stat_pathspec
+        self.cwd = cwd
+        self.checkpoint_key = checkpoint_key
+        self.owner = None
+        self.repo = None
+        # revision arguments of the git log the commit history is read from, it is streamed when the history is retrieved
+        self.rev_args = None
 
         print("Retrieving commit logs...\n")
 
@@ -106,37 +145,33 @@ class Retrieve_Commit_History:
             self.default_branch = self.branch_dict['default']
             self.branch = self.branch_dict['branch']
 
-            curent_branch = get_git_branch()
+            curent_branch = get_git_branch(cwd=self.cwd)
             
             if curent_branch:
                 
                 if curent_branch != branch_dict["default"]:
-                    checkout_default_branch_return_code = run_cmd_process(cmd_list=["git", "checkout", self.default_branch])[2]
-                    checkout_branch_return_code = run_cmd_process(cmd_list=["git", "checkout", self.branch])[2]
+                    checkout_default_branch_return_code = git_backend.checkout(self.default_branch, cwd or ".")[1]
+                    checkout_branch_return_code = git_backend.checkout(self.branch, cwd or ".")[1]
                 
                 else:
                     checkout_default_branch_return_code = 0
-                    checkout_branch_return_code = run_cmd_process(cmd_list=["git", "checkout", self.branch])[2]
+                    checkout_branch_return_code = git_backend.checkout(self.branch, cwd or ".")[1]
 
 
                 if checkout_default_branch_return_code == 0 and checkout_branch_return_code == 0:
                     if self.branch == self.default_branch:
-                        self.log = run_cmd_process(cmd_list=["git", "log", '--pretty=format:**%H##%ct##%aN##%s', "--raw", "--stat"])[0]
-                        self.n_commit_default_to_branch = len(self.log.split("**"))-1
+                        self.rev_args = []
                     
                     else:
-                        log = run_cmd_process(cmd_list=["git", "log", "{}..{}".format(self.default_branch, self.branch), '--pretty=format:**%H##%ct##%aN##%s', "--raw", "--stat"])[0]
-                        if log == "":
+                        rev_range = "{}..{}".format(self.default_branch, self.branch)
+                        if self.count_commits(rev_range) == 0:
                             self.merged = True
                             print("\nNo unique commits found for the branch {}. The branch may have been merged with {} (default branch)\n".format(self.branch, self.default_branch))
-                            self.log = run_cmd_process(cmd_list=["git", "log", '--pretty=format:**%H##%ct##%aN##%s', "--raw", "--stat"])[0]
-                            self.n_commit_default_to_branch = len(self.log.split("**"))-1
+                            self.rev_args = []
                         else:
-                            self.log = log
+                            self.rev_args = [rev_range]
 
                 else:
-                    self.log = ""
-                    self.n_commit_default_to_branch = None
                     self.branch_not_found = True
 
                     if checkout_default_branch_return_code != 0:
@@ -151,24 +186,17 @@ class Retrieve_Commit_History:
                 self.no_branch = True
         
         else:
-            if not self.branch_not_found and not self.no_branch:
-                self.default_branch = get_git_branch()
-                self.branch = self.default_branch
-                self.log = run_cmd_process(cmd_list=["git", "log", '--pretty=format:**%H##%ct##%aN##%s', "--raw", "--stat"])[0]
-                self.n_commit_default_to_branch = len(self.log.split("**"))-1
-            else:
-                self.log = ""
-                self.n_commit_default_to_branch = None
+            self.default_branch = get_git_branch(cwd=self.cwd)
+            self.branch = self.default_branch
+            self.rev_args = []
 
         if not self.branch_not_found and not self.no_branch:
-            self.lines = self.log.split("**")
             self.headers = None
 
-            print("\nRetrieval of commit logs completed.\n")
+            # commits on the checked out branch, counted without reading the log
+            self.n_commit_default_to_branch = self.count_commits()
 
-            if not self.n_commit_default_to_branch:
-                log = run_cmd_process(cmd_list=["git", "log", '--pretty=format:**%H##%ct##%aN##%s', "--raw", "--stat"])[0]
-                self.n_commit_default_to_branch = len(log.split("**"))-1
+            print("\nRetrieval of commit logs completed.\n")
 
             if github_dict:
                 self.owner = github_dict['owner']
@@ -185,39 +213,174 @@ class Retrieve_Commit_History:
                 print("\nRetrieval of commit history initialized.\n")
         
         else:
-            self.lines = []
             self.headers = None
             self.html_link = None
-            self.owner = None
-            self.repo = None
 
 
 
 
-    def treat_details(self, d_list) -> tuple:
+    def count_commits(self, rev="HEAD") -> int:
         """
-        Treats the details of the commit history
-        Returns the commit sha, commit timestamp, author and message
-        
+        Counts the commits of a revision with git rev-list
+        Returns the number of commits, 0 if the revision does not exist
+
         Args:
-            d_list (list): The list of details
+            rev (str): The revision or revision range. Default is HEAD
 
         Returns:
-            A tuple containing the commit sha, commit timestamp, author and message
+            The number of commits
         """
-        details = d_list[0].split("##")
-        d_ = details[0],details[1],details[2],details[3]
-        return d_
+        stdout, stderr, return_code = run_cmd_process(cmd_list=["git", "rev-list", "--count", rev], cwd=self.cwd)
+        try:
+            return int(stdout.strip())
+        except ValueError:
+            return 0
+
+    def resolve_rev(self, rev) -> str:
+        """
+        Resolves a revision to the sha of its commit
+        Returns the sha, None if the revision does not exist
+
+        Args:
+            rev (str): The revision
+
+        Returns:
+            The sha of the commit
+        """
+        stdout, stderr, return_code = run_cmd_process(cmd_list=["git", "rev-parse", "--verify", "-q", rev + "^{commit}"], cwd=self.cwd)
+        return stdout.strip() if return_code == 0 else None
+
+    def load_checkpoint(self, scope) -> dict:
+        """
+        Retrieves the checkpoint of the branch, it is only used if its head is an ancestor of the checked out
+        branch, a force pushed branch is read from the start
+
+        Args:
+            scope (str): What else the counts of the checkpoint depend on
+
+        Returns:
+            A dictionary of the head sha, the number of commits and the contribution counts, None if there is no usable checkpoint
+        """
+        checkpoint = history_checkpoints.lookup(self.checkpoint_key, self.branch, scope)
+        if checkpoint is None:
+            return None
+
+        return_code = run_cmd_process(cmd_list=["git", "merge-base", "--is-ancestor", checkpoint["head_sha"], "HEAD"], cwd=self.cwd)[2]
+        if return_code != 0:
+            print("\nCheckpoint {} is not on the branch {}, retrieving the whole commit history\n".format(checkpoint["head_sha"], self.branch))
+            return None
+        return checkpoint
+
+    def iter_log(self, cmd_list):
+        """
+        Runs a git log with -z and log_format and parses its output as it is read from the process
+
+        Args:
+            cmd_list (list): The git log command
+
+        Returns:
+            A generator of tuples of the details (sha, timestamp, author, author email and message), the raw changes
+            as tuples of the status and the paths and the numstat as tuples of the additions, deletions and path of every commit
+        """
+        commit = None
+        tokens = stream_cmd_process(cmd_list=cmd_list, cwd=self.cwd, sep="\0")
+        try:
+            for token in tokens:
+                if token.startswith("\x01"):
+                    if commit is not None:
+                        yield commit
+                    commit = ([token[1:]] + [next(tokens, "") for _ in range(4)], [], [])
+                    continue
+
+                # the changes of a commit start on a new line after the details
+                token = token.lstrip("\n")
+                if not token or commit is None:
+                    continue
+
+                if token.startswith(":"):
+                    # :<old mode> <new mode> <old sha> <new sha> <status>, renames and copies have the old and the new path
+                    status = token.split(" ")[-1]
+                    paths = (next(tokens, ""),)
+                    if status[0] in ("R", "C"):
+                        paths = paths + (next(tokens, ""),)
+                    commit[1].append((status, paths))
+                else:
+                    # <additions>\t<deletions>\t<path>, renames and copies have an empty path followed by the old and the new path
+                    additions, deletions, path = token.split("\t", 2)
+                    if not path:
+                        path = next(tokens, "")
+                        next(tokens, "")
+                    commit[2].append((additions, deletions, path))
+        finally:
+            tokens.close()
+
+        if commit is not None:
+            yield commit
+
+    def iter_commits(self, rev_args=None):
+        """
+        Streams git log with the details, raw changes and numstat of every commit and yields a record of every commit.
+        With a stat pathspec the numstat is retrieved for the matching files only from a second log streamed alongside.
+        The logs are joined by sha, the second log is read until the sha of the commit is found and the numstat of the
+        commits read on the way is held until their turn, so the join does not depend on the order of the logs
+
+        Args:
+            rev_args (list): The revision arguments of git log. Default is None (the revision of the commit history)
+
+        Returns:
+            A generator of dictionaries of the commit sha, timestamp, author, author email, message and changed files
+        """
+        rev_args = self.rev_args if rev_args is None else rev_args
+        if self.stat_pathspec is None:
+            for details, raw, numstat in self.iter_log(["git", "log", "-z"] + rev_args + [log_format, "--raw", "--numstat"]):
+                yield self.treat_commit(details, raw, numstat)
+            return
+
+        # without --full-history the path limited log prunes side branches that do not change the files
+        stat_commits = self.iter_log(["git", "log", "-z", "--full-history"] + rev_args + [log_format, "--numstat", "--"] + self.stat_pathspec)
+        try:
+            pending = dict()
+            for details, raw, _ in self.iter_log(["git", "log", "-z"] + rev_args + [log_format, "--raw"]):
+                # commits that do not change the files are not in the second log, it is then read to the end
+                if details[0] not in pending:
+                    for stat_details, _, numstat in stat_commits:
+                        pending[stat_details[0]] = numstat
+                        if stat_details[0] == details[0]:
+                            break
+
+                yield self.treat_commit(details, raw, pending.pop(details[0], []))
+        finally:
+            stat_commits.close()
+
+    def treat_commit(self, details, raw, numstat) -> dict:
+        """
+        Treats the details, raw changes and numstat of a commit, the numstat of each file is joined to its raw change by path
+        Returns a record of the commit
+
+        Args:
+            details (list): The sha, timestamp, author, author email and message of the commit
+            raw (list): The raw changes of the commit
+            numstat (list): The numstat of the commit
+
+        Returns:
+            A dictionary of the commit sha, timestamp, author, author email, message and changed files
+        """
+        commit_sha, commit_ts, author, author_email, message = details
+        raw_dict = self.treat_raw(raw)
+
+        for f, s in self.treat_stat(numstat).items():
+            if f in raw_dict:
+                raw_dict[f].update(s)
+
+        return {"commit_sha": commit_sha, "commit_ts": commit_ts, "author": author, "author_email": author_email, "message": message, "files": raw_dict}
 
-    
-    
     def treat_raw(self, r_list) -> dict:
         """
         Treats the raw data of the commit history
-        Returns the files and the type of modification made to them
+        Returns the files and the type of modification made to them, renamed files under their old path
 
         Args:
-            r_list (list): The list of raw data
+            r_list (list): The list of tuples of the status and the paths of the raw changes
 
         Returns:
             A dictionary containing the files and the type of modification made to them
@@ -225,67 +388,97 @@ class Retrieve_Commit_History:
 
         change_status_d = {"M":"Modified", "A":"Created", "D":"Deleted", "R":"Renamed"}
         files__ = {}
-        for r in r_list:
-            r_ll = r.split("\t")
-            status = r_ll[0].split(" ")[-1]
+        for status, paths in r_list:
             if status[0] == "R":
-                similarity_index = status[1:]
-                status = "R"
-            
-
-            change_status = change_status_d[status]
-
-            if change_status == "Renamed":
-                file_n = r_ll[-2].strip()
-                files__[file_n] = {"change_status": change_status, "renamed_to":r_ll[-1].strip(), "similarity_index":similarity_index}
+                files__[paths[0]] = {"change_status": "Renamed", "renamed_to": paths[1], "similarity_index": status[1:]}
             else:
-                file_n = r_ll[-1]
-                files__[file_n] = {"change_status": change_status}
+                files__[paths[0]] = {"change_status": change_status_d.get(status[0], status)}
         return files__
 
     def treat_stat(self, s_list) -> dict:
         """
-        Treats the stats of the commit history
-        Returns the files and the lines added and deleted
+        Treats the numstat of the commit history
+        Returns the files and the lines added and deleted, renamed files under their old path
 
         Args:
-            s_list (list): The list of stats
+            s_list (list): The list of tuples of the additions, deletions and path of the numstat
 
         Returns:
             A dictionary containing the files and the lines added and deleted as well as modification details
         """
 
         files__ = {}
-        for s in s_list:
-            s_ll = s.split("|")
-            file_n = s_ll[0].strip()
-            if "Bin" and "->" in s_ll[1]:
-                changes = s_ll[1].strip()
-                files__[file_n] = {"file_type": "binary", "changes":changes }
-
+        for additions, deletions, file_n in s_list:
+            # git gives no line counts for binary files
+            if additions == "-":
+                files__[file_n] = {"file_type": "binary"}
             else:
-                try:
-                    tot_changes = int(s_ll[-1].split(" ")[-2].strip())
-                except:
-                    tot_changes = 1
-                
-                changes = s_ll[-1].split(" ")[-1]
-                try:
-                    mult_factor = tot_changes/len(changes)
-                except:
-                    mult_factor = 1
-                
-                additions = round(changes.count("+") * mult_factor,0)
-                deletions = round(changes.count("-") * mult_factor,0)
-                
-                if additions == 0 and deletions == 0:
-                    tot_changes = 0
                 files__[file_n] = {"file_type":"non-binary","additions":int(additions), "deletions":int(deletions)}
         return files__
 
+    def retrieve_rest_author_login(self, commit_sha) -> tuple:
+        """
+        Retrieves the github login of the author of a commit with the REST API
+        Returns a tuple of a flag that is True if the request succeeded and the login
+
+        Args:
+            commit_sha (str): The sha of the commit
+
+        Returns:
+            A tuple containing the success flag and the login (None if the author has no github account)
+        """
+        ref_url = "https://api.github.com/repos/{}/{}/commits/{}".format(self.owner, self.repo, commit_sha)
+        ref_r, ref_sc = send_get_req(ref_url, _header=self.headers)
+
+        if ref_sc == 200:
+            ref_json = ref_r.json()
+            if ref_json["author"]:
+                return True, ref_json["author"]["login"]
+            return True, None
+        return False, None
+
+    def resolve_author_logins(self, author_sha_dict) -> dict:
+        """
+        Resolves the github logins of commit authors. Authors are looked up in the persistent author cache first,
+        the rest are resolved with one GraphQL query over their commits and the REST API if the query fails
+        Returns a dictionary of the logins
+
+        Args:
+            author_sha_dict (dict): (author, author email) as keys and the sha of a commit of the author as values
+
+        Returns:
+            A dictionary with (author, author email) as keys and the github login as values
+        """
+        author_git_user_dict = {}
+        missing = {}
+        for author_key, commit_sha in author_sha_dict.items():
+            found, login = author_login_cache.lookup(*author_key)
+            if found:
+                author_git_user_dict[author_key] = login
+            else:
+                missing[author_key] = commit_sha
+
+        if missing:
+            resolved = retrieve_commit_authors(self.owner, self.repo, list(missing.values()), self.headers) if self.headers else {}
+
+            for author_key, commit_sha in missing.items():
+                if commit_sha in resolved:
+                    success, login = True, resolved[commit_sha]
+                else:
+                    success, login = self.retrieve_rest_author_login(commit_sha)
+
+                author_git_user_dict[author_key] = login
+                if success:
+                    author_login_cache.store(author_key[0], author_key[1], login)
+
+        return author_git_user_dict
+
     def get_commit_history_and_contributors(self, max_files=20) -> list:
         """
-        Returns a list of commit history
+        Returns a list of commit history, with a checkpoint key the commit history only lists the commits added since
+        the checkpoint of the branch while the number of commits and the contribution counts cover the whole branch.
+        With a checkpoint key the sha the history continues from is returned under "since_sha" and the checkpoint of the
+        new head under "checkpoint", it is stored with history_checkpoints.store(**checkpoint)
 
         Args:
             max_files (int): The maximum number of files to be returned for each commit, default is 20
@@ -297,136 +490,102 @@ class Retrieve_Commit_History:
         if not self.branch_not_found and not self.no_branch:
             print("Retriving commit history...")
 
-            if self.owner and self.repo:
-                author_git_user_dict = {}
+            # contribution counts of the commits up to the checkpoint, only the commits since are read
+            contributions = {}
+            n_checkpoint_commits = 0
+            checkpoint = None
+            if self.checkpoint_key and not self.merged:
+                head_sha = self.resolve_rev("HEAD")
+                # the commits of a branch compared to the default branch change when the default branch moves
+                scope = "{}\n{}".format(self.resolve_rev(self.default_branch) if self.rev_args else "", "\n".join(self.stat_pathspec or []))
+                checkpoint = self.load_checkpoint(scope)
+
+            if checkpoint:
+                print("Continuing the commit history from {}...".format(checkpoint["head_sha"]))
+                contributions = checkpoint["contributions"]
+                n_checkpoint_commits = checkpoint["commits"]
+                commits = self.iter_commits((self.rev_args or ["HEAD"]) + ["^" + checkpoint["head_sha"]])
+            else:
+                commits = self.iter_commits()
 
             if self.merged:
                 unique_commits = []
-                for l in run_cmd_process(cmd_list=["git", "log", self.branch, "--decorate", "--oneline"])[0].split("\n"):
+                seen = set()
+                for l in run_cmd_process(cmd_list=["git", "log", self.branch, "--decorate", "--oneline"], cwd=self.cwd)[0].split("\n"):
                     if "origin" in l and self.branch not in l:
                         break
-                    if l not in unique_commits:
+                    if l not in seen:
+                        seen.add(l)
                         unique_commits.append(l)
                 # if "Merge" in unique_commits[-1]:
                 #     unique_commits.pop(-1)
-                unique_commits = [l.split(" ")[0] for l in unique_commits]
-                unique_commits_lines = []
-
-                for commit in unique_commits:
-                    for line in self.lines:
-                        if commit in line:
-                            unique_commits_lines.append(line)
-                            break
-                self.lines = unique_commits_lines
-            
-            else:
-                self.lines = self.lines[1:]
-            
+                unique_commits = {l.split(" ")[0] for l in unique_commits} - {""}
+                abbrev_lengths = {len(c) for c in unique_commits}
 
+                commits = (record for record in commits if any(record["commit_sha"][:n] in unique_commits for n in abbrev_lengths))
 
+            # the commits are aggregated as they are read, only the files shown of every commit are kept
             commit_history = []
-            for line in self.lines:
-                l_split = line.split("\n")
-                if len(l_split) > 0:
-                    details = []
-                    raw = []
-                    stats = []
-                    for l in l_split:
-                        if l.__contains__("##"):
-                            details.append(l)
-                        if l.__contains__(":") and not l.__contains__("##") and len(l.split(" ")) == 5:
-                            raw.append(l)
-                        if l.__contains__("|"):
-                            stats.append(l)
-                    if len(details) > 0:
-                        commit_sha, commit_ts, author, message = self.treat_details(details)
-                        raw_dict = self.treat_raw(raw)
-                        stats_dict = self.treat_stat(stats)
-
-                        for f,s in stats_dict.items():
-                            for r in raw_dict.keys():
-                                if "/" in f:
-                                    f_ = f.split("/")[-1]
-                                    if f_ in r and "=>" not in f: 
-                                        raw_dict[r].update(s)
-                                else:
-                                    if r in f:
-                                        raw_dict[r].update(s)
-
-                        raw_dict = [{"file":k, "details":v} for k,v in raw_dict.items()]
-                        
-
-                        if self.owner and self.repo:
-                            if author not in author_git_user_dict.keys():
-
-                                ref_url = "https://api.github.com/repos/{}/{}/commits/{}".format(self.owner, self.repo, commit_sha)
-                                ref_r, ref_sc = send_get_req(ref_url, _header=self.headers)
-                                
-                                if ref_sc == 200:
-                                    ref_json = ref_r.json()
-                                    if ref_json["author"]:
-                                        author_git_user_dict[author] = ref_json["author"]["login"]
-                                    else:
-                                        author_git_user_dict[author] = None
-                                else:
-                                    author_git_user_dict[author] = None
-                                
-                                github_username = author_git_user_dict[author]
-
-                            else:
-                                github_username = author_git_user_dict[author]
-                        
-                        else:
-                            github_username = "unknown"
-
-                        commit_dict = {"commit_sha":commit_sha,"commit_ts":commit_ts, "author":author, "author_git_user":github_username, "message":message, "files":raw_dict}
-                        
-                        commit_history.append(commit_dict)
+            commit_authors = []
+            for record in commits:
+                files = [{"file":k, "details":v} for k,v in record["files"].items()]
 
                 if self.owner and self.repo:
-                    contributor_list = [c["author_git_user"] for c in commit_history]
-                    contribution_count = dict(Counter(contributor_list))
-
-
-                    addition_deletion_dict = {author_git_user:{"additions":0, "deletions":0, "author":[]} for author_git_user in contribution_count.keys()}
-                    for c in commit_history:
-                        for f in c["files"]:
-                            if "additions" in f["details"].keys():
-                                addition_deletion_dict[c["author_git_user"]]["additions"] += f["details"]["additions"]
-                                
-                            if "deletions" in f["details"].keys():
-                                addition_deletion_dict[c["author_git_user"]]["deletions"] += f["details"]["deletions"]
-                            
-                            addition_deletion_dict[c["author_git_user"]]["author"].append(c["author"])
-                    
-                    contribution_count = [ {"author_git_user":a, "author":list(set(addition_deletion_dict[a]["author"])),  "total_commits":c, "total_additions":addition_deletion_dict[a]["additions"], "total_deletions":addition_deletion_dict[a]["deletions"]} for a,c in contribution_count.items()]
-                
-                
-                
+                    author_key = (record["author"], record["author_email"])
+                    github_username = None
                 else:
-                    contributor_list = [c["author"] for c in commit_history]
-                    contribution_count = dict(Counter(contributor_list))
-
-                    addition_deletion_dict = {author:{"additions":0, "deletions":0} for author in contribution_count.keys()}
-                    for c in commit_history:
-                        for f in c["files"]:
-                            if "additions" in f["details"].keys():
-                                addition_deletion_dict[c["author"]]["additions"] += f["details"]["additions"]
-                            if "deletions" in f["details"].keys():
-                                addition_deletion_dict[c["author"]]["deletions"] += f["details"]["deletions"]
-                
-                    
-                    contribution_count = [ {"author":a, "total_commits":c, "total_additions":addition_deletion_dict[a]["additions"], "total_deletions":addition_deletion_dict[a]["deletions"]} for a,c in contribution_count.items()]
-                
-            for c in commit_history:
-                c["num_files"] = len(c["files"])
-                c["files"] = c["files"][:max_files]
-                for f in c["files"]:
+                    author_key = record["author"]
+                    github_username = "unknown"
+
+                # the sha of a commit of every author is used to resolve the github login of the author
+                contribution = contributions.setdefault(author_key, {"commits":0, "additions":0, "deletions":0, "has_files":False, "commit_sha":record["commit_sha"]})
+                contribution["commits"] += 1
+                contribution["additions"] += sum(f["details"].get("additions", 0) for f in files)
+                contribution["deletions"] += sum(f["details"].get("deletions", 0) for f in files)
+                contribution["has_files"] = contribution["has_files"] or len(files) > 0
+
+                commit_dict = {"commit_sha":record["commit_sha"],"commit_ts":record["commit_ts"], "author":record["author"], "author_git_user":github_username, "message":record["message"], "files":files[:max_files], "num_files":len(files)}
+                for f in commit_dict["files"]:
                     f["details"] = [{"name":k, "value":v} for k,v in f["details"].items()]
 
+                commit_history.append(commit_dict)
+                commit_authors.append(author_key)
+
+            # the checkpoint of the new head is returned for the caller to store once the history has been used,
+            # storing it earlier would skip the new commits on the next run if using them fails
+            new_checkpoint = None
+            if self.checkpoint_key and not self.merged and head_sha:
+                new_checkpoint = {"repo":self.checkpoint_key, "branch":self.branch, "head_sha":head_sha, "commits":n_checkpoint_commits + len(commit_history),
+                                  "contributions":contributions, "scope":scope}
+
+            if self.owner and self.repo:
+                author_git_user_dict = self.resolve_author_logins({k: c["commit_sha"] for k, c in contributions.items()})
+                for c, author_key in zip(commit_history, commit_authors):
+                    c["author_git_user"] = author_git_user_dict[author_key]
+
+                addition_deletion_dict = {}
+                for author_key, contribution in contributions.items():
+                    hld = addition_deletion_dict.setdefault(author_git_user_dict[author_key], {"commits":0, "additions":0, "deletions":0, "author":set()})
+                    hld["commits"] += contribution["commits"]
+                    hld["additions"] += contribution["additions"]
+                    hld["deletions"] += contribution["deletions"]
+                    if contribution["has_files"]:
+                        hld["author"].add(author_key[0])
+
+                contribution_count = [ {"author_git_user":a, "author":list(d["author"]),  "total_commits":d["commits"], "total_additions":d["additions"], "total_deletions":d["deletions"]} for a,d in addition_deletion_dict.items()]
+            
+            else:
+                contribution_count = [ {"author":a, "total_commits":d["commits"], "total_additions":d["additions"], "total_deletions":d["deletions"]} for a,d in contributions.items()]
+
 
             print("\nCommit history retreival completed\n")   
-            return {"commit_history": commit_history, "contribution_counts": contribution_count, "commits_on_branch":len(commit_history), "commits_on_default_to_branch":self.n_commit_default_to_branch, "num_contributors":len(contribution_count), "branch":self.branch, "default_branch":self.default_branch, "repo_name":self.repo, "html_link":self.html_link}
+            history_dict = {"commit_history": commit_history, "contribution_counts": contribution_count, "commits_on_branch":n_checkpoint_commits + len(commit_history), "commits_on_default_to_branch":self.n_commit_default_to_branch, "num_contributors":len(contribution_count), "branch":self.branch, "default_branch":self.default_branch, "repo_name":self.repo, "html_link":self.html_link}
+            # only the incremental retrieval reports where it continued from and the new checkpoint, its contribution
+            # counts are keyed by (author, author email) tuples that cannot be serialised to json
+            if self.checkpoint_key:
+                history_dict["since_sha"] = checkpoint["head_sha"] if checkpoint else None
+                history_dict["checkpoint"] = new_checkpoint
+            return history_dict
 
         else:
             print("\nCommit history retreival failed\n")
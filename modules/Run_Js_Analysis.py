@@ -1,7 +1,10 @@
+import os
 from typing import List
 import lizard
 from radon.complexity import cc_rank
 
+from modules.file_scheduler import file_scheduler
+
 
 class Run_Js_Analysis:
     """
@@ -9,30 +12,61 @@ class Run_Js_Analysis:
     
     methods:
         __init__: Initializes the class with the files to be analyzed and the dictionary of additions
+        analyze_file: Analyzes a file with lizard
         retrieve_file_comments: Retrieve the number of comments in a file
+        analyze_file_and_comments: Analyzes a file with lizard and retrieves the number of comments in it
         retrieve_file_level_analysis: Retrieve the file level analysis
         retrieve_repo_summary: Retrieve the repo summary
         run_analysis: Runs the analysis
     """
     
-    def __init__(self, files, additions_dict):
+    def __init__(self, files, additions_dict, cwd=None, inventory=None):
         """
         Initialize the class with the files to be analyzed and the dictionary of additions
         
         Args:
             files (List): List of tupples to files to be analyzed
             additions_dict (Dict): Dictionary of additions per file
+            cwd (str): Directory the files are relative to. Default is None (the current working directory)
+            inventory (File_Inventory): Inventory of the files, the JavaScript files are read from it. Default is None
 
         Returns:
             None
         """
-        self.files = [tup[0] for tup in files if tup[0].endswith(".js")]
+        if inventory is not None:
+            self.files = inventory.get_files([".js"])
+        else:
+            self.files = [tup[0] for tup in files if tup[0].endswith(".js")]
         self.additions_dict = additions_dict
-        self.file_analysis = [lizard.analyze_file(f) for f in self.files]
+        self.cwd = cwd
+        # the files are analysed in the processes of the file scheduler, the largest first
+        analyses = file_scheduler.map_files(self.analyze_file_and_comments, self.files, cwd=cwd, inventory=inventory)
+        self.file_analysis = [analysis for analysis, comments in analyses]
+        self.file_comments = {f: comments for f, (analysis, comments) in zip(self.files, analyses)}
         self.file_level = []
         self.repo_summary = dict()
 
 
+    def analyze_file(self, file_path):
+        """
+        Analyzes a file with lizard, the file names in the analysis stay relative to cwd
+
+        Args:
+            file_path (str): Path to the file to be analyzed relative to cwd
+
+        Returns:
+            The lizard file information
+        """
+        if self.cwd is None:
+            return lizard.analyze_file(file_path)
+
+        analysis = lizard.analyze_file(os.path.join(self.cwd, file_path))
+        analysis.filename = file_path
+        for funct in analysis.function_list:
+            funct.filename = file_path
+        return analysis
+
+
     def retrieve_file_comments(self,file_path) -> int:
         """
         Retrieve the number of comments in a file
@@ -43,6 +77,8 @@ class Run_Js_Analysis:
         Returns:
             int: Number of comments in the file
         """
+        if self.cwd is not None:
+            file_path = os.path.join(self.cwd, file_path)
         code = lizard.auto_read(file_path)
         context = lizard.FileInfoBuilder(file_path)
       
@@ -59,6 +95,19 @@ class Run_Js_Analysis:
 
 
 
+    def analyze_file_and_comments(self, file_path) -> tuple:
+        """
+        Analyzes a file with lizard and retrieves the number of comments in it, runs in the worker processes
+
+        Args:
+            file_path (str): Path to the file to be analyzed relative to cwd
+
+        Returns:
+            A tuple of the lizard file information and the number of comments
+        """
+        return self.analyze_file(file_path), self.retrieve_file_comments(file_path)
+
+
     def retrieve_file_level_analysis(self) -> None:
         """
         Retrieve the file level analysis
@@ -75,7 +124,7 @@ class Run_Js_Analysis:
             hld["cc"] = analysis.average_cyclomatic_complexity
             hld["cc_rank"] = cc_rank(hld["cc"])
             hld["additions"] = self.additions_dict[hld["filename"]]
-            hld["comments"] = self.retrieve_file_comments(hld["filename"])
+            hld["comments"] = self.file_comments[hld["filename"]]
             hld["tot_lines"] = hld["nloc"] + hld["comments"]
             hld["func_details"] = []
 
@@ -0,0 +1,173 @@
+import ast
+import fnmatch
+import os
+
+from radon.cli.tools import cc_to_dict, raw_to_dict
+from radon.complexity import sorted_results
+from radon.metrics import h_visit_ast, mi_compute, mi_rank
+from radon.raw import analyze
+from radon.visitors import ComplexityVisitor
+
+from modules.file_scheduler import file_scheduler
+
+
+# encoding the python files are read with, the environment variable is the one the radon cli reads
+py_files_encoding = os.environ.get("RADONFILESENCODING", "utf-8")
+
+
+class Run_Py_Analysis:
+    """
+    Runs radon analysis on Python codes in process. Every file is read and parsed once and the halstead,
+    cyclomatic complexity, raw and maintainability index metrics are computed from the same source and syntax
+    tree. The results have the shape of the json the radon cli writes with `radon hal -j`, `radon cc -s -j`,
+    `radon raw -s -j` and `radon mi -s -j`
+
+    methods:
+        __init__: Initializes the class with the directory to be analyzed
+        resolve: Resolves a path relative to cwd
+        is_python_file: Checks if a file is analysed by radon
+        iter_files: Yields the python files of the directory
+        analyze_file: Computes the metrics of a file
+        analyze_source: Computes the metrics of python source
+        run_analysis: Runs the analysis
+    """
+
+    def __init__(self, path="./", cwd=None) -> None:
+        """
+        Initialize the class with the directory to be analyzed
+
+        Args:
+            path (str): Path to the directory to be analyzed. Default is "./"
+            cwd (str): Directory path is relative to. Default is None (the current working directory)
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.cwd = cwd
+
+    def resolve(self, file_path) -> str:
+        """
+        Resolves a path relative to cwd
+
+        Args:
+            file_path (str): Path relative to cwd
+
+        Returns:
+            The path to open the file with
+        """
+        return file_path if self.cwd is None else os.path.join(self.cwd, file_path)
+
+    def is_python_file(self, file_path) -> bool:
+        """
+        Checks if a file is analysed by radon, python files and scripts with a python shebang.
+        Notebooks are listed by radon but only analysed with --include-ipynb, they are converted to python files instead
+
+        Args:
+            file_path (str): Path to the file relative to cwd
+
+        Returns:
+            True if the file is analysed
+        """
+        if file_path.endswith(".py"):
+            return True
+        if file_path.endswith(".ipynb"):
+            return False
+        try:
+            with open(self.resolve(file_path)) as fobj:
+                first_line = fobj.readline()
+        except Exception:
+            return False
+        return first_line.startswith("#!") and "python" in first_line
+
+    def iter_files(self):
+        """
+        Walks the directory like the radon cli, hidden directories and files are skipped and
+        the paths are normalized
+
+        Returns:
+            A generator of the paths of the python files relative to cwd
+        """
+        start = self.resolve(self.path)
+        for root, dirs, files in os.walk(start):
+            dirs[:] = [d for d in dirs if not fnmatch.fnmatch(d, ".*")]
+            rel_root = os.path.join(self.path, os.path.relpath(root, start))
+            for f in files:
+                file_path = os.path.normpath(os.path.join(rel_root, f))
+                if not f.startswith(".") and self.is_python_file(file_path):
+                    yield file_path
+
+    def analyze_file(self, file_path) -> dict:
+        """
+        Computes the metrics of a file, a metric that cannot be computed is a dictionary of the error
+        like the radon cli reports it
+
+        Args:
+            file_path (str): Path to the file relative to cwd
+
+        Returns:
+            A dictionary of the halstead ("hal"), cyclomatic complexity ("cc"), raw ("raw") and maintainability index ("mi") results
+        """
+        try:
+            with open(self.resolve(file_path), encoding=py_files_encoding) as fobj:
+                code = fobj.read()
+        except Exception as e:
+            return {k: {"error": str(e)} for k in ("hal", "cc", "raw", "mi")}
+        return self.analyze_source(code)
+
+    def analyze_source(self, code) -> dict:
+        """
+        Computes the metrics of python source, such as the content of the changes made to a file kept in memory
+
+        Args:
+            code (str): The python source
+
+        Returns:
+            A dictionary of the halstead ("hal"), cyclomatic complexity ("cc"), raw ("raw") and maintainability index ("mi") results
+        """
+        results = dict()
+        try:
+            raw = analyze(code)
+            results["raw"] = raw_to_dict(raw)
+        except Exception as e:
+            raw = None
+            results["raw"] = {"error": str(e)}
+
+        try:
+            ast_node = ast.parse(code)
+        except Exception as e:
+            for k in ("hal", "cc", "mi"):
+                results[k] = {"error": str(e)}
+            return results
+
+        halstead = h_visit_ast(ast_node)
+        results["hal"] = {"total": list(halstead.total), "functions": [[name, list(report)] for name, report in halstead.functions]}
+
+        complexity = ComplexityVisitor.from_ast(ast_node, no_assert=False)
+        results["cc"] = [cc_to_dict(block) for block in sorted_results(complexity.blocks)]
+
+        if raw is None:
+            results["mi"] = results["raw"]
+        else:
+            # multi line strings are counted as comments like `radon mi` does by default
+            comments = (raw.comments + raw.multi) / float(raw.sloc) * 100 if raw.sloc != 0 else 0
+            mi = mi_compute(halstead.total.volume, complexity.total_complexity, raw.lloc, comments)
+            results["mi"] = {"mi": mi, "rank": mi_rank(mi)}
+        return results
+
+    def run_analysis(self) -> dict:
+        """
+        Runs the analysis on the python files of the directory, the files are analysed in the processes of the file scheduler
+        Returns the results of every metric with the file paths as keys, files without blocks are left out of the
+        cyclomatic complexity results like the radon cli does
+
+        Returns:
+            A dictionary of the halstead ("hal"), cyclomatic complexity ("cc"), raw ("raw") and maintainability index ("mi") results
+        """
+        analysis_results = {"hal": dict(), "cc": dict(), "raw": dict(), "mi": dict()}
+        file_paths = list(self.iter_files())
+        for file_path, results in zip(file_paths, file_scheduler.map_files(self.analyze_file, file_paths, cwd=self.cwd)):
+            for k, v in results.items():
+                if k != "cc" or v:
+                    analysis_results[k][file_path] = v
+        return analysis_results
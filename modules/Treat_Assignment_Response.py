@@ -4,7 +4,8 @@ import pandas as pd
 from datetime import datetime
 from dateutil import parser
 import pytz
-import requests
+
+from modules.http_session import send_get_req
 
 
 class Get_Assignment_Data:
@@ -48,7 +49,7 @@ class Get_Assignment_Data:
 
     def send_get_req(self, _url, _header=None) -> tuple:
         """
-        Sends a get request given a url and a header(optional) and returns a tuple of response and 
+        Sends a get request given a url and a header(optional) over the shared http session and returns a tuple of response and 
         the status code
 
         Args:
@@ -58,11 +59,7 @@ class Get_Assignment_Data:
         Returns:
             response, response status code
         """
-        if _header:
-            resp = requests.get(_url, headers=_header)
-        else:
-            resp = requests.get(_url)
-        return resp, resp.status_code
+        return send_get_req(_url, _header)
 
 
 
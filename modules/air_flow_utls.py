@@ -9,6 +9,8 @@ import numpy as np
 import pandas as pd
 from modules.Load_to_starpi import Load_To_Strapi
 from modules.Prepare_Assignment_Submissions import PrepareAssignmentDf
+from botocore.exceptions import BotoCoreError, ClientError
+from modules.secret import get_ssm_secret
 
 from modules.Treat_Assignment_Response import Get_Assignment_Data
 
@@ -208,6 +210,44 @@ def get_github_token(ti, path_to_json=".env/secret.json", var_name="github_token
 
 
 
+def get_github_tokens(path_to_json=".env/secret.json", var_name="github_tokens", ssmkey=None)->list:
+    """
+    Gets the list of github tokens for the token pool from the json file or from aws secret manager.
+    The secret read from aws secret manager is kept in memory only, it is not written to the json file.
+    Falls back to the single github_token if no list is stored
+
+    Args:
+        path_to_json (str): path to the json file
+        var_name (str): variable name (key)
+        ssmkey (str): name of the secret in aws secret manager, default is GITHUB_TOKENS_SSM_KEY environment variable
+
+    Returns:
+        list: github tokens
+    """
+    ssmkey = ssmkey or os.environ.get("GITHUB_TOKENS_SSM_KEY")
+    auth = None
+    if os.path.exists(path_to_json):
+        try:
+            with open(path_to_json, "r") as f:
+                auth = json.load(f)
+        except (OSError, ValueError) as e:
+            print("Error: could not load github tokens from {}: {}".format(path_to_json, e))
+
+    if auth is None and ssmkey:
+        try:
+            auth = json.loads(get_ssm_secret(ssmkey))
+        # get_ssm_secret leaves the secret unset on the client errors it does not re-raise
+        except (BotoCoreError, ClientError, UnboundLocalError, ValueError) as e:
+            print("Error: could not load github tokens from secret {}: {}".format(ssmkey, e))
+
+    if not isinstance(auth, dict):
+        return []
+
+    tokens = auth.get(var_name) or [auth.get("github_token")]
+    return [t for t in tokens if t]
+
+
+
 def get_strapi_token(ti, path_to_json=".env/secret.json", var_name="strapi_token")->str:
     """
     Gets the strapi token from the json file
@@ -435,8 +475,9 @@ def upload_analysis_to_strapi(ti):
     base_url = ti.xcom_pull(task_ids="retrieve_state_")["base_url"][platform]
     github_token = ti.xcom_pull(task_ids="get_github_token_")
     strapi_token = ti.xcom_pull(task_ids="get_strapi_token_")
+    github_tokens = get_github_tokens()
 
-    to_strapi = Load_To_Strapi(platform, week, batch, run_number, base_url, github_df, github_token, strapi_token)
+    to_strapi = Load_To_Strapi(platform, week, batch, run_number, base_url, github_df, github_token, strapi_token, github_tokens=github_tokens)
 
     to_strapi.run_to_load()
 
@@ -1,7 +1,6 @@
 import json
 import pandas as pd
 import requests
-import time
 import os
 import sys
 
@@ -203,16 +202,11 @@ def get_github_analysis_dict(github_df, token=github_token)->dict:
         dict: The github analysis dict.
     """    
     _dict = dict()
-    counter = 0
     for _, userid, user, repo_name in github_df.itertuples():
         print("Retrieving data for user: {} and repo: {}...".format(user, repo_name))
         hld = dict()
-        if counter != 0 and counter%5 == 0:
-            print(user)
-            print("Sleeping for 60 seconds\n")
-            time.sleep(60)
-            print("Resumed...\n")
 
+        # github requests are paced by the rate limit scheduler
         repo_meta_repo_analysis = single_repos_meta_single_repos_analysis(user, token, repo_name, api=False)
 
         hld["user"] = get_user(user, token, api=False)
@@ -224,7 +218,6 @@ def get_github_analysis_dict(github_df, token=github_token)->dict:
             hld["repo_anlysis_metrics"] = repo_meta_repo_analysis["analysis_results"]
 
         _dict[userid] =  hld
-        counter += 1
         print("Data for user: {} and repo: {} retrieved\n".format(user, repo_name))
     return json.loads(json.dumps(_dict))
 
@@ -450,7 +443,7 @@ def get_break_points(series, cat_list=[0.99, 0.9, 0.75, 0.5], reverse=False, _ad
 
 
 # get repo meta data and analysis data
-def get_repo_meta_repo_analysis(user, github_token, repo_name, branch)->dict:
+def get_repo_meta_repo_analysis(user, github_token, repo_name, branch, checkpoint_key=None)->dict:
     """
     Gets the repo meta data and analysis data.
     Returns the repo meta data and analysis data.
@@ -459,11 +452,12 @@ def get_repo_meta_repo_analysis(user, github_token, repo_name, branch)->dict:
         user (str): The user.
         github_token (str): The github token.
         repo_name (str): The repo name.
+        checkpoint_key (str): The key the commit history checkpoints are stored under, default is None.
 
     Returns:
         dict: The repo meta data and analysis data.
     """
-    repo_meta_repo_analysis = single_repos_meta_single_repos_analysis(user, github_token, repo_name, branch, api=False)
+    repo_meta_repo_analysis = single_repos_meta_single_repos_analysis(user, github_token, repo_name, branch, api=False, checkpoint_key=checkpoint_key)
 
     hld = dict()
     try:
@@ -1,32 +1,48 @@
-import json
 import shutil
-import requests
 import os
 import subprocess
 import lizard
+from urllib.parse import parse_qs, urlsplit
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
 from radon.complexity import cc_rank
 from radon.metrics import mi_rank
 
 from modules.Retrieve_Commit_History import Retrieve_Commit_History
+from modules.Run_Py_Analysis import Run_Py_Analysis
+from modules.file_inventory import File_Inventory, exclude_list
+from modules.file_scheduler import file_scheduler
+from modules.git_backend import git_backend
+from modules.github_graphql import repo_meta_store, retrieve_repos_meta
+from modules.http_session import send_get_req
+from modules.mirror_store import mirror_enabled, mirror_store
+from modules.notebook_converter import convert_notebook
+from modules.response_cache import send_cached_get_req
+from modules.workspace import Workspace
 
+# number of metadata requests sent concurrently for a repository
+meta_workers = int(os.environ.get("GITHUB_META_WORKERS", 4))
 
-def send_get_req(_url, _header=None) -> tuple:
-    """
-    Sends a get request given a url and a header(optional) and returns a tuple of response and 
-    the status code
+# set to 1 to analyse the content of the changes made to the python files, kept in memory, in a separate stage
+analyze_changed_content = os.environ.get("ANALYZE_CHANGED_CONTENT", "0") == "1"
 
-    Args:
-        _url(str): url to send the request to
-        _header(dict): header to attach to the request (optional) default: None
+# pool on which repo metadata is retrieved while the repository is cloned and analysed
+repo_meta_executor = ThreadPoolExecutor(max_workers=meta_workers)
 
-    Returns:
-        response, response status code
-    """
-    if _header:
-        resp = requests.get(_url, headers=_header)
-    else:
-        resp = requests.get(_url)
-    return resp, resp.status_code
+# "rest" sends one request per metadata field, "graphql" retrieves all fields of all repos in one query
+meta_engine = os.environ.get("GITHUB_META_ENGINE", "rest")
+
+# "full" clones every blob in history, "partial" clones without blobs and checks out only the files analysed
+clone_mode = os.environ.get("GIT_CLONE_MODE", "full")
+
+# number of blobs requested per fetch when prefetching the blobs of a partial clone
+prefetch_chunk_size = 1000
+
+# marker files and directories reported by the file checks
+files_to_check = [".gitignore", "README.md", "requirements.txt", "dockerfile", ".dvcignore"]
+dirs_to_check = [".github", ".dvc"]
 
 
 def retrieve_langs(user, repo, headers) -> dict:
@@ -46,7 +62,7 @@ def retrieve_langs(user, repo, headers) -> dict:
     """
     languages_url = "https://api.github.com/repos/{}/{}/languages".format(
         user, repo)
-    return send_get_req(_url=languages_url, _header=headers)[0].json()
+    return send_cached_get_req(_url=languages_url, _header=headers)[0].json()
 
 
 def get_langs_contribs(langs_dict) -> list:
@@ -130,7 +146,7 @@ def retrieve_num_branches(user, repo, headers) -> int:
         user, repo)
 
     # retrieve number of branches and return the value
-    return len(send_get_req(_url=branches_url, _header=headers)[0].json())
+    return len(send_cached_get_req(_url=branches_url, _header=headers)[0].json())
 
 
 def retrieve_branch_sha(user, repo, headers, branch) -> str:
@@ -149,7 +165,7 @@ def retrieve_branch_sha(user, repo, headers, branch) -> str:
     """
     branch_url = "https://api.github.com/repos/{}/{}/branches/{}".format(
         user, repo, branch)
-    return send_get_req(_url=branch_url, _header=headers)[0].json()["commit"]["sha"]
+    return send_cached_get_req(_url=branch_url, _header=headers)[0].json()["commit"]["sha"]
 
 
 def retrieve_num_commits(user, repo, headers, sha=None) -> int:
@@ -167,20 +183,21 @@ def retrieve_num_commits(user, repo, headers, sha=None) -> int:
         integer of the number of commits
     """
 
-    _url = "https://api.github.com/repos/{}/{}/commits?per_page=1&page=1"
-    commit_url = _url.format(user, repo)
+    commit_url = "https://api.github.com/repos/{}/{}/commits?per_page=1".format(user, repo)
     if sha:
-        _url = _url + "&sha={}"
-        commit_url = _url.format(user, repo, sha)
+        commit_url = commit_url + "&sha={}".format(sha)
     try:
-        resp = send_get_req(_url=commit_url, _header=headers)[0]
-        commits = resp.headers["link"].split(',')[1].split("=")[2][:-6]
+        resp, status_code = send_get_req(_url=commit_url, _header=headers)
+        if status_code != 200:
+            return None
 
-        if sha:
-            commits = resp.headers["link"].split(',')[1].split("=")[2][:-4]
+        # with one commit per page the number of the last page is the total number of commits
+        if "last" in resp.links:
+            last_page = parse_qs(urlsplit(resp.links["last"]["url"]).query)["page"][0]
+            return int(last_page)
 
-        # retrieve and return the total number of commits
-        return int(commits)
+        # no pagination when the branch has a single commit or none
+        return len(resp.json())
     except:
         return None
 
@@ -202,7 +219,7 @@ def retrieve_contributors(user, repo, headers) -> list:
     contributors_url = "https://api.github.com/repos/{}/{}/contributors".format(
         user, repo)
     try:
-        contributors = send_get_req(
+        contributors = send_cached_get_req(
             _url=contributors_url, _header=headers)[0].json()
 
         # retrieve and return the list of contributors
@@ -261,55 +278,154 @@ def retrieve_views_details(user, repo, headers) -> dict:
         return None
 
 
-def retrieve_repo_meta(resp_json, headers, user, branch) -> dict:
+def retrieve_total_commits(user, repo, headers, branch=None) -> int:
+    """
+    Retrieves the number of commits on a branch of a github repository or on the default branch if no branch is given.
+    Returns integer of the number of commits
+
+    Args:
+        user(str): github username
+        repo(str): name of repo to retrieve meta data from
+        headers(dict): header to attach to the request
+        branch(str): name of branch to count commits on, default = None
+
+    Returns:
+        integer of the number of commits
+    """
+    if branch:
+        # Retrieve branch sha
+        branch_sha = retrieve_branch_sha(user, repo, headers, branch)
+        return retrieve_num_commits(user, repo, headers, sha=branch_sha)
+
+    return retrieve_num_commits(user, repo, headers)
+
+
+def submit_rest_repo_meta(executor, user, repo, headers, branch=None) -> dict:
+    """
+    Submits the REST requests for the meta data of a repository to an executor.
+    Returns a dictionary of the futures with the meta data keys as keys
+
+    Args:
+        executor(ThreadPoolExecutor): the executor to submit the requests to
+        user(str): github username
+        repo(str): name of repo to retrieve meta data from
+        headers(dict): header to attach to the request
+        branch(str): name of branch to count commits on, default = None
+
+    Returns:
+        dictionary of the futures
+    """
+    return {
+        # Retrieve language details
+        "languages": executor.submit(get_topk_langs, user, repo, headers, topk=3),
+        # Retrieve branches details
+        "branches": executor.submit(retrieve_num_branches, user, repo, headers),
+        # Retrieve commit activity details
+        "total_commits": executor.submit(retrieve_total_commits, user, repo, headers, branch),
+        # Retrieve contributors details
+        "contributors": executor.submit(retrieve_contributors, user, repo, headers)
+    }
+
+
+def submit_graphql_repo_meta(executor, user, repo, headers, repo_meta) -> dict:
     """
-    Retrieves repo meta data from response json and returns a dictionary of the details
+    Wraps meta data retrieved with the GraphQL API into futures and submits REST requests for
+    the fields the query could not answer.
+    Returns a dictionary of the futures with the meta data keys as keys
+
+    Args:
+        executor(ThreadPoolExecutor): the executor to submit the fallback requests to
+        user(str): github username
+        repo(str): name of repo to retrieve meta data from
+        headers(dict): header to attach to the request
+        repo_meta(dict): the details returned by the GraphQL query
+
+    Returns:
+        dictionary of the futures
+    """
+    futures = dict()
+    for k, v in repo_meta.items():
+        if k == "languages":
+            v = retrieve_topk_langs(get_langs_contribs(v), topk=3)
+        future = Future()
+        future.set_result(v)
+        futures[k] = future
+
+    if repo_meta["contributors"] is None:
+        # history too long to collect the authors in the query
+        futures["contributors"] = executor.submit(retrieve_contributors, user, repo, headers)
+    return futures
+
+
+def retrieve_repo_meta(resp_json, headers, user, branch=None, max_workers=meta_workers, engine=None) -> dict:
+    """
+    Retrieves repo meta data from response json and returns a dictionary of the details.
+    Meta data prefetched into the repo meta store is used first. For the rest, the rest engine sends the independent
+    requests for every repo concurrently on a bounded thread pool and the graphql engine retrieves the details of
+    all repos in one query, using REST only as fallback.
 
     Args:
         resp_json(json): url to send the request to
         headers(dict): header to attach to the request
         user(str): github username
-        branch(str): name of branch to retrieve sha of
+        branch(str): name of branch to retrieve sha of, default = None
+        max_workers(int): maximum number of requests in flight, default = 4
+        engine(str): "rest" or "graphql", default = GITHUB_META_ENGINE environment variable or "rest"
 
     Returns:
         dictionary of the details
     """
     dt = resp_json
-    for repo in dt.keys():
+    engine = engine or meta_engine
 
-        # Retrieve language details
-        dt[repo]["languages"] = get_topk_langs(user, repo, headers, topk=3)
+    # meta data prefetched for the cohort is used as is
+    meta = {repo: repo_meta_store.get(user, repo, branch) for repo in dt.keys()}
 
-        # Retrieve branches details
-        dt[repo]["branches"] = retrieve_num_branches(user, repo, headers)
+    missing = [repo for repo, repo_meta in meta.items() if repo_meta is None]
+    if engine == "graphql" and missing:
+        fetched = retrieve_repos_meta([(user, repo, branch) for repo in missing], headers)
+        meta.update({repo: fetched.get((user, repo, branch)) for repo in missing})
 
-        # Retrieve branch sha
-        if branch:
-            branch_sha = retrieve_branch_sha(user, repo, headers, branch)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = dict()
+        for repo, repo_meta in meta.items():
+            if repo_meta is None:
+                futures[repo] = submit_rest_repo_meta(executor, user, repo, headers, branch)
+            else:
+                futures[repo] = submit_graphql_repo_meta(executor, user, repo, headers, repo_meta)
+
+        for repo, repo_futures in futures.items():
+            for k, future in repo_futures.items():
+                dt[repo][k] = future.result()
+
+            """# Retrieve clones details
+            try:
+                dt[repo]["clones"] = retrieve_clone_details(user, repo, headers)
+            except:
+                dt[repo]["clones"] = "Cannot get Acess"
+            try:
+                # Retrieve views(visitors) details
+                dt[repo]["visitors"] = retrieve_views_details(user, repo, headers)
+            except:
+                 dt[repo]["visitors"] = "Cannot get Acess" """
+    return dt
 
-            # Retrieve commit activity details
-            dt[repo]["total_commits"] = retrieve_num_commits(
-                user, repo, headers, sha=branch_sha)
 
-        else:
-            # Retrieve commit activity details
-            dt[repo]["total_commits"] = retrieve_num_commits(
-                user, repo, headers)
+def submit_repo_meta(resp_json, headers, user, branch=None) -> Future:
+    """
+    Starts retrieving repo meta data in the background so that it overlaps with cloning and analysing the repository.
+    Returns a future whose result is the dictionary returned by retrieve_repo_meta
 
-        # Retrieve contributors details
-        dt[repo]["contributors"] = retrieve_contributors(user, repo, headers)
+    Args:
+        resp_json(json): url to send the request to
+        headers(dict): header to attach to the request
+        user(str): github username
+        branch(str): name of branch to retrieve sha of, default = None
 
-        """# Retrieve clones details
-        try:
-            dt[repo]["clones"] = retrieve_clone_details(user, repo, headers)
-        except:
-            dt[repo]["clones"] = "Cannot get Acess"
-        try:
-            # Retrieve views(visitors) details
-            dt[repo]["visitors"] = retrieve_views_details(user, repo, headers)
-        except:
-             dt[repo]["visitors"] = "Cannot get Acess" """
-    return dt
+    Returns:
+        future of the dictionary of the details
+    """
+    return repo_meta_executor.submit(retrieve_repo_meta, resp_json=resp_json, headers=headers, user=user, branch=branch)
 
 
 def check_lang_exit(user, repo, headers, lang_list) -> bool:
@@ -330,13 +446,14 @@ def check_lang_exit(user, repo, headers, lang_list) -> bool:
     return True in [l_c.lower() == l_r for l_c in lang_list for l_r in repo_lang_list]
 
 
-def run_cmd_process(cmd_list) -> tuple:
+def run_cmd_process(cmd_list, cwd=None) -> tuple:
     """
     Takes a list of elements of a shell command and executes the command
     Returns a tuple of the output, error and return code of the process.
 
     Args:
         cmd_list(list): list of elements of the shell command
+        cwd(str): directory the command is run in (optional) default: None (the current working directory)
 
     Returns:
         A tuple of the output, error and return code of the process
@@ -345,7 +462,8 @@ def run_cmd_process(cmd_list) -> tuple:
     process = subprocess.Popen(cmd_list,
                                stdout=subprocess.PIPE,
                                stderr=subprocess.PIPE,
-                               universal_newlines=True)
+                               universal_newlines=True,
+                               cwd=cwd)
 
     # retrieve the output and error
     stdout, stderr = process.communicate()
@@ -353,52 +471,58 @@ def run_cmd_process(cmd_list) -> tuple:
     return stdout, stderr, process.returncode
 
 
+def resolve_path(path, cwd=None) -> str:
+    """
+    Resolves a path relative to a directory
+
+    Args:
+        path(str): the relative path
+        cwd(str): the directory (optional) default: None (the current working directory)
 
-def retriev_files(path, file_ext, exclude_list=[".git", ".ipynb_checkpoints", "__pycache__", "node_modules"]) -> list:
+    Returns:
+        the resolved path
+    """
+    if cwd is None:
+        return path
+    return os.path.join(cwd, path)
+
+
+
+def retriev_files(path, file_ext, exclude_list=[".git", ".ipynb_checkpoints", "__pycache__", "node_modules"], cwd=None, inventory=None) -> list:
     """
     Takes the path to the directory where search is to be done recursively and 
     the file extention of files to look for
     Returns a list of tuples of the relative path of language files , relative path of 
-    language files with filenames prefixed with changed
+    language files with filenames prefixed with changed.
+    The excluded directories, other than .git, that have files with the given extensions are removed from the
+    checkout so the analyses run on the whole directory do not include them
 
     Args:
         path(str): path to the directory where search is to be done recursively
         file_ext(lst): file extention of files to look for with the "." included
                         example ".py"
-        exclude_list(lst): list of directories to exclude from the search
+        exclude_list(lst): list of directories to exclude from the search, used when no inventory is given
+        cwd(str): directory path is relative to (optional) default: None (the current working directory)
+        inventory(File_Inventory): inventory of the files of path (optional) default: None (path is scanned)
 
     Returns:
         A list of tuples of the relative path of language files , relative path of language files 
         with filenames prefixed with changed
     """
-    r_list = [(os.path.join(root, fn), os.path.join(root, "changed_"+fn))
-              for root, _, files in os.walk(path, topdown=False)
-              if not root.startswith("__") and not root.startswith("..")
-              for fn in files for ext in file_ext if fn.endswith(ext)]
-
-    filter_list = ["lib", "bin", "etc", "include",
-                   "share", "var", "lib64", "venv"]
-
-    filter_list = list(set(filter_list + exclude_list))
-    take_out = []
-    for root in filter_list:
-        for tup in r_list:
-            path_split_l = tup[0].lower().split("/")
+    if inventory is None:
+        filter_list = ["lib", "bin", "etc", "include",
+                       "share", "var", "lib64", "venv"]
+        inventory = File_Inventory(list(set(filter_list + exclude_list))).scan_dir(path, cwd=cwd)
 
-            if root in path_split_l:
+    # the inventory does not enter the excluded directories, they are only walked until a language file is found
+    for dir_path in inventory.excluded_dirs:
+        if os.path.basename(dir_path).lower() == ".git":
+            continue
+        dir_path = resolve_path(dir_path, cwd)
+        if any(fn.endswith(ext) for _, _, files in os.walk(dir_path) for fn in files for ext in file_ext):
+            shutil.rmtree(dir_path, ignore_errors=True)
 
-                path_split = tup[0].split("/")
-                dir_path = "/".join(path_split[: path_split_l.index(root)+1])
-                take_out.append(tup)
-                try:
-                    shutil.rmtree(dir_path)
-                except:
-                    pass
-                # r_list.remove(tup)
-
-    r_list = [tup for tup in r_list if tup not in take_out]
-
-    return r_list
+    return [(f, os.path.join(os.path.dirname(f), "changed_" + os.path.basename(f))) for f in inventory.get_files(file_ext)]
 
 
 def retrieve_init_last_commit_sha(stdout) -> tuple:
@@ -430,55 +554,109 @@ def retrieve_init_last_commit_sha(stdout) -> tuple:
             return (None, None)
 
 
-def retrieve_diff_details(stdout) -> tuple:
+def retrieve_init_last_commit_shas(paths, rev="HEAD", pathspec=None, cwd=None) -> dict:
     """
-    Takes the out put from a git log cmd process and retrieves the first and the most current commit shas
+    Retrieves the first and the most current commit shas of several files with a single git log pass over the history,
+    following renames like git log --follow. Gives the same shas as retrieve_init_last_commit_sha on the output of
+    git log --follow for each file
+    Returns a dictionary of the paths as keys and tuples of the first and the most current commit shas as values
 
     Args:
-        stdout: out put from a git log cmd process
+        paths(list): paths of the files relative to the repository
+        rev(str): revision whose history is walked, default is HEAD
+        pathspec(list): git pathspecs limiting the files in the log, used on partial clones (optional) default: None
+        cwd(str): path to the repository (optional) default: None (the current working directory)
 
     Returns:
-        A tuples of the additions and the contents that has been added
+        A dictionary of the paths and tuples of the first and the most current commit shas
+    """
+    # name of each file at the point of history being walked, newest commit first
+    names = dict()
+    for path in paths:
+        names.setdefault(os.path.normpath(path), []).append(path)
+    commit_shas = {path: [] for path in paths}
+
+    for sha, changes in git_backend.walk_name_status(rev=rev, pathspec=pathspec, path=cwd or "."):
+        renames = []
+        for status, change_paths in changes:
+            name = change_paths[-1]
+            if status[0] == "R" and name in names:
+                renames.append((change_paths[0], name))
+
+            for path in names.get(name, []):
+                if not commit_shas[path] or commit_shas[path][-1] != sha:
+                    commit_shas[path].append(sha)
+
+        for old_name, new_name in renames:
+            names.setdefault(old_name, []).extend(names.pop(new_name, []))
+
+    init_last_dict = dict()
+    for path, shas in commit_shas.items():
+        if len(shas) > 2:
+            init_last_dict[path] = (shas[-1], shas[0])
+        elif shas:
+            init_last_dict[path] = (shas[0], shas[0])
+        else:
+            init_last_dict[path] = (None, None)
+    return init_last_dict
+
+
+def retrieve_diffs(init_sha, last_sha, paths, cwd=None) -> dict:
     """
-    # split the output into lines
-    lines = stdout.split("\n")
-    file1 = []
-    file2 = []
-    
-    if len(lines) > 5:
-        for line in lines[5:]:
-            if line.startswith("-"):
-                file1.append(line[1:])
-
-            if line.startswith("+"):
-                file2.append(line[1:])
-        
-        for line in file1:
-            if line in file2:
-                file2.remove(line)
-        
-        try:
-            return len(file2), [i[1:] for i in lines[5:] if i.startswith("+")]
-        except:
-            return 0, [""]
-    else:
-        return 0, [""]
+    Retrieves the diffs of several files between two commits with a single diff of the git backend
+    Returns a dictionary of the paths as keys and the output git diff gives for each file on its own as values
+
+    Args:
+        init_sha(str): the initial commit sha
+        last_sha(str): the latter commit sha
+        paths(list): paths of the files relative to the repository
+        cwd(str): path to the repository (optional) default: None (the current working directory)
+
+    Returns:
+        A dictionary of the paths and the output of git diff for each file
+    """
+    if init_sha == last_sha:
+        return {path: "" for path in paths}
+
+    return git_backend.diff(init_sha, last_sha, paths, cwd or ".")
 
 
-def save_file(file_name, content) -> None:
+def retrieve_diff_details(stdout) -> tuple:
     """
-    Takes a filename and content. Then writes the content to an opened file and save it 
-    with the filename given
+    Takes the output of a git diff of a file and counts the lines added, an added line that is the same as a
+    removed line is not counted. The added and removed lines are counted in Counters so the diff is read once
+    Returns a tuple of the additions and the content that has been added
 
     Args:
-        file_name(str): file name to save the content with
-        content(list): list of content with each line as an element
+        stdout: output of a git diff process, as a string or as an iterable of its lines without the line breaks
+                such as the output of stream_cmd_process
 
     Returns:
-        None
+        A tuples of the additions and the contents that has been added
     """
-    with open(file_name, "w") as f:
-        f.write("\n".join(content))
+    lines = iter(stdout.split("\n") if isinstance(stdout, str) else stdout)
+
+    # the first lines are the header of the diff
+    if len(list(islice(lines, 5))) < 5:
+        return 0, [""]
+
+    removed = Counter()
+    added = Counter()
+    content = []
+    has_changes = False
+    for line in lines:
+        has_changes = True
+        if line.startswith("-"):
+            removed[line[1:]] += 1
+        elif line.startswith("+"):
+            added[line[1:]] += 1
+            content.append(line[1:])
+
+    if not has_changes:
+        return 0, [""]
+
+    # an added line cancels out one removed line with the same text
+    return sum((added - removed).values()), content
 
 
 def create_repo_dir(repo_name, tmp_dir="tmp") -> str:
@@ -510,18 +688,28 @@ def create_repo_dir(repo_name, tmp_dir="tmp") -> str:
     return repo_path
 
 
-def clone_repo(clone_url, repo_path) -> tuple:
+def clone_repo(clone_url, repo_path, sparse_patterns=None) -> tuple:
     """
     Runs a sub process to clone reposiories given the clone url and the path to the directory to clone into.
+    Unless disabled with GIT_MIRROR_ENABLED=0 the repository is cloned from a local mirror that is fetched
+    incrementally, so only new objects are transferred from github.
+    With sparse patterns the repository is cloned from github without blobs instead, see partial_clone.
     Returns the stderr and return code of the sub process.
 
     Args:
         clone_url(str): the git clone url of the repository to be cloned
         repo_path(str): the path to the directory to clone into
+        sparse_patterns(list): sparse checkout patterns of the files to check out (optional) default: None
 
     Returns:
         the stderr and return code of the sub process.
     """
+    if sparse_patterns:
+        return partial_clone(clone_url, repo_path, sparse_patterns)
+
+    if mirror_enabled:
+        return mirror_store.clone(clone_url, repo_path)
+
     # run cmd process to clone repo
     stdout, stderr, return_code = run_cmd_process(
         cmd_list=["git", "clone", clone_url, repo_path])
@@ -529,50 +717,143 @@ def clone_repo(clone_url, repo_path) -> tuple:
     return stderr, return_code
 
 
-def check_out_branch(branch_name) -> tuple:
+def get_sparse_patterns(file_ext, files_to_check=files_to_check, dirs_to_check=dirs_to_check) -> list:
     """
-    Runs a sub process to checkout a branch given the branch name.
-    Returns the stderr and return code of the sub process.
+    Creates the sparse checkout patterns of the files analysed: files with the given extensions
+    and the marker files and directories in any directory
 
     Args:
-        branch_name(str): the name of the branch to checkout
+        file_ext(lst): file extention of files to look for with the "." included
+                        example ".py"
+        files_to_check(list): marker files, default are the files reported by the file checks
+        dirs_to_check(list): marker directories, default are the directories reported by the file checks
 
     Returns:
-        the stderr and return code of the sub process.
+        list of the sparse checkout patterns
+    """
+    return ["*" + ext for ext in file_ext] + files_to_check + [d + "/" for d in dirs_to_check]
+
+
+def partial_clone(clone_url, repo_path, sparse_patterns) -> tuple:
+    """
+    Clones a repository without blobs (--filter=blob:none) and checks out only the files matching the sparse patterns.
+    The blobs of other files are never downloaded unless a git command needs their content, in which case
+    git fetches them lazily from the origin.
+    Returns the stderr and return code of the clone
+
+    Args:
+        clone_url(str): the git clone url of the repository to be cloned
+        repo_path(str): the path to the directory to clone into
+        sparse_patterns(list): sparse checkout patterns of the files to check out
+
+    Returns:
+        the stderr and return code of the clone
     """
-    # run cmd process to clone repo
     stdout, stderr, return_code = run_cmd_process(
-        cmd_list=["git", "checkout", branch_name])
+        cmd_list=["git", "clone", "--filter=blob:none", "--no-checkout", clone_url, repo_path])
+
+    if return_code == 0:
+        for cmd_list in [["sparse-checkout", "set", "--no-cone"] + sparse_patterns, ["checkout", "--quiet"]]:
+            _, checkout_stderr, return_code = run_cmd_process(cmd_list=["git", "-C", repo_path] + cmd_list)
+            if return_code != 0:
+                return checkout_stderr, return_code
 
     return stderr, return_code
 
 
-def get_additions_and_save_contents(files, commit_sha):
+def prefetch_blobs(pathspec, rev="HEAD", cwd=None) -> tuple:
     """
-    Retrieves the additions added in a file between two given commits and saves the content of the changes made.
+    Fetches the blobs of every version of the files matching the pathspec in the history of rev in as few
+    requests as possible, so a partial clone does not fetch them lazily one diff at a time.
+    Returns the stderr and return code of the fetch
+
+    Args:
+        pathspec(list): git pathspecs of the files
+        rev(str): revision whose history is prefetched, default is HEAD
+        cwd(str): path to the repository (optional) default: None (the current working directory)
+
+    Returns:
+        the stderr and return code of the fetch
+    """
+    # rename detection would read the content of the blobs being prefetched
+    stdout, stderr, return_code = run_cmd_process(
+        cmd_list=["git", "log", "--format=", "--raw", "--no-abbrev", "--no-renames", rev, "--"] + pathspec, cwd=cwd)
+    if return_code != 0:
+        return stderr, return_code
+
+    blobs = set()
+    for line in stdout.split("\n"):
+        if line.startswith(":"):
+            blobs.update(line.split("\t")[0].split(" ")[2:4])
+    blobs.discard("0" * 40)
+    blobs = sorted(blobs)
+
+    print("Prefetching {} blobs...\n".format(len(blobs)))
+    stderr = ""
+    for i in range(0, len(blobs), prefetch_chunk_size):
+        stdout, stderr, return_code = run_cmd_process(
+            cmd_list=["git", "fetch", "--quiet", "--no-tags", "--no-write-fetch-head", "--recurse-submodules=no",
+                      "--filter=blob:none", "origin"] + blobs[i:i + prefetch_chunk_size], cwd=cwd)
+        if return_code != 0:
+            return stderr, return_code
+
+    return stderr, 0
+
+
+def check_out_branch(branch_name, cwd=None) -> tuple:
+    """
+    Checks out a branch given the branch name with the git backend.
+    Returns the stderr and return code of the checkout.
+
+    Args:
+        branch_name(str): the name of the branch to checkout
+        cwd(str): path to the repository (optional) default: None (the current working directory)
+
+    Returns:
+        the stderr and return code of the checkout.
+    """
+    return git_backend.checkout(branch_name, cwd or ".")
+
+
+def get_additions_and_save_contents(files, commit_sha, cwd=None, changed_contents=None):
+    """
+    Retrieves the additions added in a file between two given commits and saves the content of the changes made
+    in memory, the checkout is not modified.
+    Files with the same initial and latter commits are diffed together in one git diff.
     Returns a dictionary of filenames as keys and the additions added as values.
 
     Args:
         files(str): A list of tuples of the relative path of language files , relative path of language files 
                     with filenames prefixed with changed
         commit_sha(str): tuples of the initial and the latter commit shas
+        cwd(str): path to the repository the files are relative to (optional) default: None (the current working directory)
+        changed_contents(dict): dictionary the content of the changes made to every changed file is saved in with the
+                                file paths as keys (optional) default: None (the content is not kept)
 
     Returns:
         A dictionary of filenames as keys and the additions added as values.
     """
 
-    additions_dict = dict()
+    # group the files by their commit shas
+    sha_groups = dict()
     for tup in zip(files, commit_sha):
         if tup[1][0] is not None:
-            # run git diff command
-            stdout, stderr, _ = run_cmd_process(
-                cmd_list=["git", "diff", tup[1][0], tup[1][1], "--", tup[0][0]])
+            sha_groups.setdefault(tup[1], []).append(tup[0][0])
+
+    # run git diff commands
+    diffs = dict()
+    for shas, paths in sha_groups.items():
+        diffs.update(retrieve_diffs(shas[0], shas[1], paths, cwd=cwd))
 
+    additions_dict = dict()
+    for tup in zip(files, commit_sha):
+        if tup[1][0] is not None:
             # retrieve the additions and the content of the changed files
-            additions, content = retrieve_diff_details(stdout)
+            additions, content = retrieve_diff_details(diffs[tup[0][0]])
 
             # save the content of the changed files
-            save_file(file_name=tup[0][1], content=content)
+            if changed_contents is not None:
+                changed_contents[tup[0][0]] = "\n".join(content)
 
             # add the additions to the dictionary
             additions_dict[tup[0][0]] = additions
@@ -612,7 +893,7 @@ def get_hal_summary(hal_result_dict) -> dict:
     return hal_summary_dict
 
 
-def get_file_checks(exclude_list, file_extensions, files_to_check, dirs_to_check, path="./"):
+def get_file_checks(exclude_list, file_extensions, files_to_check, dirs_to_check, path="./", cwd=None, inventory=None):
     """
     Checks for the existence of files with the given extensions, directories,and filenames in the given path recursively.
     Returns A dictionary of the file checks and number of files
@@ -620,161 +901,116 @@ def get_file_checks(exclude_list, file_extensions, files_to_check, dirs_to_check
 
     Args:
         path (str): The path to check.
-        exclude_list (list): A list of directories to exclude.
+        exclude_list (list): A list of directories to exclude, used when no inventory is given.
         file_extensions (list): A list of file extensions to check.
         files_to_check (list): A list of files to check.
         dirs_to_check (list): A list of directories to check.
+        cwd (str): The directory path is relative to (optional) default: None (the current working directory)
+        inventory (File_Inventory): inventory of the files of path (optional) default: None (path is scanned)
 
     Returns:
         dict: A dictionary of the file checks and number of files
     """
-    exclude = exclude_list
-    exclude_roots = [i.lower() for i in exclude]
-
-
-    count_dict = {"num_dirs": 0, "num_files": 0}
-    extension_checks = {"num_" + ext.lower(): 0 for ext in file_extensions}
-    file_checks = {f.lower(): False for f in files_to_check}
-    dir_checks = {dir.lower(): False for dir in dirs_to_check}
-
-    for i in os.walk(path):
-        check_list = [True if i[0].lower().__contains__("/" + e.lower()+ "/")
-                    or i[0].lower().startswith("./" + e.lower() + "/") 
-                    or i[0].lower() == e.lower() 
-                    else False for e in exclude_roots]
-
-        if sum(check_list) == 0 or len(exclude_roots) == 0:
-            
-            dirs = i[1]
-            _files = i[2]
-
-            # check for the existence of interested files and file extentions
-            for f in _files:
-                if f.lower() in file_checks:
-                    file_checks[f.lower()] = True
-
-            for ig in exclude:
-                # remove files from the directories to exclude
-                for f in _files:
-                     if f.lower().startswith("./" + ig.lower() + "/") or f.lower() == ig.lower() or f.lower().__contains__("/" + ig.lower() + "/"):
-                         _files.remove(f)
-                # remove the directories to exclude
-                try:
-                    dirs.remove(ig)
-                except:
-                    pass
-
-            # count directories
-            count_dict["num_dirs"] += len(dirs)
-
-            # count files
-            count_dict["num_files"] += len(_files)
-
-            # check for the existence of interesting dirs
-            for dir in dirs:
-                if dir.lower() in dir_checks:
-                    dir_checks[dir.lower()] = True
-
-            for f in _files:
-                # check for the existence of interested file extentions
-                for ext in file_extensions:
-                    if f.endswith(ext):
-                        extension_checks["num_"+ext] += 1
+    if inventory is None:
+        inventory = File_Inventory(exclude_list).scan_dir(path, cwd=cwd)
 
-        else:
-            pass
-            #print ("{} is excluded\n".format(i[0]))
+    return inventory.get_file_checks(file_extensions, files_to_check, dirs_to_check)
 
 
-    checks_results_dict = dict()
-    checks_results_dict["interested_files"] = file_checks
-    checks_results_dict["interested_files"].update(dir_checks)
-    checks_results_dict["interested_files"] = [
-        {"name": k, "present": v} for k, v in checks_results_dict["interested_files"].items()]
-    checks_results_dict.update(count_dict)
-    checks_results_dict.update(extension_checks)
-
-    return checks_results_dict
-
-
-def run_pyanalysis(path="./") -> dict:
+def run_pyanalysis(path="./", cwd=None) -> dict:
     """
-    Runs a subprocess to under take python code analysis recursively given the path to a directory on which 
-    to run the analysis.
+    Runs python code analysis recursively given the path to a directory on which to run the analysis.
+    The analysis runs in process, every file is parsed once for all the metrics and the results have the
+    shape of the json of the radon cli.
     Returns 
 
     Args:
         path(str): path to the directory on which code analysis is carried out on. Default = "./"
+        cwd(str): directory path is relative to (optional) default: None (the current working directory)
 
     Returns:
         A dictionary of filenames as keys and the dictionary of code metrics as values.
     """
     analysis_dict = {"halstead_complexity": "hal", "cyclomatic_complexity": "cc",
                      "raw_metrics": "raw", "maintainability_index": "mi"}
+    print("python code analysis\n")
+    radon_results = Run_Py_Analysis(path=path, cwd=cwd).run_analysis()
+    print("Success\n")
+
     analysis_results = {}
     for k, v in analysis_dict.items():
         if k == "halstead_complexity":
-            print(k, "\n")
-            stdout, stderr, return_code = run_cmd_process(
-                cmd_list=["radon", v, path, "-j"])
+            analysis_results[k] = get_hal_summary(radon_results[v])
+        else:
+            analysis_results[k] = radon_results[v]
+    return analysis_results
 
-            if return_code == 0:
-                analysis_results[k] = get_hal_summary(
-                    json.loads(stdout.strip()))
-                print("Success\n")
 
-            else:
-                analysis_results[k] = json.loads(stderr.strip())
-                print("Error\n")
+def run_changed_content_analysis(changed_contents) -> dict:
+    """
+    Runs python code analysis on the content of the changes made to the python files, kept in memory
+    by get_additions_and_save_contents. The content of other files is skipped.
+
+    Args:
+        changed_contents(dict): file paths as keys and the content of the changes as values
+
+    Returns:
+        A dictionary of the code metrics with the same keys as the results of run_pyanalysis, with the file paths as keys
+    """
+    analysis_dict = {"halstead_complexity": "hal", "cyclomatic_complexity": "cc",
+                     "raw_metrics": "raw", "maintainability_index": "mi"}
+    analyser = Run_Py_Analysis()
+    radon_results = {v: dict() for v in analysis_dict.values()}
+    for f, content in changed_contents.items():
+        if not f.endswith(".py"):
+            continue
+        for k, v in analyser.analyze_source(content).items():
+            if k != "cc" or v:
+                radon_results[k][f] = v
 
+    analysis_results = {}
+    for k, v in analysis_dict.items():
+        if k == "halstead_complexity":
+            analysis_results[k] = get_hal_summary(radon_results[v])
         else:
-            # run radon code analysis
-            print(k, "\n")
-            stdout, stderr, return_code = run_cmd_process(
-                cmd_list=["radon", v, path, "-s", "-j"])
-
-            # if there is no error
-            if return_code == 0:
-                analysis_results[k] = json.loads(stdout.strip())
-                print("Success\n")
-            else:
-                analysis_results[k] = json.loads(stderr.strip())
-                print("Error\n")
+            analysis_results[k] = radon_results[v]
     return analysis_results
 
 
-def convert_nb_to_py(path_list):
+def convert_nb_to_py(path_list, cwd=None, write=True):
     """
-    Converts a notebook to a python file.
+    Converts notebooks to python files in process, the notebooks are read without loading their outputs
+    and converted in the processes of the file scheduler.
 
     Args:
         path_list(list): A list of paths to the notebooks to be converted.
+        cwd(str): directory the paths are relative to (optional) default: None (the current working directory)
+        write(bool): if the python files are written next to the notebooks, default is True
 
     Returns:
-        A list of paths to the converted python files.
+        A dictionary of the paths of the notebooks converted ("success") and the notebooks that could not be converted ("fail"),
+        without writing the scripts are returned as well ("scripts") with the paths of the python files as keys
     """
-    conversion_success = []
-    for path in path_list:
-        stdout, stderr, return_code = run_cmd_process(
-            cmd_list=["jupyter", "nbconvert", path, "--to", "python"])
-        if return_code == 0:
-            conversion_success.append(True)
-        else:
-            conversion_success.append(False)
+    scripts = file_scheduler.map_files(partial(convert_notebook, cwd=cwd, write=write), path_list, cwd=cwd)
 
     out_dict = {"success": [], "fail": []}
-    for i in range(len(conversion_success)):
-        if conversion_success[i]:
-            out_dict["success"].append(path_list[i])
+    for path, script in zip(path_list, scripts):
+        if script is not None:
+            out_dict["success"].append(path)
         else:
-            out_dict["fail"].append(path_list[i])
+            out_dict["fail"].append(path)
+
+    if not write:
+        out_dict["scripts"] = {os.path.splitext(path)[0] + ".py": script for path, script in zip(path_list, scripts) if script is not None}
     return out_dict
 
 
-def run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, token, branch=None, path="./") -> tuple:
+def run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, token, branch=None, path="./", workspace=None, checkpoint_key=None, keep_changed_contents=False) -> tuple:
     """
     Abstract a processes involved from cloning and retrieving of commit shas to comparing changes that has occured between
     the first and current commits as well as retrieval of commit history on a given branch.
+    With GIT_CLONE_MODE=partial only the files with the given extensions and the marker files are downloaded and
+    checked out, the commit history then reports additions and deletions of those files only.
     Returns a tuple of stderr, return_code of the cloning process, additions_dict, files, file_check_results, commit_history_dict, converted_nbs
 
     Args:
@@ -786,61 +1022,78 @@ def run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, token
                         example ".py"
         branch(str): the branch to be used for the analysis, default = "None"
         token(str): the github token to be used for the analysis
+        workspace(Workspace): the workspace the repository is cloned into, paths are relative to its root
+                              (optional) default: None (a new workspace, removed before returning, pass one to analyse the files afterwards)
+        checkpoint_key(str): key the checkpoints of the commit history of the repository are stored under, the commit history
+                             is then retrieved since the last checkpoint and the checkpoint of the new head is returned in it
+                             (optional) default: None (the whole commit history is retrieved)
+        keep_changed_contents(bool): if the content of the changes is kept in workspace.changed_contents when ANALYZE_CHANGED_CONTENT is set,
+                                     only set by callers that report the changed content analysis, default: False
 
     Returns:
         A tuple of stderr, return_code of the cloning process, additions_dict and files
     """
     # dir for named repo
-    repo_path = create_repo_dir(repo_name)
+    if workspace is None:
+        with Workspace(repo_name, size_kb=repo_dict.get("size")) as workspace:
+            return run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, token, branch=branch, path=path, workspace=workspace,
+                                                    checkpoint_key=checkpoint_key, keep_changed_contents=keep_changed_contents)
+    repo_path = workspace.create()
+    cwd = workspace.root
+
+    sparse_patterns = None
+    if clone_mode == "partial":
+        sparse_patterns = get_sparse_patterns(file_ext)
 
     # clone repo
     stderr, return_code = clone_repo(
-        repo_path=repo_path, clone_url=repo_dict["clone_url"])
+        repo_path=repo_path, clone_url=repo_dict["clone_url"], sparse_patterns=sparse_patterns)
 
     # if there is no error
     if return_code == 0:
 
-        # change working directory to cloned reository
-        os.chdir(repo_path)
-
         default_branch = None
 
         github_dict = {"owner": user, "repo": repo_name, "token": token}
 
         # checkout to branch
         if branch:
-            default_branch = get_git_branch()
-            stderr, return_code = check_out_branch(branch_name=branch)
-
-            # retrive commit history
-            branch_dict = {"default": default_branch, "branch": branch}
-            ret_commit = Retrieve_Commit_History(
-                github_dict=github_dict, branch_dict=branch_dict)
+            default_branch = get_git_branch(cwd=cwd)
+            stderr, return_code = check_out_branch(branch_name=branch, cwd=cwd)
         else:
-            # retrieve commit history
-            default_branch = get_git_branch()
-            branch_dict = {"default": default_branch, "branch": default_branch}
-            ret_commit = Retrieve_Commit_History(
-                github_dict=github_dict, branch_dict=branch_dict)
+            default_branch = get_git_branch(cwd=cwd)
+            branch = default_branch
+
+        if sparse_patterns:
+            # fetch the blobs the commit history and the diffs below need in one go
+            prefetch_blobs(pathspec=sparse_patterns, cwd=cwd)
+
+        # retrive commit history
+        branch_dict = {"default": default_branch, "branch": branch}
+        ret_commit = Retrieve_Commit_History(
+            github_dict=github_dict, branch_dict=branch_dict, stat_pathspec=sparse_patterns, cwd=cwd, checkpoint_key=checkpoint_key)
 
         commit_history_dict = ret_commit.get_commit_history_and_contributors()
 
-        # check for the existence of files with the given file extension
+        # one pass over the checkout, or over the tree of the branch for a sparse checkout that only has the
+        # analysed files, shared by the file checks, the lists of language files and the analysers
+        inventory = File_Inventory(exclude_list)
+        if sparse_patterns:
+            inventory.scan_git_tree(path, cwd=cwd)
+        else:
+            inventory.scan_dir(path, cwd=cwd)
+        workspace.inventory = inventory
 
-        exclude_list = [".git", ".ipynb_checkpoints", "__pycache__", "node_modules",
-                        "lib", "bin", "etc", "include", "share", "var", "lib64", "venv"]
+        # check for the existence of files with the given file extension
         file_extensions = ["py", "js", "ipynb"]
-        files_to_check = [".gitignore", "README.md",
-                          "requirements.txt", "dockerfile", ".dvcignore"]
-        dirs_to_check = [".github", ".dvc"]
-
         file_check_results = get_file_checks(
-            path=path, exclude_list=exclude_list, file_extensions=file_extensions, files_to_check=files_to_check, dirs_to_check=dirs_to_check)
+            exclude_list=exclude_list, file_extensions=file_extensions, files_to_check=files_to_check, dirs_to_check=dirs_to_check,
+            path=path, cwd=cwd, inventory=inventory)
 
         # retrieve jupyter notebook paths
         if ".ipynb" in file_ext:
             nb_paths_list = [tup[0] for tup in retriev_files(
-                path=path, file_ext=[".ipynb"])]
+                path=path, file_ext=[".ipynb"], cwd=cwd, inventory=inventory)]
 
         converted_nbs = []
 
@@ -848,13 +1101,19 @@ def run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, token
         if file_check_results["num_ipynb"] > 0:
             print("Converting notebooks to python scripts...")
             converted_nbs = convert_nb_to_py(
-                path_list=nb_paths_list)["success"]
+                path_list=nb_paths_list, cwd=cwd)["success"]
+
+            # index the converted scripts
+            for nb_path in converted_nbs:
+                py_path = os.path.splitext(nb_path)[0] + ".py"
+                if os.path.isfile(resolve_path(py_path, cwd)):
+                    inventory.add_file(*os.path.split(py_path))
 
         #run_cmd_process(cmd_list=["git", "add", "*"])
         #run_cmd_process(cmd_list=["git", "commit", "-m", "converted jupyter notebooks to python scripts"])
 
         # rerieve language files
-        files = retriev_files(file_ext=file_ext, path=path)
+        files = retriev_files(file_ext=file_ext, path=path, cwd=cwd, inventory=inventory)
 
         # if branch and default_branch != branch:
         #     commit_sha = [retrieve_init_last_commit_sha(run_cmd_process(cmd_list=["git", "log", "{}..{}".format(default_branch,branch), "--follow", tup[0]])[0])
@@ -863,10 +1122,13 @@ def run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, token
         #     commit_sha = [retrieve_init_last_commit_sha(run_cmd_process(cmd_list=["git", "log", "--follow", tup[0]])[0])
         #                 for tup in files]
 
-        commit_sha = [retrieve_init_last_commit_sha(run_cmd_process(cmd_list=["git", "log", "--follow", tup[0]])[0])
-                      for tup in files]
+        # first and last commits of all files in one pass over the history
+        init_last_dict = retrieve_init_last_commit_shas([tup[0] for tup in files], pathspec=sparse_patterns, cwd=cwd)
+        commit_sha = [init_last_dict[tup[0]] for tup in files]
 
-        additions_dict = get_additions_and_save_contents(files, commit_sha)
+        # the content of the changes is kept in the workspace for the changed content analysis
+        workspace.changed_contents = dict() if keep_changed_contents and analyze_changed_content else None
+        additions_dict = get_additions_and_save_contents(files, commit_sha, cwd=cwd, changed_contents=workspace.changed_contents)
 
         return stderr, return_code, additions_dict, files, file_check_results, commit_history_dict, converted_nbs
 
@@ -874,7 +1136,7 @@ def run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, token
         return stderr, return_code, dict(), list(), dict(), dict(), list()
 
 
-def get_commit_hist(repo_name, user, token, repo_dict, branch=None) -> dict:
+def get_commit_hist(repo_name, user, token, repo_dict, branch=None, workspace=None) -> dict:
     """
     Retrieve commit history on a given branch.
 
@@ -884,13 +1146,19 @@ def get_commit_hist(repo_name, user, token, repo_dict, branch=None) -> dict:
         token(str): the github token to be used for the analysis
         repo_dict(dict): dictionary of metadata returned as a response to a request to get metadata on repository
         branch(str): the branch to be used for the analysis
+        workspace(Workspace): the workspace the repository is cloned into
+                              (optional) default: None (a new workspace, removed when done)
 
     Returns:
         A dictionary of commit history on a given branch
 
     """
     # dir for named repo
-    repo_path = create_repo_dir(repo_name)
+    if workspace is None:
+        with Workspace(repo_name, size_kb=repo_dict.get("size")) as workspace:
+            return get_commit_hist(repo_name, user, token, repo_dict, branch=branch, workspace=workspace)
+    repo_path = workspace.create()
+    cwd = workspace.root
 
     # clone repo
     stderr, return_code = clone_repo(
@@ -899,28 +1167,25 @@ def get_commit_hist(repo_name, user, token, repo_dict, branch=None) -> dict:
     # if there is no error
     if return_code == 0:
 
-        # change working directory to cloned reository
-        os.chdir(repo_path)
-
         default_branch = None
 
         github_dict = {"owner": user, "repo": repo_name, "token": token}
 
         # checkout to branch
         if branch:
-            default_branch = get_git_branch()
-            stderr, return_code = check_out_branch(branch_name=branch)
+            default_branch = get_git_branch(cwd=cwd)
+            stderr, return_code = check_out_branch(branch_name=branch, cwd=cwd)
 
             # retrive commit history
             branch_dict = {"default": default_branch, "branch": branch}
             ret_commit = Retrieve_Commit_History(
-                github_dict=github_dict, branch_dict=branch_dict)
+                github_dict=github_dict, branch_dict=branch_dict, cwd=cwd)
         else:
             # retrieve commit history
-            default_branch = get_git_branch()
+            default_branch = get_git_branch(cwd=cwd)
             branch_dict = {"default": default_branch, "branch": default_branch}
             ret_commit = Retrieve_Commit_History(
-                github_dict=github_dict, branch_dict=branch_dict)
+                github_dict=github_dict, branch_dict=branch_dict, cwd=cwd)
 
         commit_history_dict = ret_commit.get_commit_history_and_contributors()
         return commit_history_dict
@@ -1325,7 +1590,7 @@ def get_repo_level_summary(file_level) -> dict:
     repo_summary = {k:[] for k in selected_key if not k.endswith("_rank")}
     for k in repo_summary.keys():
         for f in file_level:
-            if not f.__contains__("changed_") and k in file_level[f].keys():
+            if k in file_level[f].keys():
                 if not isinstance(file_level[f][k], str) and file_level[f][k] != None:
                     repo_summary[k].append(file_level[f][k])
 
@@ -1386,9 +1651,8 @@ def get_jsrepo_level_summary(files, file_level) -> dict:
 
     for k in repo_summary.keys():
         for f in file_level:
-            if not f.__contains__("changed_"):
-                if file_level[f][k] != None:
-                    repo_summary[k].append(file_level[f][k])
+            if file_level[f][k] != None:
+                repo_summary[k].append(file_level[f][k])
 
     repo_summary = {k: (sum(v) if k != "cc" else sum(v)/len(v))
                     for k, v in repo_summary.items()}
@@ -1398,51 +1662,36 @@ def get_jsrepo_level_summary(files, file_level) -> dict:
     return repo_summary
 
 
-def get_git_branch():
+def get_git_branch(cwd=None):
     """
     Returns the current git branch
+
+    Args:
+        cwd(str): path to the repository (optional) default: None (the current working directory)
     """
-    #get branch name
-    stdout, stderr, return_code = run_cmd_process(cmd_list=['git', 'branch'])
-    if return_code == 0:
-        branch_extract = [a for a in stdout.split('\n') if a.find('*') >= 0]
-        if len(branch_extract) > 0:
-            branch = branch_extract[0]
-            branch = branch.replace('*', '').strip()
-        else:
-            branch = None
-    else:
-        branch = None
-    return branch
+    return git_backend.get_branch(cwd or ".")
 
 
-def get_recent_commit_stamp() -> dict:
+def get_recent_commit_stamp(cwd=None) -> dict:
     """
     Returns a dictionary of the most recent commit shas and the timestamp of the most recent commit
 
     Args:
-        None
+        cwd(str): path to the repository (optional) default: None (the current working directory)
 
     Returns:
         A dictionary of the most recent commit shas and the timestamp of the most recent commit
     """
-    stdout, stderr, return_code = run_cmd_process(
-        cmd_list=['git', 'log', '-n', '1', '--pretty=format:%H/%ct/%aN/%s'])
-    if return_code == 0:
-        lines = stdout.split("\n")
-        if len(lines) == 1:
-            details = lines[0].split("/")
-
-            # get branch name
-            branch = get_git_branch()
-            return {"branch": branch, "commit_sha": details[0], "commit_ts": details[1], "author": details[2], "message": details[3]}
-        else:
-            return {"branch": "", "commit_sha": "", "commit_stamp": "", "author": "", "message": ""}
+    details, stderr = git_backend.get_head_commit(cwd or ".")
+    if details is not None:
+        # get branch name
+        branch = get_git_branch(cwd=cwd)
+        return {"branch": branch, "commit_sha": details["sha"], "commit_ts": details["ts"], "author": details["author"], "message": details["message"]}
     else:
         return {"error": stderr}
 
 
-def retrieve_commits(repo_dict, repo_name, user, branch, token) -> dict:
+def retrieve_commits(repo_dict, repo_name, user, branch, token, workspace=None) -> dict:
     """
     Retrieves the commits for a given repo and branch
 
@@ -1452,12 +1701,18 @@ def retrieve_commits(repo_dict, repo_name, user, branch, token) -> dict:
         repo_dict(dict): dictionary of metadata returned as a response to a request to get metadata on repositoy
         branch(str): the branch to be used for the analysis
         token(str): the github token to be used for the analysis
+        workspace(Workspace): the workspace the repository is cloned into
+                              (optional) default: None (a new workspace, removed when done)
 
         Returns:
             A dictionary of the commits for the given repo and branch
     """
     # dir for named repo
-    repo_path = create_repo_dir(repo_name)
+    if workspace is None:
+        with Workspace(repo_name, size_kb=repo_dict.get("size")) as workspace:
+            return retrieve_commits(repo_dict, repo_name, user, branch, token, workspace=workspace)
+    repo_path = workspace.create()
+    cwd = workspace.root
 
     # clone repo
     stderr, return_code = clone_repo(
@@ -1466,25 +1721,22 @@ def retrieve_commits(repo_dict, repo_name, user, branch, token) -> dict:
     # if there is no error
     if return_code == 0:
 
-        # change working directory to cloned reository
-        os.chdir(repo_path)
-
         default_branch = None
 
         github_dict = {"owner": user, "repo": repo_name, "token": token}
 
         # checkout to branch
         if branch:
-            default_branch = get_git_branch()
-            stderr, return_code = check_out_branch(branch_name=branch)
+            default_branch = get_git_branch(cwd=cwd)
+            stderr, return_code = check_out_branch(branch_name=branch, cwd=cwd)
 
             # retrive commit history
             branch_dict = {"default": default_branch, "branch": branch}
             ret_commit = Retrieve_Commit_History(
-                github_dict=github_dict, branch_dict=branch_dict)
+                github_dict=github_dict, branch_dict=branch_dict, cwd=cwd)
         else:
             # retrieve commit history
-            ret_commit = Retrieve_Commit_History(github_dict=github_dict)
+            ret_commit = Retrieve_Commit_History(github_dict=github_dict, cwd=cwd)
 
         commit_history_dict = ret_commit.get_commit_history_and_contributors()
 
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# sqlite file mapping commit authors to their github logins
+cache_path = os.environ.get("AUTHOR_CACHE_PATH", os.path.join(root_dir, "data", "cache", "author_login_cache.db"))
+
+# seconds a resolved login is kept, authors without a linked github account are retried sooner
+cache_ttl = float(os.environ.get("AUTHOR_CACHE_TTL", 7 * 24 * 3600))
+negative_ttl = float(os.environ.get("AUTHOR_CACHE_NEGATIVE_TTL", 24 * 3600))
+
+
+class Author_Login_Cache:
+    """
+    Persistent cache of the github logins of commit authors keyed by author name and email,
+    shared across repositories and runs
+
+    methods:
+        __init__: initializes the cache
+        connect: opens the sqlite database
+        get_key: creates the cache key of an author
+        lookup: retrieves the login of an author
+        store: stores the login of an author
+    """
+
+    def __init__(self, path=cache_path, ttl=cache_ttl, negative_ttl=negative_ttl) -> None:
+        """
+        Initializes the cache
+
+        Args:
+            path(str): path to the sqlite database file, default is data/cache/author_login_cache.db
+            ttl(float): seconds a resolved login is kept, default is 7 days
+            negative_ttl(float): seconds an author without a github account is kept, default is 1 day
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Opens the sqlite database on first use and creates the authors table if it does not exist
+        Returns the connection
+        """
+        if self.conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS authors (
+                                    key TEXT PRIMARY KEY,
+                                    login TEXT,
+                                    resolved_at REAL)""")
+            self.conn.commit()
+        return self.conn
+
+    def get_key(self, name, email) -> str:
+        """
+        Creates the cache key of an author, emails are compared case insensitively
+
+        Args:
+            name(str): author name
+            email(str): author email
+
+        Returns:
+            the cache key
+        """
+        return hashlib.sha256("{}\n{}".format(name, (email or "").lower()).encode("utf-8")).hexdigest()
+
+    def lookup(self, name, email) -> tuple:
+        """
+        Retrieves the login of an author
+        Returns a tuple of a flag that is True if a fresh entry was found and the login (None if the author has no github account)
+
+        Args:
+            name(str): author name
+            email(str): author email
+
+        Returns:
+            found flag, login
+        """
+        with self.lock:
+            row = self.connect().execute("SELECT login, resolved_at FROM authors WHERE key = ?",
+                                         (self.get_key(name, email),)).fetchone()
+        if row is None:
+            return False, None
+
+        login, resolved_at = row
+        ttl = self.ttl if login else self.negative_ttl
+        if time.time() - resolved_at >= ttl:
+            return False, None
+        return True, login
+
+    def store(self, name, email, login) -> None:
+        """
+        Stores the login of an author
+
+        Args:
+            name(str): author name
+            email(str): author email
+            login(str): github login, None if the author has no github account
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.connect().execute("INSERT OR REPLACE INTO authors VALUES (?, ?, ?)",
+                                   (self.get_key(name, email), login, time.time()))
+            self.conn.commit()
+
+
+author_login_cache = Author_Login_Cache()
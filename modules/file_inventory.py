@@ -0,0 +1,229 @@
+import os
+
+from modules.git_backend import run_git
+
+
+# directories that are not analysed: git metadata, caches, dependencies and virtual environments
+exclude_list = [".git", ".ipynb_checkpoints", "__pycache__", "node_modules",
+                "lib", "bin", "etc", "include", "share", "var", "lib64", "venv"]
+
+
+class File_Inventory:
+    """
+    Index of the files of a checkout built in a single pass over the directories. Excluded directories are
+    pruned, they are recorded but not entered. The paths of the files are indexed by extension and the names
+    of the files and directories, the counts and the sizes of the files are kept, so the file checks, the
+    lists of language files and the analysers read the index instead of walking the checkout again.
+
+    methods:
+        __init__: initializes an empty inventory
+        scan_dir: indexes the files of a directory
+        scan_git_tree: indexes the files in the tree of a revision
+        add_dir: indexes a directory
+        add_file: indexes a file
+        get_files: returns the paths of the files with the given extensions
+        get_size: returns the size of a file
+        get_file_checks: returns the file checks and the number of files
+    """
+
+    def __init__(self, exclude_list=exclude_list) -> None:
+        """
+        Initializes an empty inventory
+
+        Args:
+            exclude_list(list): names of the directories to exclude, compared case insensitively,
+                                default are the dependency, cache and virtual environment directories
+
+        Returns:
+            None
+        """
+        self.exclude = {e.lower() for e in exclude_list}
+        # extension of the file names as keys, lists of tuples of the position of the file and its path as values
+        self.paths_by_ext = dict()
+        self.sizes = dict()
+        self.file_names = set()
+        self.dir_names = set()
+        self.excluded_dirs = []
+        self.num_files = 0
+        self.num_dirs = 0
+
+    def scan_dir(self, path="./", cwd=None) -> "File_Inventory":
+        """
+        Indexes the files of a directory recursively with os.scandir, symbolic links to directories are counted
+        but not entered like os.walk does. The files of a directory are indexed after the files of its sub
+        directories, in the order os.walk(topdown=False) yields them
+        Returns the inventory
+
+        Args:
+            path(str): path to the directory, the indexed paths start with it, default = "./"
+            cwd(str): directory path is relative to (optional) default: None (the current working directory)
+
+        Returns:
+            the inventory
+        """
+        def scan(root, abs_root):
+            try:
+                with os.scandir(abs_root) as it:
+                    entries = list(it)
+            except OSError:
+                return
+
+            files = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if not is_dir:
+                    files.append(entry)
+                elif self.add_dir(root, entry.name) and not entry.is_symlink():
+                    scan(os.path.join(root, entry.name), entry.path)
+
+            for entry in files:
+                try:
+                    size = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    size = 0
+                self.add_file(root, entry.name, size)
+
+        scan(path, path if cwd is None else os.path.join(cwd, path))
+        return self
+
+    def scan_git_tree(self, path="./", rev="HEAD", cwd=None) -> "File_Inventory":
+        """
+        Indexes the files in the tree of a revision, used on sparse checkouts where most files are not checked out.
+        Submodules are counted as directories. The sizes are read from the checkout when they are asked for, reading
+        them from the tree would download every blob of a partial clone
+        Returns the inventory
+
+        Args:
+            path(str): path to the repository, the indexed paths start with it, default = "./"
+            rev(str): revision whose tree is indexed, default is HEAD
+            cwd(str): directory path is relative to (optional) default: None (the current working directory)
+
+        Returns:
+            the inventory
+        """
+        stdout, stderr, return_code = run_git(["ls-tree", "-r", "-t", "-z", rev], path if cwd is None else os.path.join(cwd, path))
+
+        # trees are listed before their entries
+        pruned = set()
+        for entry in stdout.split("\0"):
+            if not entry:
+                continue
+            info, name = entry.split("\t", 1)
+            obj_type = info.split(" ")[1]
+            parent, base = os.path.split(name)
+            if parent in pruned:
+                pruned.add(name)
+                continue
+
+            root = os.path.join(path, parent) if parent else path
+            if obj_type in ("tree", "commit"):
+                if not self.add_dir(root, base):
+                    pruned.add(name)
+            else:
+                self.add_file(root, base)
+        return self
+
+    def add_dir(self, root, name) -> bool:
+        """
+        Indexes a directory, excluded directories are recorded in excluded_dirs
+        Returns False if the directory is excluded and must not be entered
+
+        Args:
+            root(str): path of the parent directory
+            name(str): name of the directory
+
+        Returns:
+            True if the directory is indexed, False if it is excluded
+        """
+        if name.lower() in self.exclude:
+            self.excluded_dirs.append(os.path.join(root, name))
+            return False
+        self.dir_names.add(name.lower())
+        self.num_dirs += 1
+        return True
+
+    def add_file(self, root, name, size=None) -> None:
+        """
+        Indexes a file, files named like an excluded directory are only used for the checks of the file names.
+        Files created after the scan, such as converted notebooks, are added with it as well
+
+        Args:
+            root(str): path of the directory of the file
+            name(str): name of the file
+            size(int): size of the file in bytes (optional) default: None (read when asked for)
+
+        Returns:
+            None
+        """
+        path = os.path.join(root, name)
+        self.file_names.add(name.lower())
+        if name.lower() in self.exclude or path in self.sizes:
+            return
+        self.paths_by_ext.setdefault(os.path.splitext(name)[1], []).append((self.num_files, path))
+        self.sizes[path] = size
+        self.num_files += 1
+
+    def get_files(self, file_ext) -> list:
+        """
+        Returns the paths of the files whose names end with the given extensions in the order they were indexed,
+        a path is repeated for every extension it ends with
+
+        Args:
+            file_ext(lst): file extention of files to look for, example ".py"
+
+        Returns:
+            list of the paths of the files
+        """
+        matches = []
+        for ext, entries in self.paths_by_ext.items():
+            for i, e in enumerate(file_ext):
+                if ext and ext.endswith(e):
+                    matches.extend((pos, i, path) for pos, path in entries)
+                elif not ext or e.endswith(ext):
+                    # extensions like ".tar.gz" and names without an extension
+                    matches.extend((pos, i, path) for pos, path in entries if path.endswith(e))
+        return [path for _, _, path in sorted(matches)]
+
+    def get_size(self, path, cwd=None) -> int:
+        """
+        Returns the size of a file in bytes, 0 if the file is not checked out
+
+        Args:
+            path(str): the indexed path of the file
+            cwd(str): directory path is relative to (optional) default: None (the current working directory)
+
+        Returns:
+            the size of the file
+        """
+        if self.sizes.get(path) is None:
+            try:
+                self.sizes[path] = os.lstat(path if cwd is None else os.path.join(cwd, path)).st_size
+            except OSError:
+                return 0
+        return self.sizes[path]
+
+    def get_file_checks(self, file_extensions, files_to_check, dirs_to_check) -> dict:
+        """
+        Checks for the existence of files with the given extensions, directories and filenames
+        Returns A dictionary of the file checks and number of files
+
+        Args:
+            file_extensions (list): A list of file extensions to check.
+            files_to_check (list): A list of files to check.
+            dirs_to_check (list): A list of directories to check.
+
+        Returns:
+            dict: A dictionary of the file checks and number of files
+        """
+        interested_files = {f.lower(): f.lower() in self.file_names for f in files_to_check}
+        interested_files.update({d.lower(): d.lower() in self.dir_names for d in dirs_to_check})
+
+        checks_results_dict = dict()
+        checks_results_dict["interested_files"] = [{"name": k, "present": v} for k, v in interested_files.items()]
+        checks_results_dict.update({"num_dirs": self.num_dirs, "num_files": self.num_files})
+        checks_results_dict.update({"num_" + ext.lower(): len(self.get_files([ext])) for ext in file_extensions})
+        return checks_results_dict
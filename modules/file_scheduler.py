@@ -0,0 +1,142 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# number of processes the files of an analysis are analysed in, 1 to analyse them in the calling process
+analysis_workers = int(os.environ.get("ANALYSIS_WORKERS", os.cpu_count() or 1))
+
+# number of files sent to a worker process at once, larger chunks cost less in inter process communication
+# and smaller chunks spread the work more evenly
+analysis_chunk_size = int(os.environ.get("ANALYSIS_CHUNK_SIZE", 8))
+
+# analyses of fewer files run in the calling process, sending them to the worker processes costs more than it saves
+analysis_min_files = int(os.environ.get("ANALYSIS_MIN_FILES", 16))
+
+
+def analyze_chunk(func, file_paths) -> list:
+    """
+    Runs a function on every file of a chunk, runs in a worker process
+
+    Args:
+        func(callable): function taking the path of a file, it and its results are pickled
+        file_paths(list): paths of the files of the chunk
+
+    Returns:
+        list of the results in the order of the files
+    """
+    return [func(f) for f in file_paths]
+
+
+class File_Scheduler:
+    """
+    Distributes the analysis of the files of a repository over a pool of processes. The files are sorted
+    largest first, so the slowest files are started first and the analysis does not wait on a large file
+    started last, and sent to the processes in chunks. The pool is started on first use and shared by the analyses
+
+    methods:
+        __init__: initializes the scheduler
+        get_pool: starts the process pool
+        reset_pool: shuts the process pool down
+        get_chunks: splits the files into chunks, largest files first
+        map_files: runs a function on every file
+    """
+
+    def __init__(self, workers=analysis_workers, chunk_size=analysis_chunk_size, min_files=analysis_min_files) -> None:
+        """
+        Initializes the scheduler
+
+        Args:
+            workers(int): number of worker processes, default is the ANALYSIS_WORKERS environment variable or the number of cpus
+            chunk_size(int): number of files sent to a worker process at once, default is 8
+            min_files(int): smallest number of files analysed in the worker processes, default is 16
+
+        Returns:
+            None
+        """
+        self.workers = workers
+        self.chunk_size = max(chunk_size, 1)
+        self.min_files = min_files
+        self.lock = threading.Lock()
+        self.pool = None
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        """
+        Starts the process pool on first use
+        Returns the pool
+        """
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self.pool
+
+    def reset_pool(self) -> None:
+        """
+        Shuts the process pool down, a new pool is started by the next analysis
+        """
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def get_chunks(self, file_paths, cwd=None, inventory=None) -> list:
+        """
+        Splits the files into chunks of chunk_size files, the largest files come first
+
+        Args:
+            file_paths(list): paths of the files
+            cwd(str): directory the paths are relative to (optional) default: None (the current working directory)
+            inventory(File_Inventory): inventory the sizes of the files are read from (optional) default: None (the files are stat'ed)
+
+        Returns:
+            list of lists of the positions of the files in file_paths
+        """
+        def get_size(path):
+            if inventory is not None:
+                return inventory.get_size(path, cwd=cwd)
+            try:
+                return os.path.getsize(path if cwd is None else os.path.join(cwd, path))
+            except OSError:
+                return 0
+
+        sizes = [get_size(f) for f in file_paths]
+        order = sorted(range(len(file_paths)), key=lambda i: -sizes[i])
+        return [order[i:i + self.chunk_size] for i in range(0, len(order), self.chunk_size)]
+
+    def map_files(self, func, file_paths, cwd=None, inventory=None) -> list:
+        """
+        Runs a function on every file, in the worker processes if there are enough files and in the calling
+        process otherwise or if a worker process dies
+        Returns the results in the order of the files
+
+        Args:
+            func(callable): function taking the path of a file, it must be picklable such as a module level function,
+                            a functools.partial of one or a method of a picklable object
+            file_paths(list): paths of the files
+            cwd(str): directory the paths are relative to (optional) default: None (the current working directory)
+            inventory(File_Inventory): inventory the sizes of the files are read from (optional) default: None
+
+        Returns:
+            list of the results of func
+        """
+        file_paths = list(file_paths)
+        if self.workers <= 1 or len(file_paths) < max(self.min_files, 2):
+            return [func(f) for f in file_paths]
+
+        chunks = self.get_chunks(file_paths, cwd=cwd, inventory=inventory)
+        results = [None] * len(file_paths)
+        try:
+            pool = self.get_pool()
+            futures = [(chunk, pool.submit(analyze_chunk, func, [file_paths[i] for i in chunk])) for chunk in chunks]
+            for chunk, future in futures:
+                for i, result in zip(chunk, future.result()):
+                    results[i] = result
+        except BrokenProcessPool:
+            print("\nA worker process of the file analysis died, analysing the files in process\n")
+            self.reset_pool()
+            return [func(f) for f in file_paths]
+        return results
+
+
+file_scheduler = File_Scheduler()
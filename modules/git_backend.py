@@ -0,0 +1,360 @@
+import heapq
+import os
+import subprocess
+
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+
+# "subprocess" runs the git cli for every operation, "pygit2" reads repositories in process with libgit2
+git_backend_name = os.environ.get("GIT_BACKEND", "subprocess")
+
+
+def run_git(cmd_list, path=".") -> tuple:
+    """
+    Runs a git command in a repository and returns a tuple of the output, error and return code of the process.
+
+    Args:
+        cmd_list(list): list of elements of the git command, without "git"
+        path(str): path to the repository, default = "."
+
+    Returns:
+        A tuple of the output, error and return code of the process
+    """
+    process = subprocess.run(["git", "-C", path] + cmd_list, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    return process.stdout, process.stderr, process.returncode
+
+
+class Subprocess_Git_Backend:
+    """
+    Git backend that runs the git cli in a sub process for every operation
+
+    methods:
+        get_branch: returns the current branch
+        checkout: checks out a branch
+        get_head_commit: returns the details of the most recent commit
+        walk_name_status: returns the files changed by every commit in the history of a revision
+        diff: returns the diff of several files between two commits
+        read_blob: returns the content of a file at a revision
+    """
+
+    name = "subprocess"
+
+    def get_branch(self, path=".") -> str:
+        """
+        Returns the current branch, None if there is no branch
+
+        Args:
+            path(str): path to the repository, default = "."
+
+        Returns:
+            the name of the branch
+        """
+        stdout, stderr, return_code = run_git(["branch"], path)
+        if return_code == 0:
+            branch_extract = [a for a in stdout.split("\n") if a.find("*") >= 0]
+            if len(branch_extract) > 0:
+                return branch_extract[0].replace("*", "").strip()
+        return None
+
+    def checkout(self, branch_name, path=".") -> tuple:
+        """
+        Checks out a branch, a local branch is created from the remote branch of the same name if there is none
+        Returns the stderr and return code of the checkout
+
+        Args:
+            branch_name(str): the name of the branch to checkout
+            path(str): path to the repository, default = "."
+
+        Returns:
+            the stderr and return code of the checkout
+        """
+        stdout, stderr, return_code = run_git(["checkout", branch_name], path)
+        return stderr, return_code
+
+    def get_head_commit(self, path=".") -> tuple:
+        """
+        Returns the details of the most recent commit on the current branch
+        Returns a tuple of a dictionary of the sha, timestamp, author and message (None on error) and the error
+
+        Args:
+            path(str): path to the repository, default = "."
+
+        Returns:
+            commit details, stderr
+        """
+        stdout, stderr, return_code = run_git(["log", "-n", "1", "--pretty=format:%H%x00%ct%x00%aN%x00%s"], path)
+        if return_code != 0:
+            return None, stderr
+        sha, ts, author, message = stdout.split("\0")
+        return {"sha": sha, "ts": ts, "author": author, "message": message}, stderr
+
+    def walk_name_status(self, rev="HEAD", pathspec=None, path=".") -> list:
+        """
+        Returns the files changed by every commit in the history of a revision, newest commit first, with renames detected.
+        Merge commits have no changes like in git log
+
+        Args:
+            rev(str): revision whose history is walked, default is HEAD
+            pathspec(list): git pathspecs limiting the files (optional) default: None
+            path(str): path to the repository, default = "."
+
+        Returns:
+            list of tuples of the commit sha and a list of tuples of the status and the paths of the changed files,
+            renames have the old and the new path
+        """
+        cmd_list = ["log", "-z", "--format=%x01%H", "--name-status", "-M", rev]
+        if pathspec:
+            cmd_list += ["--"] + pathspec
+        stdout, stderr, return_code = run_git(cmd_list, path)
+
+        commits = []
+        tokens = iter(stdout.split("\0"))
+        for token in tokens:
+            if token.startswith("\x01"):
+                commits.append((token[1:], []))
+                continue
+
+            status = token.strip("\n")
+            if not status or not commits:
+                continue
+            paths = (next(tokens, ""),)
+            if status[0] in ("R", "C"):
+                paths = paths + (next(tokens, ""),)
+            commits[-1][1].append((status, paths))
+        return commits
+
+    def diff(self, init_sha, last_sha, paths, path=".") -> dict:
+        """
+        Runs a single git diff between two commits for several files and splits the output by file.
+        Files whose diff cannot be told apart in the output are diffed on their own
+        Returns a dictionary of the paths as keys and the output git diff gives for each file on its own as values
+
+        Args:
+            init_sha(str): the initial commit sha
+            last_sha(str): the latter commit sha
+            paths(list): paths of the files relative to the repository
+            path(str): path to the repository, default = "."
+
+        Returns:
+            A dictionary of the paths and the output of git diff for each file
+        """
+        # renames between the files would change the diff headers, a diff of a single file never shows them
+        stdout, stderr, return_code = run_git(["diff", "--no-renames", init_sha, last_sha, "--"] + paths, path)
+
+        headers = {"diff --git a/{0} b/{0}".format(os.path.normpath(p)): p for p in paths}
+        diff_lines = {p: [] for p in paths}
+        lines = stdout.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+
+        unmatched = False
+        current = None
+        for line in lines:
+            if line.startswith("diff --git "):
+                current = headers.get(line)
+                unmatched = unmatched or current is None
+            if current is not None:
+                diff_lines[current].append(line)
+
+        diffs = {p: "\n".join(l) + "\n" if l else "" for p, l in diff_lines.items()}
+
+        if unmatched:
+            # paths git quotes in the headers
+            for p in paths:
+                if not diff_lines[p]:
+                    diffs[p] = run_git(["diff", init_sha, last_sha, "--", p], path)[0]
+
+        return diffs
+
+    def read_blob(self, rev, file_path, path=".") -> bytes:
+        """
+        Returns the content of a file at a revision, None if the file does not exist
+
+        Args:
+            rev(str): the revision
+            file_path(str): path of the file relative to the repository
+            path(str): path to the repository, default = "."
+
+        Returns:
+            the content of the file
+        """
+        process = subprocess.run(["git", "-C", path, "cat-file", "blob", "{}:{}".format(rev, os.path.normpath(file_path))],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if process.returncode != 0:
+            return None
+        return process.stdout
+
+
+class Pygit2_Git_Backend(Subprocess_Git_Backend):
+    """
+    Git backend that reads refs, walks commits, computes diffs and reads blobs in process with pygit2.
+    Partial clones and operations libgit2 does not support are run with the git cli
+
+    methods:
+        open: opens a repository
+        get_branch: returns the current branch
+        checkout: checks out a branch
+        get_head_commit: returns the details of the most recent commit
+        walk_date_order: yields the commits in the history of a commit in the order of git log
+        walk_name_status: returns the files changed by every commit in the history of a revision
+        diff: returns the diff of several files between two commits
+        read_blob: returns the content of a file at a revision
+    """
+
+    name = "pygit2"
+
+    def open(self, path=".") -> "pygit2.Repository":
+        """
+        Opens a repository, returns None if it cannot be opened or is a partial clone,
+        libgit2 cannot fetch the blobs missing from partial clones
+
+        Args:
+            path(str): path to the repository, default = "."
+
+        Returns:
+            the repository
+        """
+        try:
+            repo = pygit2.Repository(path)
+        except (pygit2.GitError, KeyError):
+            return None
+        if "extensions.partialclone" in repo.config or "remote.origin.promisor" in repo.config:
+            return None
+        return repo
+
+    def get_branch(self, path=".") -> str:
+        repo = self.open(path)
+        if repo is None:
+            return super().get_branch(path)
+        if repo.head_is_unborn:
+            return None
+        if repo.head_is_detached:
+            return "(HEAD detached at {})".format(str(repo.head.target)[:7])
+        return repo.head.shorthand
+
+    def checkout(self, branch_name, path=".") -> tuple:
+        repo = self.open(path)
+        if repo is None:
+            return super().checkout(branch_name, path)
+
+        branch = repo.lookup_branch(branch_name)
+        if branch is None:
+            remote_branch = repo.lookup_branch("origin/" + branch_name, pygit2.GIT_BRANCH_REMOTE)
+            if remote_branch is None:
+                # tags, shas and other revisions
+                return super().checkout(branch_name, path)
+            branch = repo.branches.local.create(branch_name, remote_branch.peel(pygit2.Commit))
+            branch.upstream = remote_branch
+
+        try:
+            repo.checkout(branch)
+        except pygit2.GitError as e:
+            return "error: {}\n".format(e), 1
+        return "Switched to branch '{}'\n".format(branch_name), 0
+
+    def get_head_commit(self, path=".") -> tuple:
+        repo = self.open(path)
+        if repo is None:
+            return super().get_head_commit(path)
+        if repo.head_is_unborn:
+            return None, "fatal: your current branch does not have any commits yet\n"
+
+        commit = repo.head.peel(pygit2.Commit)
+        message = commit.message.strip().split("\n\n")[0].replace("\n", " ")
+        return {"sha": str(commit.id), "ts": str(commit.commit_time), "author": commit.author.name, "message": message}, ""
+
+    def walk_date_order(self, head):
+        """
+        Walks the history of a commit in the order of git log: the newest of the commits whose children have been listed
+        comes next, commits with the same time in the order they were reached. The time sort of libgit2 sorts the whole
+        history instead, which lists the commits differently when the clocks of the committers are skewed
+
+        Args:
+            head(pygit2.Commit): the commit whose history is walked
+
+        Returns:
+            A generator of the commits, newest first
+        """
+        seen = {head.id}
+        queue = [(-head.commit_time, 0, head)]
+        n_reached = 0
+        while queue:
+            commit = heapq.heappop(queue)[2]
+            yield commit
+            for parent in commit.parents:
+                if parent.id not in seen:
+                    seen.add(parent.id)
+                    n_reached += 1
+                    heapq.heappush(queue, (-parent.commit_time, n_reached, parent))
+
+    def walk_name_status(self, rev="HEAD", pathspec=None, path=".") -> list:
+        repo = self.open(path)
+        if repo is None or pathspec:
+            return super().walk_name_status(rev, pathspec, path)
+
+        commits = []
+        head = repo.revparse_single(rev).peel(pygit2.Commit)
+        for commit in self.walk_date_order(head):
+            changes = []
+            if len(commit.parents) < 2:
+                if commit.parents:
+                    diff = repo.diff(commit.parents[0], commit)
+                else:
+                    diff = commit.tree.diff_to_tree(swap=True)
+                diff.find_similar(flags=pygit2.GIT_DIFF_FIND_RENAMES)
+
+                for delta in diff.deltas:
+                    status = delta.status_char()
+                    if status in ("R", "C"):
+                        changes.append(("{}{:03d}".format(status, delta.similarity), (delta.old_file.path, delta.new_file.path)))
+                    else:
+                        changes.append((status, (delta.new_file.path,)))
+            commits.append((str(commit.id), changes))
+        return commits
+
+    def diff(self, init_sha, last_sha, paths, path=".") -> dict:
+        repo = self.open(path)
+        if repo is None:
+            return super().diff(init_sha, last_sha, paths, path)
+
+        names = {os.path.normpath(p): p for p in paths}
+        diffs = {p: "" for p in paths}
+        diff = repo.diff(init_sha, last_sha)
+        # patches are only generated for the files asked for
+        for i, delta in enumerate(diff.deltas):
+            if delta.new_file.path in names:
+                diffs[names[delta.new_file.path]] = diff[i].text
+        return diffs
+
+    def read_blob(self, rev, file_path, path=".") -> bytes:
+        repo = self.open(path)
+        if repo is None:
+            return super().read_blob(rev, file_path, path)
+        try:
+            entry = repo.revparse_single(rev).peel(pygit2.Tree)[os.path.normpath(file_path)]
+        except KeyError:
+            return None
+        return repo[entry.id].data
+
+
+def get_git_backend(name=git_backend_name) -> Subprocess_Git_Backend:
+    """
+    Returns the git backend of the given name, the subprocess backend if pygit2 is not installed
+
+    Args:
+        name(str): name of the backend, "subprocess" or "pygit2", default is the GIT_BACKEND environment variable
+
+    Returns:
+        the git backend
+    """
+    if name == "pygit2":
+        if pygit2 is not None:
+            return Pygit2_Git_Backend()
+        print("pygit2 is not installed, using the subprocess git backend\n")
+    return Subprocess_Git_Backend()
+
+
+git_backend = get_git_backend()
@@ -0,0 +1,527 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from modules.http_session import github_api_url, send_post_req
+
+
+github_graphql_url = github_api_url + "/graphql"
+
+# number of commit authors read from the default branch, contributors fall back to REST beyond this
+contributors_history_size = int(os.environ.get("GITHUB_GRAPHQL_HISTORY_SIZE", 100))
+
+# number of repositories aliased into one query, keeps every request well below the GraphQL node limit
+repos_per_query = int(os.environ.get("GITHUB_GRAPHQL_REPOS_PER_QUERY", 30))
+users_per_query = int(os.environ.get("GITHUB_GRAPHQL_USERS_PER_QUERY", 30))
+commits_per_query = int(os.environ.get("GITHUB_GRAPHQL_COMMITS_PER_QUERY", 100))
+
+# "graphql" retrieves issue, pull request and commit counts of users from GraphQL, "search" uses the search API only
+user_stats_engine = os.environ.get("GITHUB_USER_STATS_ENGINE", "graphql")
+
+# longest span a single contributionsCollection may cover
+contributions_window = timedelta(days=365)
+
+github_time_format = "%Y-%m-%dT%H:%M:%SZ"
+
+branch_history_fragment = """
+fragment BranchHistory on Ref {
+  name
+  target {
+    ... on Commit {
+      oid
+      history(first: %d) {
+        totalCount
+        nodes { author { user { login } } }
+      }
+    }
+  }
+}
+"""
+
+repo_meta_fragment = """
+fragment RepoMeta on Repository {
+  name
+  languages(first: 100, orderBy: {field: SIZE, direction: DESC}) {
+    totalSize
+    edges { size node { name } }
+  }
+  refs(refPrefix: "refs/heads/") { totalCount }
+  defaultBranchRef { ...BranchHistory }
+}
+"""
+
+
+def send_github_graphql_query(query, variables=None, headers=None) -> dict:
+    """
+    Sends a query to the GitHub GraphQL API over the shared session.
+    Returns the data of the response or a dictionary with the error
+
+    Args:
+        query(str): the query
+        variables(dict): variables of the query (optional) default: None
+        headers(dict): header to attach to the request, must carry the Authorization token
+
+    Returns:
+        the data of the response or a dictionary with the error
+    """
+    try:
+        resp, status_code = send_post_req(github_graphql_url, {"query": query, "variables": variables or {}}, _header=headers)
+        if status_code != 200:
+            return {"error": "GraphQL request failed with status code {}".format(status_code)}
+        resp_json = resp.json()
+    except Exception as e:
+        return {"error": repr(e)}
+
+    if resp_json.get("data") is None:
+        return {"error": resp_json.get("errors")}
+    # errors of single aliases (e.g. a missing repository) come back next to the data of the others
+    return resp_json["data"]
+
+
+def build_repo_meta_query(repos) -> str:
+    """
+    Builds one query that retrieves the meta data of several repositories, each under the alias r<index>
+
+    Args:
+        repos(list): list of tuples of owner, repo name and branch name (None for the default branch)
+
+    Returns:
+        the query
+    """
+    aliases = []
+    for i, (owner, repo, branch) in enumerate(repos):
+        branch_field = ""
+        if branch:
+            branch_field = " branch: ref(qualifiedName: {}) {{ ...BranchHistory }}".format(json.dumps("refs/heads/" + branch))
+        aliases.append("  r{}: repository(owner: {}, name: {}) {{ ...RepoMeta{} }}".format(
+            i, json.dumps(owner), json.dumps(repo), branch_field))
+
+    return "query {\n" + "\n".join(aliases) + "\n}\n" + repo_meta_fragment + branch_history_fragment % contributors_history_size
+
+
+def get_branch_commits(branch_ref) -> int:
+    """
+    Returns the total number of commits reachable from a branch ref or None if the ref does not exist
+
+    Args:
+        branch_ref(dict): the BranchHistory fragment of a ref
+
+    Returns:
+        integer of the number of commits or None
+    """
+    try:
+        return branch_ref["target"]["history"]["totalCount"]
+    except (KeyError, TypeError):
+        return None
+
+
+def get_history_contributors(branch_ref) -> list:
+    """
+    Returns the logins of the authors in the history of a branch ordered by number of commits.
+    Returns None if the history is longer than the commits read so the caller can fall back to REST
+
+    Args:
+        branch_ref(dict): the BranchHistory fragment of a ref
+
+    Returns:
+        list of contributors or None
+    """
+    try:
+        history = branch_ref["target"]["history"]
+    except (KeyError, TypeError):
+        return None
+    if history["totalCount"] > len(history["nodes"]):
+        return None
+
+    counts = dict()
+    for node in history["nodes"]:
+        user = (node.get("author") or {}).get("user")
+        if user:
+            counts[user["login"]] = counts.get(user["login"], 0) + 1
+
+    return [login for login, _ in sorted(counts.items(), key=lambda x: x[1], reverse=True)]
+
+
+def parse_repo_meta(repo_json, branch=None) -> dict:
+    """
+    Converts the RepoMeta fragment of a repository into a dictionary with
+    languages (raw sizes), branches, total_commits and contributors
+
+    Args:
+        repo_json(dict): the RepoMeta fragment of a repository
+        branch(str): name of the branch commits were counted on, default = None
+
+    Returns:
+        dictionary of the details
+    """
+    default_branch = repo_json.get("defaultBranchRef")
+    return {
+        "languages": {e["node"]["name"]: e["size"] for e in repo_json["languages"]["edges"]},
+        "branches": repo_json["refs"]["totalCount"],
+        "total_commits": get_branch_commits(repo_json.get("branch") if branch else default_branch),
+        # the REST contributors list is taken from the default branch as well
+        "contributors": get_history_contributors(default_branch)
+    }
+
+
+def retrieve_repos_meta(repos, headers) -> dict:
+    """
+    Retrieves the meta data of several repositories with one GraphQL request per repos_per_query repositories.
+    Returns a dictionary with (owner, repo name, branch name) as keys and the parsed details as values,
+    repositories that could not be retrieved have None as value
+
+    Args:
+        repos(list): list of tuples of owner, repo name and branch name (None for the default branch)
+        headers(dict): header to attach to the request
+
+    Returns:
+        dictionary of the details of every repository
+    """
+    repos = list(repos)
+    meta = dict()
+    for start in range(0, len(repos), repos_per_query):
+        batch = repos[start:start + repos_per_query]
+
+        data = send_github_graphql_query(build_repo_meta_query(batch), headers=headers)
+        if "error" in data:
+            print("GraphQL repo meta request failed: {}\n".format(data["error"]))
+            meta.update({r: None for r in batch})
+            continue
+
+        for i, repo in enumerate(batch):
+            repo_json = data.get("r{}".format(i))
+            try:
+                meta[repo] = parse_repo_meta(repo_json, branch=repo[2]) if repo_json else None
+            except (KeyError, TypeError):
+                meta[repo] = None
+    return meta
+
+
+def normalize_branch(branch) -> str:
+    """
+    Returns the branch name or None when no branch is given (None, blank string or a missing dataframe value)
+
+    Args:
+        branch(str): name of the branch
+
+    Returns:
+        the branch name or None
+    """
+    if not isinstance(branch, str) or not branch.strip():
+        return None
+    return branch
+
+
+class Repo_Meta_Store:
+    """
+    In-process store of prefetched repo meta data keyed by owner, repo name and branch (case insensitive)
+
+    methods:
+        __init__: initializes the store
+        get_key: creates the key of a repository
+        put: stores the meta data of several repositories
+        get: retrieves the meta data of a repository
+        clear: removes all entries
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes the store
+
+        Returns:
+            None
+        """
+        self.lock = threading.Lock()
+        self.entries = dict()
+
+    def get_key(self, owner, repo, branch=None) -> tuple:
+        """
+        Creates the key of a repository
+
+        Args:
+            owner(str): github username
+            repo(str): name of repo
+            branch(str): name of branch, default = None
+
+        Returns:
+            tuple of the lower case owner and repo name and the branch
+        """
+        return (owner.lower(), repo.lower(), normalize_branch(branch))
+
+    def put(self, meta) -> None:
+        """
+        Stores the meta data of several repositories, entries that are None are skipped
+
+        Args:
+            meta(dict): dictionary with (owner, repo name, branch name) as keys and the details as values
+
+        Returns:
+            None
+        """
+        with self.lock:
+            for key, value in meta.items():
+                if value is not None:
+                    self.entries[self.get_key(*key)] = value
+
+    def get(self, *key) -> dict:
+        """
+        Retrieves the meta data of a repository
+        Returns the details or None if the repository was not prefetched
+
+        Args:
+            key: owner, repo name and branch name as taken by get_key
+
+        Returns:
+            dictionary of the details or None
+        """
+        with self.lock:
+            return self.entries.get(self.get_key(*key))
+
+    def clear(self) -> None:
+        """
+        Removes all entries
+        """
+        with self.lock:
+            self.entries = dict()
+
+
+class User_Stats_Store(Repo_Meta_Store):
+    """
+    In-process store of prefetched user stats keyed by github username (case insensitive)
+
+    methods:
+        get_key: creates the key of a user
+    """
+
+    def get_key(self, login) -> tuple:
+        """
+        Creates the key of a user
+
+        Args:
+            login(str): github username
+
+        Returns:
+            tuple of the lower case username
+        """
+        return (login.lower(),)
+
+
+repo_meta_store = Repo_Meta_Store()
+user_stats_store = User_Stats_Store()
+
+
+def prefetch_repos_meta(repos, headers, store=None) -> int:
+    """
+    Retrieves the meta data of a whole cohort of repositories with aliased GraphQL queries and keeps it in the store
+    so that retrieve_repo_meta does not have to request it again.
+    Returns the number of repositories stored
+
+    Args:
+        repos(list): list of tuples of owner, repo name and branch name (None for the default branch)
+        headers(dict): header to attach to the request
+        store(Repo_Meta_Store): the store to fill (optional) default: repo_meta_store
+
+    Returns:
+        the number of repositories stored
+    """
+    store = store or repo_meta_store
+    repos = list(dict.fromkeys((owner, repo, normalize_branch(branch)) for owner, repo, branch in repos))
+
+    meta = retrieve_repos_meta(repos, headers)
+    store.put(meta)
+
+    num_stored = len([m for m in meta.values() if m is not None])
+    print("Prefetched repo meta data for {} of {} repositories\n".format(num_stored, len(repos)))
+    return num_stored
+
+
+def get_contribution_windows(created_at, now) -> list:
+    """
+    Splits the time from the creation of an account to now into spans a contributionsCollection can cover
+
+    Args:
+        created_at(datetime): creation time of the account
+        now(datetime): end of the last span
+
+    Returns:
+        list of tuples of start and end of every span formatted as GitHub timestamps
+    """
+    windows = []
+    start = created_at
+    while start < now:
+        end = min(start + contributions_window, now)
+        windows.append((start.strftime(github_time_format), (end - timedelta(seconds=1)).strftime(github_time_format)))
+        start = end
+    return windows
+
+
+def build_users_stats_query(logins, since, now) -> str:
+    """
+    Builds one query that retrieves the issue and pull request counts, the creation time and the commit
+    contributions since a given time of several users, each under the alias u<index>
+
+    Args:
+        logins(list): github usernames
+        since(datetime): start of the contributions window
+        now(datetime): end of the contributions window
+
+    Returns:
+        the query
+    """
+    aliases = []
+    for i, login in enumerate(logins):
+        aliases.append("  u{}: user(login: {}) {{ login createdAt issues {{ totalCount }} pullRequests {{ totalCount }} "
+                       "contributionsCollection(from: {}, to: {}) {{ totalCommitContributions }} }}".format(
+                           i, json.dumps(login), json.dumps(since.strftime(github_time_format)), json.dumps(now.strftime(github_time_format))))
+    return "query {\n" + "\n".join(aliases) + "\n}\n"
+
+
+def build_users_commits_query(windows_dict) -> str:
+    """
+    Builds one query that retrieves the commit contributions of several users over the given spans,
+    each user under the alias u<index> and each span under the alias c<index>
+
+    Args:
+        windows_dict(dict): github usernames as keys and lists of spans from get_contribution_windows as values
+
+    Returns:
+        the query
+    """
+    aliases = []
+    for i, (login, windows) in enumerate(windows_dict.items()):
+        fields = " ".join("c{}: contributionsCollection(from: {}, to: {}) {{ totalCommitContributions }}".format(
+            j, json.dumps(start), json.dumps(end)) for j, (start, end) in enumerate(windows))
+        aliases.append("  u{}: user(login: {}) {{ {} }}".format(i, json.dumps(login), fields))
+    return "query {\n" + "\n".join(aliases) + "\n}\n"
+
+
+def retrieve_users_stats(logins, headers, now=None) -> dict:
+    """
+    Retrieves issue, pull request and commit counts of several users with batched GraphQL queries.
+    issues counts issues and pull requests like the author: search it replaces, commits counts the commit
+    contributions since the account was created. Accounts younger than a year need one query per batch,
+    older accounts a second one that sums the contributions year by year.
+    Returns a dictionary with usernames as keys and dictionaries of issues, pull_requests and commits as values,
+    users that could not be retrieved have None as value
+
+    Args:
+        logins(list): github usernames
+        headers(dict): header to attach to the request
+        now(datetime): end of the contributions window (optional) default: current time
+
+    Returns:
+        dictionary of the stats of every user
+    """
+    logins = list(dict.fromkeys(logins))
+    now = (now or datetime.now(timezone.utc)).replace(microsecond=0)
+    since = now - contributions_window
+
+    stats = dict()
+    for start in range(0, len(logins), users_per_query):
+        batch = logins[start:start + users_per_query]
+
+        data = send_github_graphql_query(build_users_stats_query(batch, since, now), headers=headers)
+        if "error" in data:
+            print("GraphQL user stats request failed: {}\n".format(data["error"]))
+            stats.update({login: None for login in batch})
+            continue
+
+        older = dict()
+        for i, login in enumerate(batch):
+            user_json = data.get("u{}".format(i))
+            if not user_json:
+                stats[login] = None
+                continue
+
+            stats[login] = {"issues": user_json["issues"]["totalCount"] + user_json["pullRequests"]["totalCount"],
+                            "pull_requests": user_json["pullRequests"]["totalCount"],
+                            "commits": user_json["contributionsCollection"]["totalCommitContributions"]}
+
+            created_at = datetime.strptime(user_json["createdAt"], github_time_format).replace(tzinfo=timezone.utc)
+            if created_at < since:
+                older[login] = get_contribution_windows(created_at, now)
+
+        if older:
+            data = send_github_graphql_query(build_users_commits_query(older), headers=headers)
+            for i, login in enumerate(older.keys()):
+                user_json = data.get("u{}".format(i)) if "error" not in data else None
+                # without the full history the commit count is left to the search API
+                stats[login]["commits"] = sum(c["totalCommitContributions"] for c in user_json.values()) if user_json else None
+
+    return stats
+
+
+def prefetch_users_stats(logins, headers, store=None) -> int:
+    """
+    Retrieves the stats of a whole cohort of users with batched GraphQL queries and keeps them in the store
+    so that get_user does not have to use the search API.
+    Returns the number of users stored
+
+    Args:
+        logins(list): github usernames
+        headers(dict): header to attach to the request
+        store(User_Stats_Store): the store to fill (optional) default: user_stats_store
+
+    Returns:
+        the number of users stored
+    """
+    store = store or user_stats_store
+    stats = retrieve_users_stats(logins, headers)
+    store.put({(login,): user_stats for login, user_stats in stats.items()})
+
+    num_stored = len([s for s in stats.values() if s is not None])
+    print("Prefetched user stats for {} of {} users\n".format(num_stored, len(stats)))
+    return num_stored
+
+
+def build_commit_authors_query(owner, repo, shas) -> str:
+    """
+    Builds one query that retrieves the github login of the author of several commits, each under the alias c<index>
+
+    Args:
+        owner(str): github username
+        repo(str): name of repo the commits belong to
+        shas(list): commit shas
+
+    Returns:
+        the query
+    """
+    aliases = ["    c{}: object(oid: {}) {{ ... on Commit {{ author {{ user {{ login }} }} }} }}".format(i, json.dumps(sha))
+               for i, sha in enumerate(shas)]
+    return "query {{\n  repository(owner: {}, name: {}) {{\n{}\n  }}\n}}\n".format(
+        json.dumps(owner), json.dumps(repo), "\n".join(aliases))
+
+
+def retrieve_commit_authors(owner, repo, shas, headers) -> dict:
+    """
+    Retrieves the github login of the author of several commits with one GraphQL request per commits_per_query commits.
+    Returns a dictionary with commit shas as keys and logins as values (None if the author has no github account),
+    commits that could not be retrieved are left out
+
+    Args:
+        owner(str): github username
+        repo(str): name of repo the commits belong to
+        shas(list): commit shas
+        headers(dict): header to attach to the request
+
+    Returns:
+        dictionary of the login of every commit author
+    """
+    shas = list(dict.fromkeys(shas))
+    logins = dict()
+    for start in range(0, len(shas), commits_per_query):
+        batch = shas[start:start + commits_per_query]
+
+        data = send_github_graphql_query(build_commit_authors_query(owner, repo, batch), headers=headers)
+        if "error" in data or not data.get("repository"):
+            print("GraphQL commit author request failed: {}\n".format(data.get("error")))
+            continue
+
+        for i, sha in enumerate(batch):
+            commit_json = data["repository"].get("c{}".format(i))
+            if commit_json is None:
+                continue
+            user = (commit_json.get("author") or {}).get("user")
+            logins[sha] = user["login"] if user else None
+    return logins
@@ -0,0 +1,110 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# sqlite file the last analysed head of every branch is kept in
+checkpoint_path = os.environ.get("HISTORY_CHECKPOINT_PATH", os.path.join(root_dir, "data", "cache", "history_checkpoints.db"))
+
+# set to 1 to retrieve only the commits added since the last run of a repository and branch, the commit history
+# then only lists the new commits while the commit and contribution counts cover the whole branch
+incremental_history = os.environ.get("INCREMENTAL_COMMIT_HISTORY", "0") == "1"
+
+
+class History_Checkpoint_Store:
+    """
+    Persistent store of the last analysed head of every repository and branch with the contribution counts
+    of the commits up to it, so a rerun only reads the commits added since
+
+    methods:
+        __init__: initializes the store
+        connect: opens the sqlite database
+        lookup: retrieves the checkpoint of a branch
+        store: stores the checkpoint of a branch
+    """
+
+    def __init__(self, path=checkpoint_path, enabled=incremental_history) -> None:
+        """
+        Initializes the store
+
+        Args:
+            path(str): path to the sqlite database file, default is data/cache/history_checkpoints.db
+            enabled(bool): if the commit history is retrieved incrementally, default is the INCREMENTAL_COMMIT_HISTORY environment variable
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Opens the sqlite database on first use and creates the checkpoints table if it does not exist
+        Returns the connection
+        """
+        if self.conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS checkpoints (
+                                    repo TEXT,
+                                    branch TEXT,
+                                    head_sha TEXT,
+                                    scope TEXT,
+                                    commits INTEGER,
+                                    contributions TEXT,
+                                    updated_at REAL,
+                                    PRIMARY KEY (repo, branch))""")
+            self.conn.commit()
+        return self.conn
+
+    def lookup(self, repo, branch, scope="") -> dict:
+        """
+        Retrieves the checkpoint of a branch, a checkpoint taken with another scope is not returned
+
+        Args:
+            repo(str): key of the repository, such as owner/name
+            branch(str): name of the branch
+            scope(str): what else the counts depend on, such as the head of the default branch the history is compared to
+
+        Returns:
+            dictionary of the head sha, the number of commits and the contribution counts, None if there is no checkpoint
+        """
+        with self.lock:
+            row = self.connect().execute("SELECT head_sha, scope, commits, contributions FROM checkpoints WHERE repo = ? AND branch = ?",
+                                         (repo, branch)).fetchone()
+        if row is None or row[1] != scope:
+            return None
+
+        # json turns the (author, author email) keys into lists
+        contributions = {tuple(k) if isinstance(k, list) else k: v for k, v in json.loads(row[3])}
+        return {"head_sha": row[0], "commits": row[2], "contributions": contributions}
+
+    def store(self, repo, branch, head_sha, commits, contributions, scope="") -> None:
+        """
+        Stores the checkpoint of a branch, replacing the previous one
+
+        Args:
+            repo(str): key of the repository, such as owner/name
+            branch(str): name of the branch
+            head_sha(str): sha of the last analysed commit
+            commits(int): number of commits up to head_sha
+            contributions(dict): author keys as keys and dictionaries of the contribution counts as values
+            scope(str): what else the counts depend on
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.connect().execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   (repo, branch, head_sha, scope, commits, json.dumps(list(contributions.items())), time.time()))
+            self.conn.commit()
+
+
+history_checkpoints = History_Checkpoint_Store()
@@ -0,0 +1,169 @@
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from modules.rate_limiter import get_resource, get_token_scope, github_scheduler
+
+
+# timeouts in seconds for establishing a connection and for reading a response
+connect_timeout = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 10))
+read_timeout = float(os.environ.get("HTTP_READ_TIMEOUT", 60))
+
+# number of host pools to keep and number of keep-alive connections per pool
+pool_connections = int(os.environ.get("HTTP_POOL_CONNECTIONS", 10))
+default_pool_maxsize = int(os.environ.get("HTTP_POOL_MAXSIZE", 10))
+
+github_api_url = "https://api.github.com"
+
+# hosts that get a dedicated pool size, keyed by url prefix
+host_pool_maxsize = {
+    github_api_url: int(os.environ.get("GITHUB_POOL_MAXSIZE", 32)),
+}
+
+# times a GitHub request is retried after being rejected by a rate limit
+rate_limit_retries = int(os.environ.get("GITHUB_RATE_LIMIT_RETRIES", 3))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_maxsize_dict=None, pool_maxsize=None, num_pools=None) -> requests.Session:
+    """
+    Creates a requests session with keep-alive connection pools mounted per host and gzip enabled.
+    Cookies are never stored so that the session can be shared safely across threads.
+    Returns the session
+
+    Args:
+        pool_maxsize_dict(dict): url prefixes as keys and the pool size for the prefix as values (optional) default: None
+        pool_maxsize(int): the pool size for every other host (optional) default: None
+        num_pools(int): the number of host pools to keep (optional) default: None
+
+    Returns:
+        the requests session
+    """
+    pool_maxsize_dict = host_pool_maxsize if pool_maxsize_dict is None else pool_maxsize_dict
+    pool_maxsize = default_pool_maxsize if pool_maxsize is None else pool_maxsize
+    num_pools = pool_connections if num_pools is None else num_pools
+
+    session = requests.Session()
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    # retry only failures to connect, the caller decides what to do with error responses
+    retries = Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.5)
+
+    adapter = HTTPAdapter(pool_connections=num_pools, pool_maxsize=pool_maxsize, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    for prefix, maxsize in pool_maxsize_dict.items():
+        session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=maxsize, max_retries=retries))
+
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the shared requests session, creating it on first use
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def configure_session(pool_maxsize_dict=None, pool_maxsize=None, num_pools=None, timeout=None) -> None:
+    """
+    Replaces the shared requests session with one created from the given pool settings and
+    optionally sets new default timeouts
+
+    Args:
+        pool_maxsize_dict(dict): url prefixes as keys and the pool size for the prefix as values (optional) default: None
+        pool_maxsize(int): the pool size for every other host (optional) default: None
+        num_pools(int): the number of host pools to keep (optional) default: None
+        timeout(tuple): connect and read timeouts in seconds (optional) default: None
+
+    Returns:
+        None
+    """
+    global _session, connect_timeout, read_timeout
+    with _session_lock:
+        old_session = _session
+        _session = create_session(pool_maxsize_dict, pool_maxsize, num_pools)
+        if timeout:
+            connect_timeout, read_timeout = timeout
+    if old_session is not None:
+        old_session.close()
+
+
+def send_req(method, _url, _header=None, _json=None, timeout=None) -> requests.Response:
+    """
+    Sends a request over the shared session and returns the response. Requests to the GitHub API wait on the
+    rate limit scheduler and are retried when they are rejected by a primary or secondary rate limit.
+
+    Args:
+        method(str): http method of the request, "GET" or "POST"
+        _url(str): url to send the request to
+        _header(dict): header to attach to the request (optional) default: None
+        _json(dict): json body of the request (optional) default: None
+        timeout(tuple): connect and read timeouts in seconds (optional) default: None
+
+    Returns:
+        the response
+    """
+    timeout = timeout or (connect_timeout, read_timeout)
+    github_request = _url.startswith(github_api_url)
+    scope = get_token_scope(_header)
+    resource = get_resource(_url)
+
+    for attempt in range(rate_limit_retries + 1):
+        if github_request:
+            github_scheduler.acquire(scope, resource)
+
+        resp = get_session().request(method, _url, headers=_header or None, json=_json, timeout=timeout)
+
+        if not github_request or not github_scheduler.update(scope, resource, resp):
+            break
+
+    return resp
+
+
+def send_get_req(_url, _header=None, timeout=None) -> tuple:
+    """
+    Sends a get request given a url and a header(optional) over the shared session and returns a tuple of
+    response and the status code
+
+    Args:
+        _url(str): url to send the request to
+        _header(dict): header to attach to the request (optional) default: None
+        timeout(tuple): connect and read timeouts in seconds (optional) default: None
+
+    Returns:
+        response, response status code
+    """
+    resp = send_req("GET", _url, _header=_header, timeout=timeout)
+    return resp, resp.status_code
+
+
+def send_post_req(_url, _json, _header=None, timeout=None) -> tuple:
+    """
+    Sends a post request with a json body given a url and a header(optional) over the shared session and returns
+    a tuple of response and the status code
+
+    Args:
+        _url(str): url to send the request to
+        _json(dict): json body of the request
+        _header(dict): header to attach to the request (optional) default: None
+        timeout(tuple): connect and read timeouts in seconds (optional) default: None
+
+    Returns:
+        response, response status code
+    """
+    resp = send_req("POST", _url, _header=_header, _json=_json, timeout=timeout)
+    return resp, resp.status_code
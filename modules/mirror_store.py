@@ -0,0 +1,304 @@
+import contextlib
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# directory the bare mirrors of analysed repositories are kept in between runs
+mirror_dir = os.environ.get("GIT_MIRROR_DIR", os.path.join(root_dir, "data", "cache", "mirrors"))
+
+# disk budget of all mirrors in megabytes, least recently used mirrors are evicted beyond it
+mirror_budget_mb = float(os.environ.get("GIT_MIRROR_BUDGET_MB", 5120))
+
+# set to 0 to clone every repository directly from github
+mirror_enabled = os.environ.get("GIT_MIRROR_ENABLED", "1") == "1"
+
+
+def run_git(cmd_list) -> tuple:
+    """
+    Runs a git command and returns a tuple of the output, error and return code of the process.
+
+    Args:
+        cmd_list(list): list of elements of the git command, without "git"
+
+    Returns:
+        A tuple of the output, error and return code of the process
+    """
+    process = subprocess.run(["git"] + cmd_list, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    return process.stdout, process.stderr, process.returncode
+
+
+def get_dir_size(path) -> int:
+    """
+    Returns the size in bytes of all files under a directory
+
+    Args:
+        path(str): path to the directory
+
+    Returns:
+        the size in bytes
+    """
+    size = 0
+    for dir_path, _, file_names in os.walk(path):
+        for f in file_names:
+            try:
+                size += os.lstat(os.path.join(dir_path, f)).st_size
+            except OSError:
+                pass
+    return size
+
+
+class Mirror_Store:
+    """
+    Persistent store of bare mirrors of github repositories. A repository is mirrored once and then kept up to date
+    with git fetch --prune, analyses get a local clone of the mirror that shares its objects through hard links.
+    The api workers and the airflow tasks sharing the store lock a mirror with a lock file next to it while they
+    fetch, clone or evict it.
+
+    methods:
+        __init__: initializes the store
+        get_mirror_path: returns the path of the mirror of a repository
+        get_lock: returns the lock of a mirror
+        lock_mirror: locks a mirror across threads and processes
+        get_size: returns the recorded size of a mirror
+        record_size: records the size of a mirror
+        update_mirror: creates or fetches the mirror of a repository
+        clone: clones a repository from its mirror
+        evict: removes least recently used mirrors until the store fits the disk budget
+    """
+
+    def __init__(self, path=mirror_dir, budget_mb=mirror_budget_mb) -> None:
+        """
+        Initializes the store
+
+        Args:
+            path(str): directory the mirrors are kept in, default is data/cache/mirrors
+            budget_mb(float): disk budget of all mirrors in megabytes, default is 5120
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.budget = budget_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        self.mirror_locks = dict()
+
+    def get_mirror_path(self, clone_url) -> str:
+        """
+        Returns the path of the mirror of a repository, named after the repository and a hash of the clone url
+
+        Args:
+            clone_url(str): the git clone url of the repository
+
+        Returns:
+            the path of the mirror
+        """
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", clone_url.rstrip("/").split("/")[-1])
+        url_hash = hashlib.sha256(clone_url.lower().encode("utf-8")).hexdigest()[:12]
+        if not name.endswith(".git"):
+            name = name + ".git"
+        return os.path.join(self.path, "{}_{}".format(url_hash, name))
+
+    def get_lock(self, mirror_path) -> threading.Lock:
+        """
+        Returns the lock that serializes updates, clones and eviction of a mirror between the threads of the process
+
+        Args:
+            mirror_path(str): path of the mirror
+
+        Returns:
+            the lock
+        """
+        with self.lock:
+            return self.mirror_locks.setdefault(mirror_path, threading.Lock())
+
+    @contextlib.contextmanager
+    def lock_mirror(self, mirror_path, blocking=True):
+        """
+        Locks a mirror for the threads of the process and, where fcntl is available, for other processes with
+        an exclusive lock on the file mirror_path.lock. The lock files are kept, removing one would let a process
+        waiting on it and a process creating a new one hold the lock at the same time
+
+        Args:
+            mirror_path(str): path of the mirror
+            blocking(bool): if the lock is waited for, default is True
+
+        Returns:
+            A context manager giving True if the mirror is locked, False if it is in use and blocking is False
+        """
+        lock = self.get_lock(mirror_path)
+        if not lock.acquire(blocking=blocking):
+            yield False
+            return
+        try:
+            if fcntl is None:
+                yield True
+                return
+
+            os.makedirs(self.path, exist_ok=True)
+            with open(mirror_path + ".lock", "a") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            lock.release()
+
+    def get_size(self, mirror_path) -> int:
+        """
+        Returns the size of a mirror recorded after its last fetch, the size of a mirror without a record is
+        computed and recorded
+
+        Args:
+            mirror_path(str): path of the mirror
+
+        Returns:
+            the size in bytes
+        """
+        try:
+            with open(mirror_path + ".size") as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return self.record_size(mirror_path)
+
+    def record_size(self, mirror_path) -> int:
+        """
+        Records the size of a mirror in the file mirror_path.size, so eviction does not walk every mirror
+
+        Args:
+            mirror_path(str): path of the mirror
+
+        Returns:
+            the size in bytes
+        """
+        size = get_dir_size(mirror_path)
+        with open(mirror_path + ".size", "w") as f:
+            f.write(str(size))
+        return size
+
+    def update_mirror(self, clone_url, mirror_path) -> tuple:
+        """
+        Fetches the mirror of a repository or creates it if it does not exist or cannot be fetched
+        Returns the stderr and return code of the git process
+
+        Args:
+            clone_url(str): the git clone url of the repository
+            mirror_path(str): path of the mirror
+
+        Returns:
+            the stderr and return code of the git process
+        """
+        if os.path.isdir(mirror_path):
+            stdout, stderr, return_code = run_git(["--git-dir", mirror_path, "fetch", "--prune", "--quiet", "origin"])
+            if return_code == 0:
+                self.record_size(mirror_path)
+                return stderr, return_code
+            print("Fetching mirror of {} failed, mirroring again...\n".format(clone_url))
+            shutil.rmtree(mirror_path, ignore_errors=True)
+
+        os.makedirs(self.path, exist_ok=True)
+        # a bare clone with a branch refspec instead of --mirror, github pull request refs are not needed
+        stdout, stderr, return_code = run_git(["clone", "--bare", "--quiet", clone_url, mirror_path])
+        if return_code == 0:
+            stdout, stderr, return_code = run_git(["--git-dir", mirror_path, "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*"])
+        if return_code != 0:
+            shutil.rmtree(mirror_path, ignore_errors=True)
+        else:
+            self.record_size(mirror_path)
+        return stderr, return_code
+
+    def clone(self, clone_url, repo_path) -> tuple:
+        """
+        Clones a repository into repo_path from its mirror, the origin of the clone points to clone_url
+        so the remote branches look the same as in a direct clone.
+        Falls back to a direct clone if the mirror cannot be updated
+        Returns the stderr and return code of the clone
+
+        Args:
+            clone_url(str): the git clone url of the repository
+            repo_path(str): the path to the directory to clone into
+
+        Returns:
+            the stderr and return code of the clone
+        """
+        mirror_path = self.get_mirror_path(clone_url)
+
+        with self.lock_mirror(mirror_path):
+            stderr, return_code = self.update_mirror(clone_url, mirror_path)
+
+            if return_code != 0:
+                print("Mirroring {} failed, cloning directly...\n".format(clone_url))
+                stdout, stderr, return_code = run_git(["clone", clone_url, repo_path])
+                return stderr, return_code
+
+            stdout, stderr, return_code = run_git(["clone", mirror_path, repo_path])
+            if return_code == 0:
+                run_git(["-C", repo_path, "remote", "set-url", "origin", clone_url])
+
+            # the modification time of the mirror is its last use
+            os.utime(mirror_path)
+
+        self.evict(keep=mirror_path)
+        return stderr, return_code
+
+    def evict(self, keep=None) -> list:
+        """
+        Removes least recently used mirrors until all mirrors fit the disk budget, the sizes recorded after
+        the fetches of the mirrors are used. Mirrors that are in use and the mirror given in keep are never removed
+        Returns the paths of the removed mirrors
+
+        Args:
+            keep(str): path of a mirror to keep (optional) default: None
+
+        Returns:
+            list of the paths of the removed mirrors
+        """
+        if not os.path.isdir(self.path):
+            return []
+
+        mirrors = []
+        for name in os.listdir(self.path):
+            mirror_path = os.path.join(self.path, name)
+            if os.path.isdir(mirror_path):
+                mirrors.append((os.stat(mirror_path).st_mtime, mirror_path, self.get_size(mirror_path)))
+
+        total = sum(m[2] for m in mirrors)
+        removed = []
+        for _, mirror_path, size in sorted(mirrors):
+            if total <= self.budget:
+                break
+            if mirror_path == keep:
+                continue
+
+            with self.lock_mirror(mirror_path, blocking=False) as locked:
+                if not locked:
+                    continue
+                shutil.rmtree(mirror_path, ignore_errors=True)
+                try:
+                    os.remove(mirror_path + ".size")
+                except OSError:
+                    pass
+            total -= size
+            removed.append(mirror_path)
+
+        if removed:
+            print("Evicted {} mirrors to stay within {:.0f} MB\n".format(len(removed), self.budget / 1024 / 1024))
+        return removed
+
+
+mirror_store = Mirror_Store()
@@ -0,0 +1,319 @@
+import json
+import os
+import re
+
+import nbformat
+
+
+# number of characters read from a notebook at once
+notebook_chunk_size = int(os.environ.get("NOTEBOOK_CHUNK_SIZE", 65536))
+
+# lines that are IPython syntax rather than python: magics, shell escapes, help and assignments of their output
+magic_pattern = re.compile(r"^\s*(%|!|\?|[\w.]+\?{1,2}\s*$|[\w.,\s]*\w\s*=\s*[!%])")
+
+# cell fields used by the conversion, the other fields such as the outputs are skipped without being loaded
+cell_fields = ("cell_type", "source", "execution_count")
+
+
+class Json_Stream:
+    """
+    Reads json from a file object in chunks. Values are either read or skipped, skipped strings are only
+    scanned for their closing quote so large values such as the images in notebook outputs are never held in memory
+
+    methods:
+        __init__: initializes the stream
+        fill: reads the next chunk
+        peek: returns the next character that is not whitespace
+        expect: consumes a character
+        read_string: reads or skips a string
+        read_literal: reads a number, true, false or null
+        read_value: reads or skips a value
+        skip_value: skips a value
+        iter_object: yields the keys of an object
+        iter_array: yields once for every item of an array
+    """
+
+    def __init__(self, fobj, chunk_size=notebook_chunk_size) -> None:
+        """
+        Initializes the stream
+
+        Args:
+            fobj(file): text file object to read the json from
+            chunk_size(int): number of characters read at once, default is 65536
+
+        Returns:
+            None
+        """
+        self.fobj = fobj
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+
+    def fill(self) -> bool:
+        """
+        Reads the next chunk, the characters that are not consumed yet are kept at the start of the buffer
+        Returns False at the end of the file
+        """
+        chunk = self.fobj.read(self.chunk_size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return bool(chunk)
+
+    def peek(self) -> str:
+        """
+        Skips whitespace
+        Returns the next character without consuming it, an empty string at the end of the file
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char) -> None:
+        """
+        Consumes the next character, raises ValueError if it is not char
+
+        Args:
+            char(str): the expected character
+
+        Returns:
+            None
+        """
+        found = self.peek()
+        if found != char:
+            raise ValueError("Expecting {!r}, found {!r}".format(char, found))
+        self.pos += 1
+
+    def read_string(self, keep=True) -> str:
+        """
+        Reads or skips a string
+
+        Args:
+            keep(bool): if the string is decoded and returned, default is True
+
+        Returns:
+            the string, None if it is skipped
+        """
+        self.expect('"')
+        parts = []
+        start = search = self.pos
+        while True:
+            end = self.buffer.find('"', search)
+            if end == -1:
+                # backslashes at the end of the buffer may escape the first character of the next chunk
+                cut = len(self.buffer.rstrip("\\"))
+                if keep:
+                    parts.append(self.buffer[start:max(cut, start)])
+                self.pos = max(cut, start)
+                if not self.fill():
+                    raise ValueError("Unterminated string")
+                start = search = 0
+                continue
+
+            i = end
+            while i > start and self.buffer[i - 1] == "\\":
+                i -= 1
+            if (end - i) % 2:
+                search = end + 1
+                continue
+
+            if keep:
+                parts.append(self.buffer[start:end])
+            self.pos = end + 1
+            return json.loads('"' + "".join(parts) + '"') if keep else None
+
+    def read_literal(self):
+        """
+        Reads a number, true, false or null
+        Returns the value
+        """
+        self.peek()
+        token = ""
+        while True:
+            end = self.pos
+            while end < len(self.buffer) and self.buffer[end] in "+-.0123456789eEtrufalsn":
+                end += 1
+            token += self.buffer[self.pos:end]
+            self.pos = end
+            if end < len(self.buffer) or not self.fill():
+                break
+        return json.loads(token)
+
+    def read_value(self, keep=True):
+        """
+        Reads or skips a value
+
+        Args:
+            keep(bool): if the value is decoded and returned, default is True
+
+        Returns:
+            the value, None if it is skipped
+        """
+        char = self.peek()
+        if char == '"':
+            return self.read_string(keep)
+        if char == "{":
+            value = {key: self.read_value(keep) for key in self.iter_object()}
+            return value if keep else None
+        if char == "[":
+            value = [self.read_value(keep) for _ in self.iter_array()]
+            return value if keep else None
+        return self.read_literal()
+
+    def skip_value(self) -> None:
+        """
+        Skips a value
+        """
+        self.read_value(keep=False)
+
+    def iter_object(self):
+        """
+        Reads an object, the value of every key must be read or skipped before the next key is asked for
+
+        Returns:
+            A generator of the keys of the object
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("}")
+                return
+
+    def iter_array(self):
+        """
+        Reads an array, every item must be read or skipped before the next one is asked for
+
+        Returns:
+            A generator yielding once for every item of the array
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("]")
+                return
+
+
+def read_notebook_cells(nb_path) -> list:
+    """
+    Reads the type, source and execution count of the cells of a notebook, the outputs and metadata are skipped
+    while the notebook is read. Notebooks older than version 4, which keep the cells in worksheets, are read with nbformat
+
+    Args:
+        nb_path(str): path to the notebook
+
+    Returns:
+        list of dictionaries of the cell fields
+    """
+    cells = None
+    with open(nb_path, encoding="utf-8") as fobj:
+        stream = Json_Stream(fobj)
+        for key in stream.iter_object():
+            if key != "cells":
+                stream.skip_value()
+                continue
+
+            cells = []
+            for _ in stream.iter_array():
+                cell = dict()
+                for cell_key in stream.iter_object():
+                    if cell_key in cell_fields:
+                        cell[cell_key] = stream.read_value()
+                    else:
+                        stream.skip_value()
+                cells.append(cell)
+
+    if cells is None:
+        nb = nbformat.read(nb_path, as_version=4)
+        cells = [{k: cell.get(k) for k in cell_fields} for cell in nb.cells]
+
+    for cell in cells:
+        if isinstance(cell.get("source"), list):
+            cell["source"] = "".join(cell["source"])
+    return cells
+
+
+def comment_magics(source) -> str:
+    """
+    Comments out the IPython syntax of the source of a code cell, the whole cell if it starts with a cell magic.
+    Indented lines are replaced with pass so the block they are in stays valid
+
+    Args:
+        source(str): source of the cell
+
+    Returns:
+        the python source
+    """
+    lines = source.splitlines()
+    if lines and lines[0].lstrip().startswith("%%"):
+        return "\n".join("# " + line for line in lines)
+
+    for i, line in enumerate(lines):
+        if magic_pattern.match(line):
+            code = line.lstrip()
+            indent = line[:len(line) - len(code)]
+            # an indented line may be the only statement of a block
+            lines[i] = indent + ("pass  # " if indent else "# ") + code
+    return "\n".join(lines)
+
+
+def cells_to_py(cells) -> str:
+    """
+    Writes the cells of a notebook as a python script laid out like `jupyter nbconvert --to python` does,
+    markdown cells are written as comments and raw cells are left out
+
+    Args:
+        cells(list): dictionaries of the cell fields
+
+    Returns:
+        the python script
+    """
+    parts = ["#!/usr/bin/env python\n# coding: utf-8\n"]
+    for cell in cells:
+        source = cell.get("source") or ""
+        if cell.get("cell_type") == "code":
+            parts.append("\n# In[{}]:\n\n\n{}\n\n".format(cell.get("execution_count") or " ", comment_magics(source)))
+        elif cell.get("cell_type") == "markdown":
+            parts.append("\n{}\n".format("\n".join("# " + line for line in source.splitlines())))
+    return "".join(parts)
+
+
+def convert_notebook(nb_path, cwd=None, write=True) -> str:
+    """
+    Converts a notebook to a python script, the script is written next to the notebook with the .py extension
+
+    Args:
+        nb_path(str): path to the notebook
+        cwd(str): directory nb_path is relative to (optional) default: None (the current working directory)
+        write(bool): if the script is written, default is True
+
+    Returns:
+        the python script, None if the notebook cannot be read
+    """
+    path = nb_path if cwd is None else os.path.join(cwd, nb_path)
+    try:
+        script = cells_to_py(read_notebook_cells(path))
+    except Exception as e:
+        print("Error converting {}: {}\n".format(nb_path, e))
+        return None
+
+    if write:
+        with open(os.path.splitext(path)[0] + ".py", "w", encoding="utf-8") as f:
+            f.write(script)
+    return script
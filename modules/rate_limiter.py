@@ -0,0 +1,197 @@
+import hashlib
+import os
+import threading
+import time
+
+
+# requests kept in reserve on every budget, they are only spent after the budget resets
+reserve = int(os.environ.get("GITHUB_RATE_LIMIT_RESERVE", 1))
+
+# requests are spread evenly over the time left to the reset once the remaining share of the budget drops below this
+pace_below = float(os.environ.get("GITHUB_RATE_LIMIT_PACE_BELOW", 0.2))
+
+# first wait and upper bound in seconds for secondary rate limit backoff without a Retry-After header
+secondary_backoff = float(os.environ.get("GITHUB_SECONDARY_BACKOFF", 60))
+max_backoff = float(os.environ.get("GITHUB_MAX_BACKOFF", 3600))
+
+
+def get_token_scope(_header=None) -> str:
+    """
+    Returns a short hash of the Authorization header to identify the token a budget belongs to without keeping the token
+
+    Args:
+        _header(dict): header attached to the request (optional) default: None
+
+    Returns:
+        the hash of the Authorization header or "anonymous"
+    """
+    auth = (_header or {}).get("Authorization")
+    if not auth:
+        return "anonymous"
+    return hashlib.sha256(auth.encode("utf-8")).hexdigest()[:16]
+
+
+def get_resource(_url) -> str:
+    """
+    Returns the GitHub rate limit resource a url is counted against
+
+    Args:
+        _url(str): url of the request
+
+    Returns:
+        "search", "graphql" or "core"
+    """
+    if "/search/" in _url:
+        return "search"
+    if _url.rstrip("/").endswith("/graphql"):
+        return "graphql"
+    return "core"
+
+
+class Rate_Limit_Scheduler:
+    """
+    Paces GitHub requests across threads against the remaining budget reported in the X-RateLimit-* headers
+    and backs off on primary and secondary rate limit responses
+
+    methods:
+        __init__: initializes the scheduler
+        acquire: blocks until a request may be sent on a budget
+        update: records the rate limit headers of a response and decides whether it should be retried
+        get_budgets: returns the last known budgets
+        get_requests: returns the number of requests sent on every budget
+    """
+
+    def __init__(self, reserve=reserve, pace_below=pace_below, secondary_backoff=secondary_backoff, max_backoff=max_backoff, clock=time.time, sleep=time.sleep) -> None:
+        """
+        Initializes the scheduler
+
+        Args:
+            reserve(int): requests kept in reserve on every budget, default is 1
+            pace_below(float): share of the budget below which requests are spread over the time left to reset, default is 0.2
+            secondary_backoff(float): first wait in seconds on a secondary rate limit without Retry-After, default is 60
+            max_backoff(float): upper bound in seconds of a single wait, default is 3600
+            clock(function): returns the current epoch time, default is time.time
+            sleep(function): sleeps for the given seconds, default is time.sleep
+
+        Returns:
+            None
+        """
+        self.reserve = reserve
+        self.pace_below = pace_below
+        self.secondary_backoff = secondary_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.budgets = {}
+        self.next_slot = {}
+        self.blocked_until = {}
+        self.strikes = {}
+        self.requests = {}
+
+    def acquire(self, scope, resource) -> float:
+        """
+        Blocks until a request may be sent on the budget of a token scope and resource.
+        Returns the number of seconds waited
+
+        Args:
+            scope(str): token scope of the request
+            resource(str): rate limit resource of the request
+
+        Returns:
+            the number of seconds waited
+        """
+        key = (scope, resource)
+        with self.lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            now = self.clock()
+            start = max(now, self.blocked_until.get(scope, 0))
+            budget = self.budgets.get(key)
+
+            if budget is not None and budget["reset"] > now:
+                if budget["remaining"] <= self.reserve:
+                    # budget is spent, wait for the reset
+                    start = max(start, budget["reset"] + 1)
+                elif budget["remaining"] < budget["limit"] * self.pace_below:
+                    # spread what is left evenly over the time to the reset
+                    interval = (budget["reset"] - now) / (budget["remaining"] - self.reserve)
+                    start = max(start, self.next_slot.get(key, 0))
+                    self.next_slot[key] = start + interval
+                # count the request against the budget until its response updates it
+                budget["remaining"] -= 1
+
+        wait = min(start - now, self.max_backoff)
+        if wait > 0:
+            print("Rate limit: waiting {:.1f} seconds for the {} budget\n".format(wait, resource))
+            self.sleep(wait)
+            return wait
+        return 0
+
+    def update(self, scope, resource, resp) -> bool:
+        """
+        Records the rate limit headers of a response and decides whether the request should be retried
+        Returns True if the response was a rate limit rejection
+
+        Args:
+            scope(str): token scope of the request
+            resource(str): rate limit resource the request was counted against
+            resp(requests.Response): the response
+
+        Returns:
+            True if the request should be retried, else False
+        """
+        headers = resp.headers
+        resource = headers.get("X-RateLimit-Resource", resource)
+        key = (scope, resource)
+        now = self.clock()
+
+        with self.lock:
+            if "X-RateLimit-Remaining" in headers and "X-RateLimit-Reset" in headers:
+                try:
+                    self.budgets[key] = {"remaining": int(headers["X-RateLimit-Remaining"]),
+                                         "limit": int(headers.get("X-RateLimit-Limit", 0)) or 1,
+                                         "reset": float(headers["X-RateLimit-Reset"])}
+                except ValueError:
+                    pass
+
+            if resp.status_code not in [403, 429]:
+                self.strikes[scope] = 0
+                return False
+
+            retry_after = headers.get("Retry-After")
+            budget = self.budgets.get(key)
+
+            if retry_after is not None and retry_after.isdigit():
+                self.blocked_until[scope] = now + int(retry_after)
+
+            elif budget is not None and budget["remaining"] == 0:
+                # primary rate limit, the budget acquire waits on is already recorded
+                pass
+
+            elif resp.status_code == 429 or "secondary rate limit" in resp.text.lower():
+                strikes = self.strikes.get(scope, 0)
+                self.blocked_until[scope] = now + min(self.secondary_backoff * 2 ** strikes, self.max_backoff)
+                self.strikes[scope] = strikes + 1
+
+            else:
+                # a 403 that is not about rate limits, e.g. missing permissions
+                return False
+
+        return True
+
+    def get_budgets(self) -> dict:
+        """
+        Returns a dictionary of the last known budgets with (token scope, resource) as keys
+        """
+        with self.lock:
+            return {k: dict(v) for k, v in self.budgets.items()}
+
+    def get_requests(self) -> dict:
+        """
+        Returns a dictionary of the number of requests sent with (token scope, resource) as keys
+        """
+        with self.lock:
+            return dict(self.requests)
+
+
+github_scheduler = Rate_Limit_Scheduler()
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+
+from modules.http_session import github_api_url
+from modules.rate_limiter import get_token_scope
+from modules.response_cache import send_cached_get_req
+
+
+# seconds a resolved repository and a repository that was not found are kept
+resolver_ttl = float(os.environ.get("REPO_RESOLVER_TTL", 600))
+resolver_negative_ttl = float(os.environ.get("REPO_RESOLVER_NEGATIVE_TTL", 300))
+
+not_found_error = "Not Found"
+
+
+class Repo_Resolver:
+    """
+    Resolves a repository with a single /repos/{owner}/{repo} request and caches both found and not found results.
+    GitHub matches owner and repo case insensitively and redirects renamed or transferred repositories, the
+    details returned carry the canonical name.
+
+    methods:
+        __init__: initializes the resolver
+        get_key: creates the cache key of a repository
+        resolve: retrieves the details of a repository
+        clear: removes all cached results
+    """
+
+    def __init__(self, ttl=resolver_ttl, negative_ttl=resolver_negative_ttl, api_url=github_api_url) -> None:
+        """
+        Initializes the resolver
+
+        Args:
+            ttl(float): seconds a resolved repository is kept, default is 600
+            negative_ttl(float): seconds a repository that was not found is kept, default is 300
+            api_url(str): root url of the github api, default is https://api.github.com
+
+        Returns:
+            None
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.api_url = api_url
+        self.lock = threading.Lock()
+        self.entries = dict()
+
+    def get_key(self, user, repo_name, headers=None) -> tuple:
+        """
+        Creates the cache key of a repository, private repositories are only visible to some tokens
+        so the token scope is part of the key
+
+        Args:
+            user(str): github username
+            repo_name(str): name of repo
+            headers(dict): header attached to the request (optional) default: None
+
+        Returns:
+            tuple of the lower case username and repo name and the token scope
+        """
+        return (user.lower(), repo_name.lower(), get_token_scope(headers))
+
+    def resolve(self, user, repo_name, headers=None) -> tuple:
+        """
+        Retrieves the details of a repository
+        Returns a tuple of the details (None if the repository could not be resolved) and the error
+
+        Args:
+            user(str): github username
+            repo_name(str): name of repo
+            headers(dict): header to attach to the request (optional) default: None
+
+        Returns:
+            repo details, error
+        """
+        key = self.get_key(user, repo_name, headers)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and time.time() < entry["expires_at"]:
+            return entry["repo_details"], entry["error"]
+
+        resp, resp_status_code = send_cached_get_req(_url="{}/repos/{}/{}".format(self.api_url, user, repo_name), _header=headers)
+
+        if resp_status_code == 200:
+            repo_details, error, ttl = resp.json(), None, self.ttl
+        elif resp_status_code == 404:
+            repo_details, error, ttl = None, not_found_error, self.negative_ttl
+        else:
+            # rate limits and server errors are not cached
+            try:
+                error = resp.json()
+            except ValueError:
+                error = resp.reason
+            return None, error
+
+        with self.lock:
+            self.entries[key] = {"repo_details": repo_details, "error": error, "expires_at": time.time() + ttl}
+        return repo_details, error
+
+    def clear(self) -> None:
+        """
+        Removes all cached results
+        """
+        with self.lock:
+            self.entries = dict()
+
+
+repo_resolver = Repo_Resolver()
+
+
+def resolve_repo(user, repo_name, headers=None, resolver=None) -> tuple:
+    """
+    Retrieves the details of a repository with the shared resolver
+    Returns a tuple of the details (None if the repository could not be resolved) and the error
+
+    Args:
+        user(str): github username
+        repo_name(str): name of repo
+        headers(dict): header to attach to the request (optional) default: None
+        resolver(Repo_Resolver): the resolver to use (optional) default: repo_resolver
+
+    Returns:
+        repo details, error
+    """
+    return (resolver or repo_resolver).resolve(user, repo_name, headers)
+
+
+def create_repo_dict(repo_details, info_list, branch=None, add_repo_name=True) -> dict:
+    """
+    Creates the dictionary the repo endpoints build their response from, with the repo name as key
+    and the fields in info_list as values
+
+    Args:
+        repo_details(dict): details of the repository returned by resolve_repo
+        info_list(list): fields of the details to keep
+        branch(str): name of branch the html_url should point to, default = None
+        add_repo_name(bool): flag to indicate if the repo name should be added to the values, default is True
+
+    Returns:
+        dictionary of the repo details
+    """
+    repo_name = repo_details["name"]
+    repo_dict = {repo_name: {k: repo_details[k] for k in info_list}}
+    if add_repo_name:
+        repo_dict[repo_name]["repo_name"] = repo_name
+    if branch:
+        repo_dict[repo_name]["html_url"] = repo_dict[repo_name]["html_url"] + "/tree/" + branch
+    return repo_dict
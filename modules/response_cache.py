@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from modules.http_session import send_get_req
+
+
+root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# sqlite file the github responses are cached in
+cache_path = os.environ.get("GITHUB_CACHE_PATH", os.path.join(root_dir, "data", "cache", "github_response_cache.db"))
+
+# seconds during which a stored response is served without revalidation
+cache_max_age = float(os.environ.get("GITHUB_CACHE_MAX_AGE", 60))
+
+# response headers kept with the cached body
+stored_headers = ["Content-Type", "ETag", "Last-Modified", "Link"]
+
+
+class Response_Cache:
+    """
+    Persistent cache of GET responses that are revalidated with conditional requests (ETag / Last-Modified)
+
+    methods:
+        __init__: initializes the cache
+        get_key: creates the cache key of a url and the token scope of a header
+        lookup: retrieves a stored entry
+        store: stores a response
+        touch: refreshes the time an entry was last validated
+        record: increments one of the hit, miss or not modified counters
+        get_stats: returns the hit, miss and not modified counters
+        reset_stats: sets the counters to zero
+    """
+
+    def __init__(self, path=cache_path, max_age=cache_max_age) -> None:
+        """
+        Initializes the cache
+
+        Args:
+            path(str): path to the sqlite database file, default is data/cache/github_response_cache.db
+            max_age(float): seconds during which a stored response is served without revalidation, default is 60
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.conn = None
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Opens the sqlite database on first use and creates the responses table if it does not exist
+        Returns the connection
+        """
+        if self.conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                    key TEXT PRIMARY KEY,
+                                    url TEXT,
+                                    etag TEXT,
+                                    last_modified TEXT,
+                                    headers TEXT,
+                                    content BLOB,
+                                    validated_at REAL)""")
+            self.conn.commit()
+        return self.conn
+
+    def get_key(self, _url, _header=None) -> str:
+        """
+        Creates the cache key of a url and the token scope of a header. The token itself is never stored.
+
+        Args:
+            _url(str): url of the request
+            _header(dict): header attached to the request (optional) default: None
+
+        Returns:
+            the cache key
+        """
+        scope = (_header or {}).get("Authorization", "")
+        return hashlib.sha256("{}\n{}".format(_url, scope).encode("utf-8")).hexdigest()
+
+    def lookup(self, key) -> dict or None:
+        """
+        Retrieves a stored entry given its key
+        Returns a dictionary of the entry or None if there is no entry
+
+        Args:
+            key(str): the cache key
+
+        Returns:
+            a dictionary of the entry or None
+        """
+        with self.lock:
+            row = self.connect().execute(
+                "SELECT etag, last_modified, headers, content, validated_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "headers": json.loads(row[2]), "content": row[3], "validated_at": row[4]}
+
+    def store(self, key, _url, resp) -> None:
+        """
+        Stores a response that carries an ETag or a Last-Modified header
+
+        Args:
+            key(str): the cache key
+            _url(str): url of the request
+            resp(requests.Response): the response to store
+
+        Returns:
+            None
+        """
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        headers = {h: resp.headers[h] for h in stored_headers if h in resp.headers}
+        with self.lock:
+            self.connect().execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   (key, _url, etag, last_modified, json.dumps(headers), resp.content, time.time()))
+            self.conn.commit()
+
+    def touch(self, key) -> None:
+        """
+        Refreshes the time an entry was last validated
+
+        Args:
+            key(str): the cache key
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.connect().execute("UPDATE responses SET validated_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+
+    def record(self, counter) -> None:
+        """
+        Increments one of the hits, misses or not_modified counters
+
+        Args:
+            counter(str): name of the counter
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.stats[counter] += 1
+
+    def get_stats(self) -> dict:
+        """
+        Returns a dictionary of the hits, misses and not_modified counters
+        """
+        with self.lock:
+            return dict(self.stats)
+
+    def reset_stats(self) -> None:
+        """
+        Sets the hits, misses and not_modified counters to zero
+        """
+        with self.lock:
+            self.stats = {k: 0 for k in self.stats}
+
+
+github_response_cache = Response_Cache()
+
+
+def build_cached_response(_url, entry, headers=None) -> requests.Response:
+    """
+    Creates a response with status code 200 from a stored entry
+
+    Args:
+        _url(str): url of the request
+        entry(dict): the stored entry
+        headers(dict): headers of the revalidation response to merge into the stored headers (optional) default: None
+
+    Returns:
+        the response
+    """
+    resp = requests.models.Response()
+    resp.status_code = 200
+    resp.url = _url
+    resp._content = entry["content"]
+    resp.encoding = "utf-8"
+    resp.headers = CaseInsensitiveDict(entry["headers"])
+    if headers:
+        resp.headers.update({k: v for k, v in headers.items() if k.lower() not in ["content-length", "content-encoding"]})
+    return resp
+
+
+def send_cached_get_req(_url, _header=None, cache=None) -> tuple:
+    """
+    Sends a get request given a url and a header(optional) and returns a tuple of response and the status code.
+    Stored responses are served directly while fresh and revalidated with If-None-Match / If-Modified-Since
+    otherwise, a 304 from GitHub is answered with the stored body.
+
+    Args:
+        _url(str): url to send the request to
+        _header(dict): header to attach to the request (optional) default: None
+        cache(Response_Cache): the cache to use (optional) default: github_response_cache
+
+    Returns:
+        response, response status code
+    """
+    cache = cache or github_response_cache
+    key = cache.get_key(_url, _header)
+    entry = cache.lookup(key)
+
+    if entry is not None and time.time() - entry["validated_at"] < cache.max_age:
+        cache.record("hits")
+        return build_cached_response(_url, entry), 200
+
+    header = dict(_header or {})
+    if entry is not None:
+        if entry["etag"]:
+            header["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            header["If-Modified-Since"] = entry["last_modified"]
+
+    resp, status_code = send_get_req(_url, _header=header)
+
+    if status_code == 304 and entry is not None:
+        cache.record("not_modified")
+        cache.touch(key)
+        return build_cached_response(_url, entry, resp.headers), 200
+
+    cache.record("misses")
+    if status_code == 200:
+        cache.store(key, _url, resp)
+    return resp, status_code
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from modules.rate_limiter import get_token_scope, github_scheduler, reserve
+
+
+class Token_Pool:
+    """
+    Leases GitHub tokens to jobs based on the remaining budget the rate limit scheduler knows for each token
+    and rotates to the next token once one is exhausted
+
+    methods:
+        __init__: initializes the pool
+        get_headers: creates the authorization headers of a token
+        get_remaining: returns the remaining budget and reset time of a token
+        lease: returns the token with the most remaining budget
+        get_usage_report: returns the leases, requests and remaining budget of every token
+        print_usage_report: prints the usage report
+    """
+
+    def __init__(self, tokens, scheduler=github_scheduler, reserve=reserve, clock=time.time) -> None:
+        """
+        Initializes the pool
+
+        Args:
+            tokens(list): github tokens, empty values and duplicates are dropped
+            scheduler(Rate_Limit_Scheduler): scheduler the budgets are read from, default is github_scheduler
+            reserve(int): requests kept in reserve on every budget, default is 1
+            clock(function): returns the current epoch time, default is time.time
+
+        Returns:
+            None
+        """
+        self.tokens = list(dict.fromkeys(t for t in tokens if t))
+        if not self.tokens:
+            raise ValueError("Token pool needs at least one github token")
+        self.scheduler = scheduler
+        self.reserve = reserve
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.leases = {t: 0 for t in self.tokens}
+        self.last_leased = None
+
+    def get_headers(self, token) -> dict:
+        """
+        Creates the authorization headers of a token
+
+        Args:
+            token(str): github token
+
+        Returns:
+            dictionary of the headers
+        """
+        return {"Authorization":"Bearer {}".format(token)}
+
+    def get_remaining(self, token, resource="core") -> tuple:
+        """
+        Returns the remaining budget and reset time of a token. A token without a known budget or
+        whose budget has already been reset counts as unused
+
+        Args:
+            token(str): github token
+            resource(str): rate limit resource, default is core
+
+        Returns:
+            remaining requests, epoch time of the reset
+        """
+        budget = self.scheduler.get_budgets().get((get_token_scope(self.get_headers(token)), resource))
+        if budget is None or budget["reset"] <= self.clock():
+            return float("inf"), 0
+        return budget["remaining"], budget["reset"]
+
+    def lease(self, resource="core") -> str:
+        """
+        Returns the token with the most remaining budget on a resource, tokens leased less often win ties.
+        If every token is exhausted the token that resets first is returned and the scheduler waits for its reset
+
+        Args:
+            resource(str): rate limit resource the token is leased for, default is core
+
+        Returns:
+            the github token
+        """
+        with self.lock:
+            remaining = {t: self.get_remaining(t, resource) for t in self.tokens}
+            available = [t for t in self.tokens if remaining[t][0] > self.reserve]
+
+            if available:
+                token = max(available, key=lambda t: (remaining[t][0], -self.leases[t]))
+            else:
+                token = min(self.tokens, key=lambda t: remaining[t][1])
+
+            if self.last_leased is not None and token != self.last_leased:
+                print("Token pool: rotating to token {} for the {} budget\n".format(mask_token(token), resource))
+
+            self.leases[token] += 1
+            self.last_leased = token
+            return token
+
+    def get_usage_report(self) -> list:
+        """
+        Returns a list of dictionaries with the masked token, the number of leases, the number of requests sent
+        and the last known remaining budget for every resource of each token
+        """
+        budgets = self.scheduler.get_budgets()
+        requests = self.scheduler.get_requests()
+
+        report = []
+        for token in self.tokens:
+            scope = get_token_scope(self.get_headers(token))
+            report.append({"token": mask_token(token),
+                           "leases": self.leases[token],
+                           "requests": {r: n for (s, r), n in requests.items() if s == scope},
+                           "remaining": {r: max(b["remaining"], 0) for (s, r), b in budgets.items() if s == scope}})
+        return report
+
+    def print_usage_report(self) -> None:
+        """
+        Prints the usage report of every token
+        """
+        print("GitHub token usage:")
+        for usage in self.get_usage_report():
+            print("    {}: leases: {}, requests: {}, remaining: {}".format(
+                usage["token"], usage["leases"], usage["requests"], usage["remaining"]))
+        print("\n")
+
+
+def mask_token(token) -> str:
+    """
+    Returns a token with all but the last four characters hidden so it can be printed
+
+    Args:
+        token(str): github token
+
+    Returns:
+        the masked token
+    """
+    return "****" + token[-4:]
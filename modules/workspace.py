@@ -0,0 +1,192 @@
+import os
+import re
+import shutil
+import socket
+import time
+import uuid
+
+
+root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# directory workspaces are created in, resolved against the project root
+workspace_dir = os.environ.get("WORKSPACE_DIR", os.path.join(root_dir, "tmp"))
+
+# RAM backed directory for small repositories such as /dev/shm, empty to create every workspace in workspace_dir
+workspace_ram_dir = os.environ.get("WORKSPACE_RAM_DIR", "")
+
+# largest repository in kilobytes, as reported by github, that is analysed in workspace_ram_dir
+workspace_ram_max_kb = float(os.environ.get("WORKSPACE_RAM_MAX_KB", 51200))
+
+# seconds after which the sweeper removes a workspace even if the process that created it is still running
+workspace_max_age = float(os.environ.get("WORKSPACE_MAX_AGE", 86400))
+
+# name of this host in the workspace names, hosts and containers sharing WORKSPACE_DIR must have distinct names
+workspace_host = re.sub(r"[^0-9A-Za-z-]", "-", os.environ.get("WORKSPACE_HOST", socket.gethostname())) or "localhost"
+
+# workspace directories are named ws_<host>_<pid>_<job id>, the sweeper only removes directories of this form
+# created on its own host, the pids of other hosts cannot be checked
+workspace_pattern = re.compile(r"^ws_([0-9A-Za-z-]+)_(\d+)_[0-9A-Za-z_.-]+$")
+
+
+def get_base_dir(size_kb=None, disk_dir=None, ram_dir=None, ram_max_kb=None) -> str:
+    """
+    Returns the directory a workspace for a repository of the given size is created in.
+    Repositories up to ram_max_kb are put in ram_dir if it is set, exists and has room for a few times
+    the size of the repository, the others in disk_dir
+
+    Args:
+        size_kb(float): size of the repository in kilobytes (optional) default: None (disk_dir is used)
+        disk_dir(str): directory on disk (optional) default: None (the WORKSPACE_DIR environment variable)
+        ram_dir(str): RAM backed directory (optional) default: None (the WORKSPACE_RAM_DIR environment variable)
+        ram_max_kb(float): largest repository put in ram_dir (optional) default: None (the WORKSPACE_RAM_MAX_KB environment variable)
+
+    Returns:
+        the path of the directory
+    """
+    disk_dir = disk_dir or workspace_dir
+    ram_dir = workspace_ram_dir if ram_dir is None else ram_dir
+    ram_max_kb = workspace_ram_max_kb if ram_max_kb is None else ram_max_kb
+
+    if not ram_dir or size_kb is None or size_kb > ram_max_kb or not os.path.isdir(ram_dir):
+        return disk_dir
+
+    # the checkout and the converted notebooks take more room than the packed size github reports
+    if shutil.disk_usage(ram_dir).free < size_kb * 1024 * 4:
+        return disk_dir
+    return ram_dir
+
+
+def is_process_alive(pid) -> bool:
+    """
+    Checks if a process is running
+
+    Args:
+        pid(int): the process id
+
+    Returns:
+        True if the process is running, False otherwise
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def sweep_workspaces(dirs=None, max_age=workspace_max_age) -> list:
+    """
+    Removes workspaces left behind by processes of this host that were killed or crashed before cleaning up,
+    that is workspaces of processes that are no longer running and workspaces older than max_age.
+    Meant to be run when the api or a load starts
+    Returns the paths of the removed workspaces
+
+    Args:
+        dirs(list): directories to sweep (optional) default: None (the WORKSPACE_DIR and WORKSPACE_RAM_DIR environment variables)
+        max_age(float): seconds after which a workspace is removed, default is 86400
+
+    Returns:
+        list of the paths of the removed workspaces
+    """
+    if dirs is None:
+        dirs = [d for d in (workspace_dir, workspace_ram_dir) if d]
+
+    removed = []
+    now = time.time()
+    for base_dir in dirs:
+        if not os.path.isdir(base_dir):
+            continue
+        for name in os.listdir(base_dir):
+            match = workspace_pattern.match(name)
+            path = os.path.join(base_dir, name)
+            if match is None or match.group(1) != workspace_host or not os.path.isdir(path):
+                continue
+            try:
+                age = now - os.stat(path).st_mtime
+            except OSError:
+                continue
+            if is_process_alive(int(match.group(2))) and age < max_age:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+
+    if removed:
+        print("Removed {} orphaned workspaces\n".format(len(removed)))
+    return removed
+
+
+class Workspace:
+    """
+    Directory a repository is cloned into and analysed in. Every workspace is a unique directory named after
+    the host, the process and a job id, so analyses of repositories with the same name, such as forks of a starter
+    repository, never share a checkout. The root of the workspace is passed as cwd to every git, radon and
+    nbconvert process of the analysis and file paths are resolved against it.
+
+    Used as a context manager the workspace is created on entry and removed on exit, also when the analysis fails.
+
+    methods:
+        __init__: initializes the workspace
+        create: creates the directory of the workspace
+        resolve: resolves a path relative to the workspace
+        remove: removes the directory of the workspace
+    """
+
+    def __init__(self, repo_name, job_id=None, size_kb=None, tmp_dir=None) -> None:
+        """
+        Initializes the workspace
+
+        Args:
+            repo_name(str): name of the repository, used for naming the directory the repository is cloned into
+            job_id(str): id of the job the workspace is used by (optional) default: None (a random id)
+            size_kb(float): size of the repository in kilobytes, small repositories are put in the RAM backed
+                            directory if one is configured (optional) default: None
+            tmp_dir(str): the directory the workspace is created in (optional) default: None (chosen by get_base_dir)
+
+        Returns:
+            None
+        """
+        self.repo_name = repo_name
+        self.job_id = job_id or uuid.uuid4().hex
+        base_dir = tmp_dir or get_base_dir(size_kb)
+        self.path = os.path.abspath(os.path.join(base_dir, "ws_{}_{}_{}".format(workspace_host, os.getpid(), self.job_id)))
+        self.root = os.path.join(self.path, repo_name)
+        # File_Inventory of the checkout, set once the repository is cloned
+        self.inventory = None
+        # content of the changes made to the analysed files by file path, set when the changed content is analysed
+        self.changed_contents = None
+
+    def __enter__(self) -> "Workspace":
+        self.create()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.remove()
+
+    def create(self) -> str:
+        """
+        Creates the directory of the workspace, an existing checkout in the workspace is deleted first
+        Returns the root of the workspace
+        """
+        if os.path.exists(self.root):
+            shutil.rmtree(self.root)
+        os.makedirs(self.root)
+        return self.root
+
+    def resolve(self, path) -> str:
+        """
+        Resolves a path relative to the workspace
+
+        Args:
+            path(str): path relative to the root of the workspace
+
+        Returns:
+            the absolute path
+        """
+        return os.path.normpath(os.path.join(self.root, path))
+
+    def remove(self) -> None:
+        """
+        Removes the directory of the workspace
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
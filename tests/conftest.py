@@ -0,0 +1,23 @@
+import subprocess
+
+import pytest
+
+
+def run_git(cwd, *args, author="test"):
+    return subprocess.run(["git", "-c", "user.name={}".format(author), "-c", "user.email={}@example.com".format(author)] + list(args),
+                          cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True).stdout
+
+
+@pytest.fixture(scope="session")
+def git():
+    # runs git in a directory as the given author and returns its output, fails the test if git fails
+    return run_git
+
+
+@pytest.fixture
+def git_repo(tmp_path, git):
+    # empty repository on the main branch
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    return repo
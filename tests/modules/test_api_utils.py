@@ -4,13 +4,15 @@ import sys
 import pytest
 import shutil
 from modules.Retrieve_Commit_History import Retrieve_Commit_History
+from modules.file_inventory import File_Inventory
+from modules.workspace import Workspace
 
 curdir = os.path.dirname(os.path.realpath("modules/api_utils.py"))
 cpath = os.path.dirname(curdir)
 if not cpath in sys.path:
     sys.path.append(cpath)
 
-from modules.api_utils import retrieve_langs, check_lang_exit, create_repo_dir, clone_repo, get_git_branch, check_out_branch, get_file_checks, retriev_files, convert_nb_to_py, run_cmd_process, retrieve_init_last_commit_sha, get_additions_and_save_contents, run_to_get_adds_and_save_content
+from modules.api_utils import retrieve_langs, check_lang_exit, create_repo_dir, clone_repo, get_git_branch, check_out_branch, get_file_checks, retriev_files, convert_nb_to_py, run_cmd_process, retrieve_init_last_commit_sha, retrieve_diff_details, get_additions_and_save_contents, run_to_get_adds_and_save_content, get_sparse_patterns, partial_clone, prefetch_blobs, retrieve_init_last_commit_shas
 
 
 if os.path.exists(".env/secret.json"):
@@ -476,8 +478,9 @@ class Test_run_to_get_adds_and_save_content(object):
 
     
     def test_run_to_get_adds_and_save_content_no_branch(self):
+        workspace = Workspace(repo_name)
         expected = (
-                    "Cloning into 'tmp/js_code_metrics_api'...\n",
+                    "Cloning into '{}'...\ndone.\n".format(workspace.root),
                     0,
                     {
                         "./server.js": 0,
@@ -870,15 +873,12 @@ class Test_run_to_get_adds_and_save_content(object):
                     ]
                 )   
         cwd_start = os.getcwd()
-        output = run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, github_token,  branch=None, path='.')
+        with workspace:
+            output = run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, github_token,  branch=None, path='.', workspace=workspace)
 
+        assert os.getcwd() == cwd_start, "the working directory should not change"
         assert output == expected, "Expected output to be {} but got {}".format(expected, output)
 
-        cwd_end = os.getcwd()
-
-        os.chdir(cwd_start)
-        shutil.rmtree(cwd_end)
-
 
     def test_run_to_get_adds_and_save_content_branch_specified(self):
         expected = (
@@ -991,11 +991,120 @@ class Test_run_to_get_adds_and_save_content(object):
                 []
             )                
         cwd_start = os.getcwd()
-        output = run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, github_token,  branch=branch_name, path='.')
+        with Workspace(repo_name) as workspace:
+            output = run_to_get_adds_and_save_content(user, repo_name, repo_dict, file_ext, github_token,  branch=branch_name, path='.', workspace=workspace)
 
+        assert os.getcwd() == cwd_start, "the working directory should not change"
         assert output == expected, "Expected output to be {} but got {}".format(expected, output)
 
-        cwd_end = os.getcwd()
 
-        os.chdir(cwd_start)
-        shutil.rmtree(cwd_end)
+def missing_blobs(git, cwd):
+    return [l for l in git(cwd, "rev-list", "--objects", "--missing=print", "HEAD").splitlines() if l.startswith("?")]
+
+
+def test_partial_clone(tmp_path, git, git_repo):
+    src = git_repo
+    (src / "pkg" / "lib").mkdir(parents=True)
+    (src / "data").mkdir()
+    git(src, "config", "uploadpack.allowFilter", "true")
+    git(src, "config", "uploadpack.allowAnySHA1InWant", "true")
+    (src / "README.md").write_text("readme\n")
+    (src / "pkg" / "a.py").write_text("a = 1\n")
+    (src / "pkg" / "lib" / "b.py").write_text("b = 1\n")
+    (src / "data" / "big.csv").write_text("x,y\n" * 1000)
+    git(src, "add", ".")
+    git(src, "commit", "-q", "-m", "first")
+    (src / "pkg" / "a.py").write_text("a = 2\n")
+    (src / "data" / "big.csv").write_text("x,z\n" * 1000)
+    git(src, "commit", "-q", "-am", "second")
+
+    full, dst = tmp_path / "full", tmp_path / "dst"
+    git(tmp_path, "clone", "-q", str(src), str(full))
+    stderr, return_code = partial_clone("file://" + str(src), str(dst), get_sparse_patterns([".py"]))
+    assert return_code == 0, stderr
+    assert (dst / "pkg" / "a.py").exists() and (dst / "README.md").exists()
+    assert not (dst / "data").exists(), "files without the given extensions should not be checked out"
+    assert len(missing_blobs(git, dst)) == 3, "blobs of files not checked out should not be downloaded"
+
+    checks = dict(exclude_list=[".git", "lib"], file_extensions=["py", "csv"], files_to_check=["README.md"], dirs_to_check=["data"])
+    tree_inventory = File_Inventory(checks["exclude_list"]).scan_git_tree(str(dst))
+    assert get_file_checks(path=str(dst), inventory=tree_inventory, **checks) == get_file_checks(path=str(full), **checks), \
+        "file checks on the tree should match the file checks on a full checkout"
+
+    stderr, return_code = prefetch_blobs(["*.py"], cwd=str(dst))
+    assert return_code == 0, stderr
+    assert len(missing_blobs(git, dst)) == 2, "only the blobs of the csv file should be missing"
+
+    commits = list(Retrieve_Commit_History(stat_pathspec=["*.py"], cwd=str(dst)).iter_commits())
+    assert [c["message"] for c in commits] == ["second", "first"]
+    assert commits[0]["files"]["pkg/a.py"] == {"change_status": "Modified", "file_type": "non-binary", "additions": 1, "deletions": 1}
+    assert commits[0]["files"]["data/big.csv"] == {"change_status": "Modified"}, "stats of files outside the pathspec should not be retrieved"
+    assert len(missing_blobs(git, dst)) == 2, "the commit history should not download the csv file"
+
+
+def test_single_pass_additions(git, git_repo):
+    repo = git_repo
+    (repo / "pkg").mkdir()
+    cwd = os.getcwd()
+
+    def commit(files, message):
+        for name, content in files.items():
+            if content is None:
+                git(repo, "rm", "-q", name)
+            else:
+                (repo / name).write_text(content)
+                git(repo, "add", name)
+        git(repo, "commit", "-q", "-m", message)
+
+    body = "".join("line_{} = {}\n".format(i, i) for i in range(20))
+    commit({"pkg/a.py": body, "b.py": "b = 1\n", "c.py": "c = 1\n", "\u00e9.py": "e = 1\n"}, "first")
+    commit({"pkg/a.py": body + "x = 1\n", "b.py": "b = 2\nb = 1\n", "\u00e9.py": "e = 2\n"}, "second")
+    git(repo, "mv", "pkg/a.py", "pkg/moved.py")
+    commit({"c.py": None, "\u00e9.py": "e = 3\ne = 1\n"}, "third")
+    commit({"pkg/moved.py": "y = 2\n" + body + "x = 1\n", "c.py": "c = 3\n"}, "fourth")
+    (repo / "untracked.py").write_text("u = 1\n")
+
+    paths = ["./pkg/moved.py", "./b.py", "./c.py", "./\u00e9.py", "./untracked.py"]
+    files = [(p, os.path.join(os.path.dirname(p), "changed_" + os.path.basename(p))) for p in paths]
+
+    expected_shas = [retrieve_init_last_commit_sha(run_cmd_process(cmd_list=["git", "log", "--follow", p], cwd=str(repo))[0]) for p in paths]
+    init_last_dict = retrieve_init_last_commit_shas(paths, cwd=str(repo))
+    assert [init_last_dict[p] for p in paths] == expected_shas, "shas should match git log --follow"
+
+    changed_contents = dict()
+    additions_dict = get_additions_and_save_contents(files, expected_shas, cwd=str(repo), changed_contents=changed_contents)
+    expected = dict()
+    for (path, changed_path), shas in zip(files, expected_shas):
+        if shas[0] is None:
+            expected[path] = (0, None)
+        else:
+            additions, content = retrieve_diff_details(run_cmd_process(cmd_list=["git", "diff", shas[0], shas[1], "--", path], cwd=str(repo))[0])
+            expected[path] = (additions, "\n".join(content))
+    saved = {path: (additions_dict[path], changed_contents.get(path)) for path, changed_path in files}
+    assert saved == expected, "additions and saved contents should match a git diff of each file"
+    assert not any(os.path.exists(repo / changed_path) for path, changed_path in files), "the checkout should not be modified"
+    assert additions_dict["./pkg/moved.py"] == 22 and additions_dict["./\u00e9.py"] == 1
+    assert os.getcwd() == cwd, "the working directory should not change"
+
+
+def test_retrieve_diff_details():
+    header = "diff --git a/a.py b/a.py\nindex 1..2 100644\n--- a/a.py\n+++ b/a.py\n@@ -1,4 +1,5 @@\n"
+    diff = header + "-x = 1\n-x = 1\n-y = 2\n+x = 1\n+z = 3\n+z = 3\n+y = 2\n+y = 2\n z = 0\n\\ No newline at end of file\n"
+    assert retrieve_diff_details(diff) == (3, ["x = 1", "z = 3", "z = 3", "y = 2", "y = 2"]), \
+        "added lines should only cancel out as many removed lines with the same text"
+    assert retrieve_diff_details(iter(diff.split("\n"))) == retrieve_diff_details(diff)
+    assert retrieve_diff_details(header) == (0, [])
+    assert retrieve_diff_details(header[:-1]) == (0, [""])
+    assert retrieve_diff_details("") == (0, [""])
+
+
+def test_retriev_files_removes_excluded_dirs_with_language_files(tmp_path):
+    for name in ["a.py", "venv/lib/b.py", "node_modules/c.txt", "__pycache__/d.txt"]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("x = 1\n")
+
+    files = retriev_files(path=".", file_ext=[".py"], cwd=str(tmp_path))
+    assert [f for f, _ in files] == ["./a.py"]
+    assert not (tmp_path / "venv").exists(), "excluded directories with language files should be removed"
+    assert (tmp_path / "node_modules" / "c.txt").exists() and (tmp_path / "__pycache__").exists(), \
+        "excluded directories without language files should be left in the checkout"
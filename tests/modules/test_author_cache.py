@@ -0,0 +1,24 @@
+import os
+import sys
+
+curdir = os.path.dirname(os.path.realpath("modules/author_cache.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.author_cache import Author_Login_Cache
+
+
+def test_author_login_cache(tmp_path):
+    cache = Author_Login_Cache(path=str(tmp_path / "authors.db"), ttl=60, negative_ttl=60)
+    assert cache.lookup("Ann", "ann@example.com") == (False, None), "unknown author should be a miss"
+
+    cache.store("Ann", "Ann@Example.com", "ann-gh")
+    cache.store("Bob", "bob@example.com", None)
+    assert cache.lookup("Ann", "ann@example.com") == (True, "ann-gh"), "emails should be compared case insensitively"
+    assert cache.lookup("Bob", "bob@example.com") == (True, None), "authors without an account should be cached too"
+    assert cache.lookup("Ann", "other@example.com") == (False, None)
+
+    cache.negative_ttl = 0
+    assert cache.lookup("Bob", "bob@example.com") == (False, None), "expired entries should be misses"
+    assert cache.lookup("Ann", "ann@example.com") == (True, "ann-gh")
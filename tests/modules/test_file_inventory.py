@@ -0,0 +1,42 @@
+import os
+import sys
+
+curdir = os.path.dirname(os.path.realpath("modules/file_inventory.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.api_utils import get_file_checks, retriev_files
+from modules.file_inventory import File_Inventory
+
+
+def make_tree(root, files):
+    for name in files:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1\n")
+
+
+def test_inventory(tmp_path):
+    make_tree(tmp_path, ["README.md", "a.py", "data.npy", "nb.ipynb", "src/b.py", "src/app.js", "src/Lib/c.py",
+                         "node_modules/pkg/index.js", "venv/lib/d.py", ".github/workflows/ci.yml", "archive.tar.gz"])
+    (tmp_path / "src" / "link").symlink_to(tmp_path / "src" / "Lib")
+
+    inventory = File_Inventory().scan_dir("./", cwd=str(tmp_path))
+    assert sorted(inventory.excluded_dirs) == ["./node_modules", "./src/Lib", "./venv"]
+    assert inventory.get_files([".py"]) == ["./src/b.py", "./a.py"], "files of sub directories should come first"
+    assert inventory.get_files(["py"]) == ["./src/b.py", "./a.py", "./data.npy"]
+    assert inventory.get_files([".tar.gz", ".js"]) == ["./src/app.js", "./archive.tar.gz"]
+    assert inventory.get_size("./a.py") == 6
+
+    checks = get_file_checks(exclude_list=[], file_extensions=["py", "js", "ipynb"], files_to_check=["README.md", "dockerfile"],
+                             dirs_to_check=[".github", ".dvc"], inventory=inventory)
+    assert checks == {"interested_files": [{"name": "readme.md", "present": True}, {"name": "dockerfile", "present": False},
+                                           {"name": ".github", "present": True}, {"name": ".dvc", "present": False}],
+                      "num_dirs": 4, "num_files": 8, "num_py": 3, "num_js": 1, "num_ipynb": 1}
+
+    inventory.add_file("./src", "nb.py")
+    assert retriev_files("./", [".py"], cwd=str(tmp_path), inventory=inventory)[-1] == ("./src/nb.py", "./src/changed_nb.py")
+    assert not (tmp_path / "venv").exists() and not (tmp_path / "src" / "Lib").exists(), \
+        "excluded directories with python files should be removed from the checkout"
+    assert (tmp_path / "node_modules" / "pkg" / "index.js").exists(), "excluded directories without python files should be kept"
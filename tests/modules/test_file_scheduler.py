@@ -0,0 +1,49 @@
+import os
+import sys
+
+curdir = os.path.dirname(os.path.realpath("modules/file_scheduler.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+import modules.Run_Js_Analysis as run_js
+from modules.Run_Js_Analysis import Run_Js_Analysis
+from modules.Run_Py_Analysis import Run_Py_Analysis
+from modules.file_scheduler import File_Scheduler
+
+
+def make_files(root, ext, n):
+    for i in range(n):
+        (root / "f{}{}".format(i, ext)).write_text("\n".join("function f_{}(a) {{ if (a) {{ return {} }} return 0 }}".format(j, j) if ext == ".js"
+                                                            else "def f_{}(a):\n    return a if a else {}\n".format(j, j) for j in range(i + 1)))
+    return ["./f{}{}".format(i, ext) for i in range(n)]
+
+
+def test_get_chunks(tmp_path):
+    files = make_files(tmp_path, ".py", 5)
+    chunks = File_Scheduler(workers=2, chunk_size=2).get_chunks(files, cwd=str(tmp_path))
+    assert chunks == [[4, 3], [2, 1], [0]], "the largest files should come first"
+
+
+def test_map_files(tmp_path):
+    files = make_files(tmp_path, ".py", 7)
+    analyser = Run_Py_Analysis(cwd=str(tmp_path))
+    scheduler = File_Scheduler(workers=2, chunk_size=2, min_files=0)
+    try:
+        assert scheduler.map_files(analyser.analyze_file, files) == [analyser.analyze_file(f) for f in files]
+        assert scheduler.pool is not None, "the files should be analysed in the worker processes"
+    finally:
+        scheduler.reset_pool()
+
+
+def test_js_analysis_in_worker_processes(tmp_path, monkeypatch):
+    files = make_files(tmp_path, ".js", 5)
+    additions = {f: 1 for f in files}
+    expected = Run_Js_Analysis([(f,) for f in files], additions, cwd=str(tmp_path)).run_analysis()
+
+    scheduler = File_Scheduler(workers=2, chunk_size=2, min_files=0)
+    monkeypatch.setattr(run_js, "file_scheduler", scheduler)
+    try:
+        assert Run_Js_Analysis([(f,) for f in files], additions, cwd=str(tmp_path)).run_analysis() == expected
+    finally:
+        scheduler.reset_pool()
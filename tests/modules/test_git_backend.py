@@ -0,0 +1,101 @@
+import os
+import sys
+
+import pytest
+
+curdir = os.path.dirname(os.path.realpath("modules/git_backend.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.git_backend import Pygit2_Git_Backend, Subprocess_Git_Backend, get_git_backend, pygit2
+
+
+backends = [Subprocess_Git_Backend()]
+if pygit2 is not None:
+    backends.append(Pygit2_Git_Backend())
+
+
+@pytest.fixture(scope="module")
+def repo(tmp_path_factory, git):
+    src = tmp_path_factory.mktemp("src")
+    git(src, "init", "-q", "-b", "main")
+    (src / "a.py").write_text("".join("a_{} = {}\n".format(i, i) for i in range(10)))
+    (src / "b.py").write_text("b = 1\n")
+    git(src, "add", ".")
+    git(src, "commit", "-q", "-m", "first")
+    git(src, "mv", "a.py", "c.py")
+    (src / "b.py").write_text("b = 2\n")
+    git(src, "commit", "-q", "-am", "second\n\nbody")
+    git(src, "checkout", "-q", "-b", "other")
+    (src / "d.py").write_text("d = 1\n")
+    git(src, "add", ".")
+    git(src, "commit", "-q", "-m", "third")
+    git(src, "checkout", "-q", "main")
+
+    clone = tmp_path_factory.mktemp("clone") / "repo"
+    git(src, "clone", "-q", str(src), str(clone))
+    return clone
+
+
+def test_get_git_backend():
+    assert get_git_backend("subprocess").name == "subprocess"
+    assert get_git_backend("pygit2").name == ("pygit2" if pygit2 is not None else "subprocess")
+
+
+@pytest.mark.parametrize("backend", backends, ids=lambda b: b.name)
+def test_refs_and_commits(repo, backend, git):
+    assert backend.get_branch(str(repo)) == "main"
+    details, stderr = backend.get_head_commit(str(repo))
+    assert details["message"] == "second" and details["author"] == "test"
+
+    commits = backend.walk_name_status(path=str(repo))
+    assert [c[0] for c in commits] == git(repo, "log", "--format=%H").split()
+    assert sorted(commits[0][1]) == [("M", ("b.py",)), ("R100", ("a.py", "c.py"))]
+    assert sorted(commits[1][1]) == [("A", ("a.py",)), ("A", ("b.py",))]
+
+
+@pytest.mark.parametrize("backend", backends, ids=lambda b: b.name)
+def test_diff_and_blobs(repo, backend, git):
+    first, second = git(repo, "log", "--format=%H").split()[::-1]
+    diffs = backend.diff(first, second, ["./b.py", "c.py"], str(repo))
+    assert diffs["./b.py"].splitlines()[-2:] == ["-b = 1", "+b = 2"]
+    assert diffs["c.py"].splitlines()[1] == "new file mode 100644"
+    assert diffs["c.py"] == git(repo, "diff", first, second, "--", "c.py")
+
+    assert backend.read_blob(first, "./b.py", str(repo)) == b"b = 1\n"
+    assert backend.read_blob(first, "c.py", str(repo)) is None
+
+
+@pytest.mark.parametrize("backend", backends, ids=lambda b: b.name)
+def test_checkout(repo, backend):
+    stderr, return_code = backend.checkout("other", str(repo))
+    assert return_code == 0, stderr
+    assert backend.get_branch(str(repo)) == "other"
+    assert (repo / "d.py").exists()
+    assert backend.checkout("missing", str(repo))[1] != 0
+    assert backend.checkout("main", str(repo))[1] == 0
+
+
+@pytest.mark.skipif(pygit2 is None, reason="pygit2 is not installed")
+def test_walk_order_parity(git, git_repo, monkeypatch):
+    def commit(name, date):
+        monkeypatch.setenv("GIT_COMMITTER_DATE", date)
+        (git_repo / name).write_text("{} = 1\n".format(name[0]))
+        git(git_repo, "add", ".")
+        git(git_repo, "commit", "-q", "-m", name)
+
+    commit("a.py", "2020-01-01T00:00:00")
+    git(git_repo, "checkout", "-q", "-b", "side")
+    # side branch commits with skewed clocks
+    commit("b.py", "2020-01-05T00:00:00")
+    commit("c.py", "2019-01-01T00:00:00")
+    git(git_repo, "checkout", "-q", "main")
+    commit("d.py", "2020-01-03T00:00:00")
+    commit("e.py", "2020-01-02T00:00:00")
+    monkeypatch.setenv("GIT_COMMITTER_DATE", "2020-01-04T00:00:00")
+    git(git_repo, "merge", "-q", "--no-ff", "-m", "merge", "side")
+    commit("f.py", "2020-01-06T00:00:00")
+
+    expected = Subprocess_Git_Backend().walk_name_status(path=str(git_repo))
+    assert Pygit2_Git_Backend().walk_name_status(path=str(git_repo)) == expected
@@ -0,0 +1,70 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+curdir = os.path.dirname(os.path.realpath("modules/github_graphql.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.github_graphql import Repo_Meta_Store, User_Stats_Store, build_repo_meta_query, get_contribution_windows, parse_repo_meta
+
+
+def branch_ref(total, logins):
+    return {"name": "main", "target": {"oid": "abc", "history": {
+        "totalCount": total, "nodes": [{"author": {"user": {"login": l} if l else None}} for l in logins]}}}
+
+
+def test_build_repo_meta_query():
+    query = build_repo_meta_query([("user", "repo_a", None), ("user", "repo_b", "dev")])
+    assert 'r0: repository(owner: "user", name: "repo_a") { ...RepoMeta }' in query
+    assert 'r1: repository(owner: "user", name: "repo_b") { ...RepoMeta branch: ref(qualifiedName: "refs/heads/dev") { ...BranchHistory } }' in query
+    assert "fragment RepoMeta on Repository" in query and "fragment BranchHistory on Ref" in query
+
+
+def test_parse_repo_meta():
+    repo_json = {"name": "repo_b",
+                 "languages": {"totalSize": 300, "edges": [{"size": 200, "node": {"name": "Python"}},
+                                                          {"size": 100, "node": {"name": "Shell"}}]},
+                 "refs": {"totalCount": 2},
+                 "defaultBranchRef": branch_ref(3, ["b", "a", "a"]),
+                 "branch": branch_ref(5, ["a"])}
+
+    meta = parse_repo_meta(repo_json, branch="dev")
+    assert meta == {"languages": {"Python": 200, "Shell": 100}, "branches": 2, "total_commits": 5, "contributors": ["a", "b"]}
+
+    assert parse_repo_meta(repo_json)["total_commits"] == 3, "default branch should be counted without a branch"
+
+    repo_json["branch"] = None
+    assert parse_repo_meta(repo_json, branch="dev")["total_commits"] is None, "missing branch should give None"
+
+    repo_json["defaultBranchRef"] = branch_ref(150, ["a"] * 100)
+    assert parse_repo_meta(repo_json)["contributors"] is None, "truncated history should fall back to REST"
+
+
+def test_repo_meta_store():
+    store = Repo_Meta_Store()
+    store.put({("User", "Repo", None): {"branches": 1}, ("user", "other", " "): None, ("user", "repo", "dev"): {"branches": 2}})
+
+    assert store.get("user", "repo") == {"branches": 1}, "keys should be case insensitive"
+    assert store.get("user", "repo", " ") == {"branches": 1}, "a blank branch should match the default branch"
+    assert store.get("user", "repo", "dev") == {"branches": 2}
+    assert store.get("user", "other") is None, "failed repositories should not be stored"
+
+    store.clear()
+    assert store.get("user", "repo") is None
+
+
+def test_user_stats_store():
+    store = User_Stats_Store()
+    store.put({("Trainee",): {"commits": 3}, ("missing",): None})
+    assert store.get("trainee") == {"commits": 3}
+    assert store.get("missing") is None
+
+
+def test_get_contribution_windows():
+    now = datetime(2022, 6, 1, tzinfo=timezone.utc)
+    windows = get_contribution_windows(datetime(2020, 1, 1, tzinfo=timezone.utc), now)
+    assert len(windows) == 3, "two and a half years should need three spans"
+    assert windows[0] == ("2020-01-01T00:00:00Z", "2020-12-30T23:59:59Z")
+    assert windows[-1][1] == "2022-05-31T23:59:59Z", "last span should end at now"
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+curdir = os.path.dirname(os.path.realpath("modules/mirror_store.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.mirror_store import Mirror_Store, fcntl
+
+
+def test_clone_from_mirror(tmp_path, git, git_repo):
+    src = git_repo
+    (src / "a.py").write_text("a = 1\n")
+    git(src, "add", ".")
+    git(src, "commit", "-q", "-m", "first")
+
+    store = Mirror_Store(path=str(tmp_path / "mirrors"))
+    stderr, return_code = store.clone(str(src), str(tmp_path / "c1"))
+    assert return_code == 0, stderr
+    assert git(tmp_path / "c1", "remote", "get-url", "origin").strip() == str(src), "origin should point to the clone url"
+
+    (src / "b.py").write_text("b = 2\n")
+    git(src, "add", ".")
+    git(src, "commit", "-q", "-m", "second")
+
+    stderr, return_code = store.clone(str(src), str(tmp_path / "c2"))
+    assert return_code == 0, stderr
+    assert len(git(tmp_path / "c2", "log", "--oneline").splitlines()) == 2, "mirror should have fetched the new commit"
+    assert "origin/main" in git(tmp_path / "c2", "branch", "-r")
+
+    store.budget = 0
+    assert store.evict(keep=store.get_mirror_path(str(src))) == [], "the kept mirror should not be evicted"
+    assert store.evict() == [store.get_mirror_path(str(src))]
+
+
+@pytest.mark.skipif(fcntl is None, reason="fcntl is not available")
+def test_evict_skips_mirror_locked_by_another_process(tmp_path, git, git_repo):
+    (git_repo / "a.py").write_text("a = 1\n")
+    git(git_repo, "add", ".")
+    git(git_repo, "commit", "-q", "-m", "first")
+
+    store = Mirror_Store(path=str(tmp_path / "mirrors"), budget_mb=0)
+    mirror_path = store.get_mirror_path(str(git_repo))
+    assert store.clone(str(git_repo), str(tmp_path / "c1"))[1] == 0
+    assert int(open(mirror_path + ".size").read()) > 0, "the size of the mirror should be recorded after the fetch"
+
+    # a lock taken through another open file stands for another process cloning from the mirror
+    with open(mirror_path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        assert store.evict() == [], "a mirror in use should not be evicted"
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    assert store.evict() == [mirror_path]
+    assert not os.path.exists(mirror_path + ".size")
@@ -0,0 +1,54 @@
+import io
+import json
+import os
+import sys
+
+import nbformat
+
+curdir = os.path.dirname(os.path.realpath("modules/notebook_converter.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.api_utils import convert_nb_to_py
+from modules.notebook_converter import Json_Stream, comment_magics, read_notebook_cells
+
+
+def test_json_stream():
+    value = {"a": [1, -2.5e3, True, None, {}], "b\\\"": "x\\\\\"é\n" * 10, "c": {"d": []}}
+    for chunk_size in (1, 3, 64):
+        stream = Json_Stream(io.StringIO(json.dumps(value, indent=1) + " 7"), chunk_size=chunk_size)
+        assert stream.read_value() == value
+        assert stream.read_value() == 7
+
+        stream = Json_Stream(io.StringIO(json.dumps(value) + " 7"), chunk_size=chunk_size)
+        stream.skip_value()
+        assert stream.read_value() == 7
+
+
+def test_comment_magics():
+    source = "%matplotlib inline\nimport os\n!pip install x\nfiles = !ls\ndf.head?\nfor f in files:\n    %time print(f)\nx %= 3"
+    assert comment_magics(source) == ("# %matplotlib inline\nimport os\n# !pip install x\n# files = !ls\n# df.head?\n"
+                                      "for f in files:\n    pass  # %time print(f)\nx %= 3")
+    assert comment_magics("%%bash\necho hi") == "# %%bash\n# echo hi"
+
+
+def test_convert_nb_to_py(tmp_path):
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [nbformat.v4.new_markdown_cell("# Title"),
+                nbformat.v4.new_code_cell("%matplotlib inline\nx = 1", execution_count=1,
+                                          outputs=[nbformat.v4.new_output("display_data", data={"image/png": "iVBOR" * 100000})]),
+                nbformat.v4.new_raw_cell("raw")]
+    nbformat.write(nb, str(tmp_path / "nb.ipynb"))
+    (tmp_path / "bad.ipynb").write_text('{"cells": [')
+
+    cells = read_notebook_cells(str(tmp_path / "nb.ipynb"))
+    assert [c["source"] for c in cells] == ["# Title", "%matplotlib inline\nx = 1", "raw"]
+    assert all("outputs" not in c for c in cells)
+
+    out_dict = convert_nb_to_py(["./nb.ipynb", "./bad.ipynb"], cwd=str(tmp_path))
+    assert out_dict == {"success": ["./nb.ipynb"], "fail": ["./bad.ipynb"]}
+    assert (tmp_path / "nb.py").read_text() == "#!/usr/bin/env python\n# coding: utf-8\n\n# # Title\n\n# In[1]:\n\n\n# %matplotlib inline\nx = 1\n\n"
+
+    out_dict = convert_nb_to_py(["./nb.ipynb"], cwd=str(tmp_path), write=False)
+    assert out_dict["scripts"]["./nb.py"] == (tmp_path / "nb.py").read_text()
@@ -0,0 +1,80 @@
+import os
+import sys
+
+curdir = os.path.dirname(os.path.realpath("modules/rate_limiter.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.rate_limiter import Rate_Limit_Scheduler, get_resource
+
+
+class Fake_Response:
+    def __init__(self, status_code, headers, text=""):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+
+class Fake_Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def rate_headers(remaining, reset, limit=5000, resource="core"):
+    return {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(reset),
+            "X-RateLimit-Limit": str(limit), "X-RateLimit-Resource": resource}
+
+
+def test_get_resource():
+    assert get_resource("https://api.github.com/search/issues?q=author:x") == "search"
+    assert get_resource("https://api.github.com/graphql") == "graphql"
+    assert get_resource("https://api.github.com/repos/x/y/languages") == "core"
+
+
+def test_no_wait_with_budget_left():
+    fc = Fake_Clock()
+    scheduler = Rate_Limit_Scheduler(clock=fc.clock, sleep=fc.sleep)
+    scheduler.update("t", "core", Fake_Response(200, rate_headers(4000, fc.now + 3600)))
+    assert scheduler.acquire("t", "core") == 0, "should not wait while most of the budget is left"
+    assert fc.slept == []
+
+
+def test_wait_for_reset_when_budget_is_spent():
+    fc = Fake_Clock()
+    scheduler = Rate_Limit_Scheduler(clock=fc.clock, sleep=fc.sleep)
+    retry = scheduler.update("t", "core", Fake_Response(403, rate_headers(0, fc.now + 100), "API rate limit exceeded"))
+    assert retry, "a primary rate limit rejection should be retried"
+    assert scheduler.acquire("t", "core") == 101, "should wait until one second after the reset"
+    assert scheduler.acquire("other", "core") == 0, "other tokens have their own budget"
+
+
+def test_pacing_below_threshold():
+    fc = Fake_Clock()
+    scheduler = Rate_Limit_Scheduler(reserve=0, clock=fc.clock, sleep=fc.sleep)
+    scheduler.update("t", "search", Fake_Response(200, rate_headers(2, fc.now + 60, limit=30, resource="search")))
+    assert scheduler.acquire("t", "search") == 0, "first request goes out immediately"
+    assert scheduler.acquire("t", "search") == 30, "second request is spread over the time left to reset"
+
+
+def test_secondary_rate_limit_backoff():
+    fc = Fake_Clock()
+    scheduler = Rate_Limit_Scheduler(secondary_backoff=10, clock=fc.clock, sleep=fc.sleep)
+    resp = Fake_Response(403, {}, "You have exceeded a secondary rate limit")
+    assert scheduler.update("t", "core", resp)
+    assert scheduler.acquire("t", "core") == 10
+    assert scheduler.update("t", "core", resp)
+    assert scheduler.acquire("t", "core") == 20, "backoff should double on repeated rejections"
+
+    assert scheduler.update("t", "core", Fake_Response(403, {"Retry-After": "5"}))
+    assert scheduler.acquire("t", "core") == 5, "Retry-After should be honoured"
+
+    assert not scheduler.update("t", "core", Fake_Response(403, {}, "Resource not accessible")), "permission errors are not retried"
@@ -0,0 +1,58 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+curdir = os.path.dirname(os.path.realpath("modules/repo_resolver.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.repo_resolver import Repo_Resolver, create_repo_dict, not_found_error
+
+
+class Repo_Handler(BaseHTTPRequestHandler):
+    """
+    Answers /repos/user/repo case insensitively with the canonical repository and everything else with 404
+    """
+    requests = 0
+
+    def do_GET(self):
+        Repo_Handler.requests += 1
+        if self.path.lower() == "/repos/user/repo":
+            body = json.dumps({"name": "Repo", "html_url": "https://github.com/user/Repo", "forks": 0}).encode("utf-8")
+            self.send_response(200)
+        else:
+            body = json.dumps({"message": "Not Found"}).encode("utf-8")
+            self.send_response(404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_resolve_caches_found_and_not_found():
+    server = HTTPServer(("127.0.0.1", 0), Repo_Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        resolver = Repo_Resolver(api_url="http://127.0.0.1:{}".format(server.server_port))
+
+        repo_details, error = resolver.resolve("user", "repo")
+        assert error is None and repo_details["name"] == "Repo", "details should carry the canonical name"
+        resolver.resolve("User", "REPO")
+        assert Repo_Handler.requests == 1, "a differently cased name should be served from the cache"
+
+        assert resolver.resolve("user", "missing") == (None, not_found_error)
+        resolver.resolve("user", "missing")
+        assert Repo_Handler.requests == 2, "not found results should be cached too"
+
+    finally:
+        server.shutdown()
+
+    repo_dict = create_repo_dict(repo_details, ["forks", "html_url"], branch="dev")
+    assert repo_dict == {"Repo": {"forks": 0, "html_url": "https://github.com/user/Repo/tree/dev", "repo_name": "Repo"}}
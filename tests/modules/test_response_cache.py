@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+curdir = os.path.dirname(os.path.realpath("modules/response_cache.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.response_cache import Response_Cache, send_cached_get_req
+
+
+class ETag_Handler(BaseHTTPRequestHandler):
+    """
+    Serves a fixed json body with an ETag and answers matching If-None-Match headers with 304
+    """
+    body = json.dumps({"Python": 100}).encode("utf-8")
+    etag = '"abc123"'
+    full_responses = 0
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        ETag_Handler.full_responses += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_send_cached_get_req(tmp_path):
+    server = HTTPServer(("127.0.0.1", 0), ETag_Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}/repos/user/repo/languages".format(server.server_port)
+    headers = {"Authorization": "Bearer token"}
+
+    try:
+        cache = Response_Cache(path=str(tmp_path / "cache.db"), max_age=0)
+
+        resp, status_code = send_cached_get_req(url, headers, cache=cache)
+        assert status_code == 200 and resp.json() == {"Python": 100}, "first request should return the body"
+
+        resp, status_code = send_cached_get_req(url, headers, cache=cache)
+        assert status_code == 200 and resp.json() == {"Python": 100}, "304 should be answered with the stored body"
+        assert ETag_Handler.full_responses == 1, "second request should have been revalidated, not downloaded"
+
+        resp, status_code = send_cached_get_req(url, {"Authorization": "Bearer other"}, cache=cache)
+        assert ETag_Handler.full_responses == 2, "a different token scope should not share the cached entry"
+
+        assert cache.get_stats() == {"hits": 0, "misses": 2, "not_modified": 1}, "unexpected counters {}".format(cache.get_stats())
+
+        cache.max_age = 60
+        resp, status_code = send_cached_get_req(url, headers, cache=cache)
+        assert cache.get_stats()["hits"] == 1, "fresh entry should be served without a request"
+
+    finally:
+        server.shutdown()
@@ -0,0 +1,112 @@
+import os
+import sys
+
+curdir = os.path.dirname(os.path.realpath("modules/Retrieve_Commit_History.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+import modules.Retrieve_Commit_History as rch
+from modules.Retrieve_Commit_History import Retrieve_Commit_History, stream_cmd_process
+from modules.history_checkpoint import History_Checkpoint_Store
+
+
+def test_stream_cmd_process_stops_process():
+    lines = stream_cmd_process(["yes"])
+    assert next(lines) == "y"
+    lines.close()
+
+
+def test_commit_history(git, git_repo):
+    for i, author in enumerate(["ann", "ben", "ann"]):
+        (git_repo / "a.py").write_text("".join("a_{} = {}\n".format(j, j) for j in range(i + 1)))
+        git(git_repo, "add", ".")
+        git(git_repo, "commit", "-q", "-m", "commit {}".format(i), author=author)
+
+    ret_commit = Retrieve_Commit_History(branch_dict={"default": "main", "branch": "main"}, cwd=str(git_repo))
+    history = ret_commit.get_commit_history_and_contributors()
+    assert history["commits_on_branch"] == history["commits_on_default_to_branch"] == 3
+    assert "since_sha" not in history and "checkpoint" not in history, "only the incremental retrieval should report checkpoints"
+    assert [c["message"] for c in history["commit_history"]] == ["commit 2", "commit 1", "commit 0"]
+    assert history["contribution_counts"] == [{"author": "ann", "total_commits": 2, "total_additions": 2, "total_deletions": 0},
+                                              {"author": "ben", "total_commits": 1, "total_additions": 1, "total_deletions": 0}]
+
+
+def test_commit_records(git, git_repo):
+    (git_repo / "dir with space").mkdir()
+    (git_repo / "dir with space" / "a|b.py").write_text("".join("x_{} = {}\n".format(i, i) for i in range(150)))
+    (git_repo / "data.bin").write_bytes(b"\0\1\2")
+    git(git_repo, "add", ".")
+    git(git_repo, "commit", "-q", "-m", "**bold** ## and | pipes")
+    (git_repo / "dir with space" / "a|b.py").write_text("".join("x_{} = {}\n".format(i, i) for i in range(3, 160)))
+    git(git_repo, "mv", "data.bin", "moved.bin")
+    git(git_repo, "commit", "-q", "-am", "change")
+
+    second, first = Retrieve_Commit_History(cwd=str(git_repo)).iter_commits()
+    assert first["message"] == "**bold** ## and | pipes"
+    assert first["files"] == {"dir with space/a|b.py": {"change_status": "Created", "file_type": "non-binary", "additions": 150, "deletions": 0},
+                              "data.bin": {"change_status": "Created", "file_type": "binary"}}
+    assert second["files"]["dir with space/a|b.py"] == {"change_status": "Modified", "file_type": "non-binary", "additions": 10, "deletions": 3}
+    assert second["files"]["data.bin"] == {"change_status": "Renamed", "renamed_to": "moved.bin", "similarity_index": "100", "file_type": "binary"}
+
+
+def test_incremental_commit_history(tmp_path, git, git_repo, monkeypatch):
+    monkeypatch.setattr(rch, "history_checkpoints", History_Checkpoint_Store(path=str(tmp_path / "checkpoints.db")))
+    repo = git_repo
+
+    def commit(i, author):
+        (repo / "a.py").write_text("".join("a_{} = {}\n".format(j, j) for j in range(i + 1)))
+        git(repo, "add", ".")
+        git(repo, "commit", "-q", "-m", "commit {}".format(i), author=author)
+
+    def history(store=True):
+        result = Retrieve_Commit_History(cwd=str(repo), checkpoint_key="owner/repo").get_commit_history_and_contributors()
+        # the caller stores the checkpoint once it has used the history
+        if store:
+            rch.history_checkpoints.store(**result["checkpoint"])
+        return result
+
+    commit(0, "ann")
+    commit(1, "ben")
+    assert history(store=False)["checkpoint"]["head_sha"] == git(repo, "rev-parse", "HEAD").strip()
+    first = history()
+    assert first["since_sha"] is None and first["commits_on_branch"] == 2
+
+    commit(2, "ann")
+    second = history()
+    assert second["since_sha"] == first["commit_history"][0]["commit_sha"]
+    assert [c["message"] for c in second["commit_history"]] == ["commit 2"], "only the new commits should be read"
+    assert second["commits_on_branch"] == 3
+    assert sorted(second["contribution_counts"], key=lambda c: c["author"]) == [{"author": "ann", "total_commits": 2, "total_additions": 2, "total_deletions": 0},
+                                             {"author": "ben", "total_commits": 1, "total_additions": 1, "total_deletions": 0}]
+
+    # a rewritten branch is read from the start
+    git(repo, "reset", "-q", "--hard", "HEAD~2")
+    commit(3, "ben")
+    third = history()
+    assert third["since_sha"] is None and third["commits_on_branch"] == 2
+
+
+def test_stat_pathspec_side_branch(git, git_repo, monkeypatch):
+    (git_repo / "a.py").write_text("a = 1\n")
+    git(git_repo, "add", ".")
+    git(git_repo, "commit", "-q", "-m", "first")
+
+    # a side branch that changes a.py and changes it back, committed with skewed clocks
+    git(git_repo, "checkout", "-q", "-b", "side")
+    for message, content, date in [("change", "a = 2\n", "2030-01-01T00:00:00"), ("revert", "a = 1\n", "2001-01-01T00:00:00")]:
+        monkeypatch.setenv("GIT_COMMITTER_DATE", date)
+        (git_repo / "a.py").write_text(content)
+        git(git_repo, "commit", "-q", "-am", message)
+    monkeypatch.delenv("GIT_COMMITTER_DATE")
+
+    git(git_repo, "checkout", "-q", "main")
+    (git_repo / "b.txt").write_text("b\n")
+    git(git_repo, "add", ".")
+    git(git_repo, "commit", "-q", "-m", "text")
+    git(git_repo, "merge", "-q", "--no-ff", "-m", "merge", "side")
+
+    commits = {c["message"]: c["files"] for c in Retrieve_Commit_History(stat_pathspec=["*.py"], cwd=str(git_repo)).iter_commits()}
+    full = {c["message"]: c["files"] for c in Retrieve_Commit_History(cwd=str(git_repo)).iter_commits()}
+    assert commits["change"] == full["change"] and commits["revert"] == full["revert"], "commits of side branches should have their stats"
+    assert commits["text"]["b.txt"] == {"change_status": "Created"}, "stats of files outside the pathspec should not be retrieved"
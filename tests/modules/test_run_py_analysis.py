@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+
+curdir = os.path.dirname(os.path.realpath("modules/Run_Py_Analysis.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.Run_Py_Analysis import Run_Py_Analysis
+from modules.api_utils import run_changed_content_analysis, run_pyanalysis
+
+
+def make_tree(root):
+    (root / "pkg").mkdir()
+    (root / ".hidden").mkdir()
+    (root / "pkg" / "a.py").write_text('"""module"""\n\n\nclass A:\n    def f(self, x):\n        # comment\n        if x and x > 1:\n            return [i for i in range(x)]\n        return None\n')
+    (root / "b.py").write_text("def g(y):\n    return y ** 2 + 1\n\n\nprint(g(2))\n")
+    (root / "empty.py").write_text("")
+    (root / "syntax.py").write_text('print "python 2"\n')
+    (root / "script").write_text("#!/usr/bin/env python\nx = 1\n")
+    (root / ".hidden" / "c.py").write_text("x = 1\n")
+    (root / "nb.ipynb").write_text("{}")
+
+
+def test_results_match_radon_cli(tmp_path):
+    make_tree(tmp_path)
+    results = json.loads(json.dumps(Run_Py_Analysis(cwd=str(tmp_path)).run_analysis()))
+    for metric, flags in (("hal", []), ("cc", ["-s"]), ("raw", ["-s"]), ("mi", ["-s"])):
+        stdout = subprocess.run(["radon", metric, "./", "-j"] + flags, cwd=str(tmp_path), stdout=subprocess.PIPE, universal_newlines=True).stdout
+        assert results[metric] == json.loads(stdout), metric
+    assert set(results["raw"]) == {"pkg/a.py", "b.py", "empty.py", "syntax.py", "script"}
+    assert "error" in results["cc"]["syntax.py"] and "error" not in results["raw"]["syntax.py"]
+
+
+def test_run_pyanalysis(tmp_path):
+    make_tree(tmp_path)
+    analysis_results = run_pyanalysis(cwd=str(tmp_path))
+    assert list(analysis_results) == ["halstead_complexity", "cyclomatic_complexity", "raw_metrics", "maintainability_index"]
+    assert list(analysis_results["halstead_complexity"]["b.py"]) == ["difficulty", "effort", "time"]
+    assert analysis_results["halstead_complexity"]["syntax.py"] == {"difficulty": 0, "effort": 0, "time": 0}
+    assert analysis_results["cyclomatic_complexity"]["pkg/a.py"][0]["methods"][0]["name"] == "f"
+
+
+def test_run_changed_content_analysis():
+    analysis_results = run_changed_content_analysis({"./a.py": "def f(x):\n    return x", "./b.js": "var x = 1;", "./c.py": "print 1"})
+    assert list(analysis_results["raw_metrics"]) == ["./a.py", "./c.py"], "only python content should be analysed"
+    assert analysis_results["cyclomatic_complexity"]["./a.py"][0]["name"] == "f"
+    assert "error" in analysis_results["maintainability_index"]["./c.py"]
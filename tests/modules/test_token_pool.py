@@ -0,0 +1,41 @@
+import os
+import sys
+
+curdir = os.path.dirname(os.path.realpath("modules/token_pool.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.rate_limiter import Rate_Limit_Scheduler, get_token_scope
+from modules.token_pool import Token_Pool
+
+
+class Fake_Response:
+    def __init__(self, remaining, reset):
+        self.status_code = 200
+        self.text = ""
+        self.headers = {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(reset),
+                        "X-RateLimit-Limit": "5000", "X-RateLimit-Resource": "core"}
+
+
+def test_lease_rotates_on_exhausted_token():
+    now = 1000.0
+    scheduler = Rate_Limit_Scheduler(clock=lambda: now, sleep=lambda s: None)
+    pool = Token_Pool(["token_a", "token_b", "token_a", None], scheduler=scheduler, clock=lambda: now)
+    assert pool.tokens == ["token_a", "token_b"], "duplicates and empty tokens should be dropped"
+
+    assert pool.lease() == "token_a"
+    assert pool.lease() == "token_b", "unused tokens should be leased evenly"
+
+    scope_a = get_token_scope(pool.get_headers("token_a"))
+    scope_b = get_token_scope(pool.get_headers("token_b"))
+    scheduler.update(scope_a, "core", Fake_Response(4000, now + 600))
+    scheduler.update(scope_b, "core", Fake_Response(1, now + 300))
+    assert pool.lease() == "token_a", "exhausted token should be skipped"
+
+    scheduler.update(scope_a, "core", Fake_Response(0, now + 600))
+    assert pool.lease() == "token_b", "the token that resets first should be used when all are exhausted"
+
+    scheduler.acquire(scope_a, "core")
+    usage = pool.get_usage_report()
+    assert usage[0] == {"token": "****en_a", "leases": 2, "requests": {"core": 1}, "remaining": {"core": 0}}
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+
+curdir = os.path.dirname(os.path.realpath("modules/workspace.py"))
+cpath = os.path.dirname(curdir)
+if not cpath in sys.path:
+    sys.path.append(cpath)
+
+from modules.workspace import Workspace, get_base_dir, sweep_workspaces, workspace_host
+
+
+def test_workspaces_are_unique(tmp_path):
+    first = Workspace("starter", tmp_dir=str(tmp_path))
+    second = Workspace("starter", tmp_dir=str(tmp_path))
+    assert first.root != second.root
+    assert os.path.basename(first.root) == "starter", "the checkout should be named after the repository"
+
+    with first, second:
+        open(os.path.join(first.root, "a.py"), "w").close()
+        second.create()
+        assert os.path.exists(first.resolve("./a.py")), "a workspace should not remove the checkout of another"
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_workspace_removed_on_error(tmp_path):
+    with pytest.raises(RuntimeError):
+        with Workspace("repo", job_id="job1", tmp_dir=str(tmp_path)) as workspace:
+            assert os.path.isdir(workspace.root)
+            raise RuntimeError()
+    assert not os.path.exists(workspace.path)
+
+
+def test_get_base_dir(tmp_path):
+    disk, ram = str(tmp_path / "disk"), str(tmp_path)
+    assert get_base_dir(100, disk_dir=disk, ram_dir=ram, ram_max_kb=1000) == ram
+    assert get_base_dir(2000, disk_dir=disk, ram_dir=ram, ram_max_kb=1000) == disk
+    assert get_base_dir(None, disk_dir=disk, ram_dir=ram, ram_max_kb=1000) == disk
+    assert get_base_dir(100, disk_dir=disk, ram_dir="", ram_max_kb=1000) == disk
+    assert get_base_dir(100, disk_dir=disk, ram_dir=str(tmp_path / "missing"), ram_max_kb=1000) == disk
+
+
+def test_sweep_workspaces(tmp_path):
+    live = Workspace("repo", tmp_dir=str(tmp_path)).create()
+    # no process has a pid this large
+    orphan = tmp_path / "ws_{}_4194305_job".format(workspace_host)
+    # the pids of another host sharing the directory cannot be checked
+    other_host = tmp_path / "ws_{}x_4194305_job".format(workspace_host)
+    other = tmp_path / "not_a_workspace"
+    for d in (orphan, other_host, other):
+        d.mkdir()
+
+    assert sweep_workspaces([str(tmp_path)]) == [str(orphan)]
+    assert os.path.exists(live) and other_host.exists() and other.exists()
+
+    assert sweep_workspaces([str(tmp_path)], max_age=-1) == [os.path.dirname(live)]
+    assert other_host.exists() and other.exists()